@@ -151,20 +151,20 @@ def user_detail(request, user_id):
     """
     Détail d'un utilisateur
     """
-    user_obj = get_object_or_404(User, id=user_id)
+    user_obj = get_object_or_404(User.objects.select_related('table_restaurant'), id=user_id)
     
     # Statistiques selon le rôle
     extra_stats = {}
     
     if user_obj.is_table():
-        # Stats pour une table
+        # Stats pour une table (compteurs de sa table physique)
+        from apps.restaurant.models import TableRestaurant
+        compteurs = TableRestaurant.compteurs_pour(user_obj)
         extra_stats = {
-            'total_commandes': user_obj.commandes.count(),
-            'commandes_en_attente': user_obj.commandes.filter(statut='en_attente').count(),
-            'commandes_payees': user_obj.commandes.filter(statut='payee').count(),
-            'montant_total': user_obj.commandes.filter(
-                statut='payee'
-            ).aggregate(total=Count('montant_total'))['total'] or 0,
+            'total_commandes': compteurs['nombre_commandes'],
+            'commandes_en_attente': compteurs['commandes_en_attente'],
+            'commandes_payees': compteurs['commandes_payees'],
+            'montant_total': compteurs['montant_paye'],
         }
     
     elif user_obj.is_comptable():
@@ -1,5 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Commande, CommandeItem
+from .transitions import servir_commande, payer_commande
 
 
 class CommandeItemInline(admin.TabularInline):
@@ -8,7 +9,7 @@ class CommandeItemInline(admin.TabularInline):
     """
     model = CommandeItem
     extra = 0
-    readonly_fields = ('plat', 'quantite', 'prix_unitaire', 'sous_total')
+    readonly_fields = ('plat', 'quantite', 'prix_unitaire', 'sous_total', 'statut')
     can_delete = False
     
     def has_add_permission(self, request, obj=None):
@@ -20,12 +21,15 @@ class CommandeAdmin(admin.ModelAdmin):
     list_display = ('id', 'table', 'montant_total', 'statut','serveur_ayant_servi', 'date_commande')
     list_filter = ('statut', 'date_commande', 'serveur_ayant_servi')
     search_fields = ('table__login', 'id', 'serveur_ayant_servi__login')
-    readonly_fields = ('date_commande', 'date_modification')
+    # Statut modifié uniquement par les transitions (actions ci-dessous) :
+    # paiement, mouvement de caisse et compteurs de la table suivent
+    readonly_fields = ('statut', 'lignes_non_servies', 'date_commande', 'date_modification')
     inlines = [CommandeItemInline]
+    actions = ['marquer_servies', 'marquer_payees']
     
     fieldsets = (
         ('Informations', {
-            'fields': ('table', 'montant_total', 'statut', 'serveur_ayant_servi')
+            'fields': ('table', 'montant_total', 'statut', 'serveur_ayant_servi', 'lignes_non_servies')
         }),
         ('Dates', {
             'fields': ('date_commande', 'date_modification'),
@@ -36,14 +40,38 @@ class CommandeAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Seul l'admin peut supprimer
         return request.user.is_admin() if hasattr(request.user, 'is_admin') else request.user.is_superuser
+    
+    def _appliquer_transition(self, request, queryset, transition, libelle):
+        """Applique la transition à chaque commande ; celles déjà traitées sont ignorées"""
+        commandes = list(queryset.select_related('table'))
+        effectuees = sum(1 for commande in commandes if transition(commande, request.user))
+        ignorees = len(commandes) - effectuees
+        
+        self.message_user(request, f"{effectuees} commande(s) marquée(s) comme {libelle}")
+        if ignorees:
+            self.message_user(
+                request,
+                f"{ignorees} commande(s) ignorée(s) : statut incompatible",
+                level=messages.WARNING
+            )
+    
+    @admin.action(description="Marquer comme servies")
+    def marquer_servies(self, request, queryset):
+        self._appliquer_transition(request, queryset, servir_commande, 'servie(s)')
+    
+    @admin.action(description="Marquer comme payées")
+    def marquer_payees(self, request, queryset):
+        self._appliquer_transition(request, queryset, payer_commande, 'payée(s)')
 
 
 @admin.register(CommandeItem)
 class CommandeItemAdmin(admin.ModelAdmin):
-    list_display = ('commande', 'plat', 'quantite', 'prix_unitaire', 'sous_total')
-    list_filter = ('commande__date_commande',)
+    list_display = ('commande', 'plat', 'quantite', 'prix_unitaire', 'sous_total', 'statut')
+    list_filter = ('statut', 'commande__date_commande')
     search_fields = ('plat__nom', 'commande__id')
-    readonly_fields = ('sous_total',)
+    # Statut modifié uniquement par la cuisine et le service (transitions.py),
+    # qui tiennent à jour le compteur de lignes non servies de la commande
+    readonly_fields = ('statut', 'sous_total')
     
     def has_delete_permission(self, request, obj=None):
         return request.user.is_admin() if hasattr(request.user, 'is_admin') else request.user.is_superuser
\ No newline at end of file
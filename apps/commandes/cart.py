@@ -109,6 +109,31 @@ class Cart:
         """
         return len(self.cart)
     
+    def get_lignes_commande(self):
+        """
+        Valide le panier contre les plats en base, en une seule requête
+        
+        Returns:
+            (lignes, indisponibles) : lignes = liste de (plat, quantite) au
+            prix actuel du plat ; indisponibles = noms des plats retirés de
+            la carte depuis leur ajout au panier
+        """
+        plats = Plat.objects.filter(
+            id__in=self.cart.keys(),
+            disponible=True
+        ).only('id', 'nom', 'prix_unitaire')
+        plats = {str(plat.id): plat for plat in plats}
+        
+        lignes = []
+        indisponibles = []
+        for plat_id, item in self.cart.items():
+            if plat_id in plats:
+                lignes.append((plats[plat_id], item['quantite']))
+            else:
+                indisponibles.append(item['nom'])
+        
+        return lignes, indisponibles
+    
     def is_empty(self):
         """
         Vérifie si le panier est vide
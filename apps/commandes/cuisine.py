@@ -0,0 +1,81 @@
+# apps/commandes/cuisine.py
+
+"""
+File de l'écran cuisine : lignes à préparer regroupées par plat
+("12x Riz gras sur 7 tables"), la plus ancienne commande d'abord, pour que
+les cuisiniers préparent ensemble les plats identiques.
+
+L'écran charge la file complète une fois, puis ne demande que les plats
+touchés depuis un curseur (date_modification des lignes, indexée).
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import CommandeItem
+
+
+# Marge relue avant le curseur : une transaction validée juste après la
+# lecture peut porter une date_modification antérieure au curseur.
+# Les groupes renvoyés étant complets, les relire ne fausse pas l'écran.
+CHEVAUCHEMENT = timedelta(seconds=2)
+
+
+def file_cuisine(plats=None):
+    """
+    Lignes à préparer regroupées par plat, en une seule requête agrégée
+    plats : limiter aux plats indiqués (ids)
+    Chaque groupe : plat_id, plat__nom, plat__categorie, quantite,
+    en_preparation (quantité déjà lancée), nombre_tables, nombre_commandes,
+    plus_ancienne (date de la commande)
+    """
+    lignes = CommandeItem.objects.filter(statut__in=CommandeItem.STATUTS_A_PREPARER)
+    if plats is not None:
+        lignes = lignes.filter(plat_id__in=plats)
+
+    return list(
+        lignes.values('plat_id', 'plat__nom', 'plat__categorie').annotate(
+            # Avant "quantite", qui masque ensuite le champ du même nom
+            en_preparation=Sum('quantite', filter=Q(statut='en_preparation'), default=0),
+            quantite=Sum('quantite'),
+            nombre_tables=Count('commande__table', distinct=True),
+            nombre_commandes=Count('commande', distinct=True),
+            plus_ancienne=Min('commande__date_commande'),
+        ).order_by('plus_ancienne', 'plat__nom')
+    )
+
+
+def changements_cuisine(depuis):
+    """
+    Plats dont la file a changé depuis le curseur (datetime aware)
+    Retourne (groupes, retires, curseur) :
+    - groupes : groupes à jour des plats touchés qui ont encore des lignes en attente
+    - retires : ids des plats touchés qui n'en ont plus
+    - curseur : à renvoyer au prochain appel (inchangé si rien n'a bougé)
+    """
+    touches = dict(
+        CommandeItem.objects.filter(
+            date_modification__gt=depuis - CHEVAUCHEMENT
+        ).values('plat_id').annotate(
+            modification=Max('date_modification')
+        ).order_by().values_list('plat_id', 'modification')
+    )
+    if not touches:
+        return [], [], depuis
+
+    groupes = file_cuisine(plats=list(touches))
+    restants = {groupe['plat_id'] for groupe in groupes}
+    retires = sorted(plat_id for plat_id in touches if plat_id not in restants)
+
+    return groupes, retires, max(depuis, *touches.values())
+
+
+def etat_cuisine():
+    """
+    File complète et curseur pour suivre ensuite ses changements
+    (curseur pris avant la lecture : rien de ce qui suit n'est perdu)
+    """
+    curseur = timezone.now()
+    return file_cuisine(), curseur
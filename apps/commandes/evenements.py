@@ -0,0 +1,209 @@
+# apps/commandes/evenements.py
+
+"""
+Diffusion des événements du cycle de vie des commandes
+(nouvelle commande, plats prêts, servie, payée) vers les écrans des serveurs.
+
+Les vues publient via publier_evenement() ; le flux SSE
+(restaurant:flux_commandes) s'abonne via get_broker().ecouter().
+
+Le backend est choisi par le setting EVENEMENTS_BACKEND :
+- BackendMemoire : en mémoire, dans le processus (développement, tests)
+- BackendRedis   : Pub/Sub Redis, partagé entre workers (production)
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+CANAL_COMMANDES = 'restaurant:commandes'
+
+# Types d'événements publiés
+COMMANDE_CREEE = 'commande_creee'
+COMMANDE_SERVIE = 'commande_servie'
+COMMANDE_PAYEE = 'commande_payee'
+LIGNES_PRETES = 'lignes_pretes'
+
+
+class BackendMemoire:
+    """
+    Backend en mémoire : chaque abonné possède sa propre file asyncio
+    Ne relie que les requêtes d'un même processus
+    """
+
+    # Nombre maximum d'événements en attente par abonné (abonné lent = ignoré)
+    TAILLE_FILE = 100
+
+    def __init__(self, **options):
+        self._abonnes = set()
+        self._verrou = threading.Lock()
+
+    def publier(self, canal, message):
+        with self._verrou:
+            abonnes = list(self._abonnes)
+
+        for canal_abonne, loop, file in abonnes:
+            if canal_abonne != canal:
+                continue
+            try:
+                loop.call_soon_threadsafe(self._deposer, file, message)
+            except RuntimeError:
+                # Boucle de l'abonné déjà fermée
+                pass
+
+    @staticmethod
+    def _deposer(file, message):
+        try:
+            file.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def ecouter(self, canal, attente):
+        """Génère les messages du canal (None à chaque délai d'attente écoulé)"""
+        abonne = (canal, asyncio.get_running_loop(), asyncio.Queue(self.TAILLE_FILE))
+        with self._verrou:
+            self._abonnes.add(abonne)
+
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(abonne[2].get(), attente)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._verrou:
+                self._abonnes.discard(abonne)
+
+
+class BackendRedis:
+    """
+    Backend Redis Pub/Sub : partagé entre tous les workers ASGI/WSGI
+    """
+
+    def __init__(self, url=None, **options):
+        self.url = url or getattr(settings, 'EVENEMENTS_REDIS_URL', settings.CELERY_BROKER_URL)
+        self._client = None
+
+    def publier(self, canal, message):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(canal, message)
+
+    async def ecouter(self, canal, attente):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(canal)
+
+        try:
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=attente
+                )
+                if message is None:
+                    yield None
+                else:
+                    data = message['data']
+                    yield data.decode() if isinstance(data, bytes) else data
+        finally:
+            await pubsub.unsubscribe(canal)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class BrokerEvenements:
+    """
+    Point d'entrée unique : sérialise les événements et les confie au backend
+    """
+
+    def __init__(self, backend, canal=CANAL_COMMANDES):
+        self.backend = backend
+        self.canal = canal
+
+    def publier(self, evenement):
+        self.backend.publier(self.canal, json.dumps(evenement))
+
+    async def ecouter(self, attente=15):
+        """
+        Génère les événements (dict) au fil de l'eau
+        None signale un délai écoulé sans événement (heartbeat)
+        """
+        async for message in self.backend.ecouter(self.canal, attente):
+            yield json.loads(message) if message is not None else None
+
+
+_broker = None
+_broker_verrou = threading.Lock()
+
+
+def get_broker():
+    """Retourne le broker du processus, construit depuis les settings"""
+    global _broker
+
+    if _broker is None:
+        with _broker_verrou:
+            if _broker is None:
+                chemin = getattr(
+                    settings, 'EVENEMENTS_BACKEND',
+                    'apps.commandes.evenements.BackendMemoire'
+                )
+                options = getattr(settings, 'EVENEMENTS_OPTIONS', {})
+                _broker = BrokerEvenements(import_string(chemin)(**options))
+
+    return _broker
+
+
+@receiver(setting_changed)
+def _reinitialiser_broker(setting, **kwargs):
+    """Permet aux tests de remplacer le backend via override_settings"""
+    global _broker
+
+    if setting in ('EVENEMENTS_BACKEND', 'EVENEMENTS_OPTIONS'):
+        _broker = None
+
+
+def construire_evenement(type_evenement, commande, nombre_plats=None):
+    """Événement compact : table, identifiant et totaux de la commande"""
+    if nombre_plats is None:
+        nombre_plats = commande.items.count()
+
+    return {
+        'type': type_evenement,
+        'commande_id': commande.id,
+        'table_id': commande.table_id,
+        'table': commande.table.login,
+        'statut': commande.statut,
+        'montant_total': str(commande.montant_total),
+        'nombre_plats': nombre_plats,
+        'date_commande': commande.date_commande.isoformat(),
+    }
+
+
+def publier_evenement(type_evenement, commande, nombre_plats=None):
+    """
+    Publie l'événement après le commit de la transaction en cours
+    Une erreur de diffusion ne doit jamais faire échouer la vue
+    """
+    evenement = construire_evenement(type_evenement, commande, nombre_plats)
+
+    def _publier():
+        try:
+            get_broker().publier(evenement)
+        except Exception:
+            logger.exception("Impossible de publier l'événement %s", type_evenement)
+
+    transaction.on_commit(_publier)
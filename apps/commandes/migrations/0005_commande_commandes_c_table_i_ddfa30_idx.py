@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 05:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0004_commande_date_paiement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['table', 'date_commande'], name='commandes_c_table_i_ddfa30_idx'),
+        ),
+    ]
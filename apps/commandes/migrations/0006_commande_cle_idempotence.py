@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0005_commande_commandes_c_table_i_ddfa30_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='cle_idempotence',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name="Clé d'idempotence"),
+        ),
+        migrations.AddConstraint(
+            model_name='commande',
+            constraint=models.UniqueConstraint(fields=('table', 'cle_idempotence'), name='commande_unique_cle_idempotence'),
+        ),
+    ]
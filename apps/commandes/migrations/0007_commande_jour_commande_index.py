@@ -0,0 +1,51 @@
+from zoneinfo import ZoneInfo
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def remplir_jour_commande(apps, schema_editor):
+    """Journée locale (Africa/Conakry) des commandes existantes, en un seul UPDATE"""
+    Commande = apps.get_model('commandes', 'Commande')
+    Commande.objects.update(
+        jour_commande=TruncDate('date_commande', tzinfo=ZoneInfo('Africa/Conakry'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0006_commande_cle_idempotence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commande',
+            name='date_commande',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='jour_commande',
+            field=models.DateField(editable=False, null=True, verbose_name='Jour de la commande'),
+        ),
+        migrations.RunPython(remplir_jour_commande, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='commande',
+            name='jour_commande',
+            field=models.DateField(editable=False, verbose_name='Jour de la commande'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['statut', 'date_commande'], name='commande_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['table', 'statut'], name='commande_table_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['jour_commande'], name='commande_jour_idx'),
+        ),
+    ]
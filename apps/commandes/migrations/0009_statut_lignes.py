@@ -0,0 +1,59 @@
+# Generated by Django 5.1 on 2026-10-18 06:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remplir_statut_lignes(apps, schema_editor):
+    """Lignes des commandes déjà servies : servies ; commandes en attente : lignes à servir"""
+    Commande = apps.get_model('commandes', 'Commande')
+    CommandeItem = apps.get_model('commandes', 'CommandeItem')
+
+    CommandeItem.objects.exclude(commande__statut='en_attente').update(statut='servie')
+
+    nombre_lignes = CommandeItem.objects.filter(
+        commande=OuterRef('pk')
+    ).order_by().values('commande').annotate(nombre=Count('id')).values('nombre')
+    Commande.objects.filter(statut='en_attente').update(
+        lignes_non_servies=Coalesce(Subquery(nombre_lignes), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0008_commande_modification_index'),
+        ('menu', '0002_alter_plat_options_plat_categorie_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='commande',
+            name='commande_modification_idx',
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='lignes_non_servies',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lignes non servies'),
+        ),
+        migrations.AddField(
+            model_name='commandeitem',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='commandeitem',
+            name='statut',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_preparation', 'En préparation'), ('prete', 'Prête'), ('servie', 'Servie')], default='en_attente', max_length=20),
+        ),
+        migrations.RunPython(remplir_statut_lignes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='commandeitem',
+            index=models.Index(fields=['statut', 'plat'], name='ligne_statut_plat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commandeitem',
+            index=models.Index(fields=['date_modification'], name='ligne_modification_idx'),
+        ),
+    ]
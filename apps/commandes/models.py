@@ -1,7 +1,11 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from apps.accounts.models import User
 from apps.menu.models import Plat
+from restaurant.periodes import jour_local
 
 
 class Commande(models.Model):
@@ -46,17 +50,60 @@ class Commande(models.Model):
         verbose_name="Date de paiement"
     )
 
-    date_commande = models.DateTimeField(auto_now_add=True)
+    # Clé envoyée par le formulaire de validation du panier :
+    # un double clic ou un POST rejoué renvoie la commande déjà créée
+    cle_idempotence = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Clé d'idempotence"
+    )
+
+    date_commande = models.DateTimeField(default=timezone.now, editable=False)
     date_modification = models.DateTimeField(auto_now=True)
     
+    # Journée locale (Africa/Conakry) de date_commande, indexée pour les filtres par jour
+    jour_commande = models.DateField(editable=False, verbose_name="Jour de la commande")
+    
+    # Lignes pas encore servies : la commande passe à "servie" quand il tombe à zéro
+    # (décrémenté à chaque ligne servie, sans recompter les lignes)
+    lignes_non_servies = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Lignes non servies"
+    )
+    
     class Meta:
         ordering = ['-date_commande']
         verbose_name = 'Commande'
         verbose_name_plural = 'Commandes'
+        indexes = [
+            # Historique d'une table (fenêtre de session, pagination par clé)
+            models.Index(fields=['table', 'date_commande']),
+            # Commandes d'un statut par ancienneté (en attente, à servir...)
+            models.Index(fields=['statut', 'date_commande'], name='commande_statut_date_idx'),
+            # Commandes actives d'une table
+            models.Index(fields=['table', 'statut'], name='commande_table_statut_idx'),
+            # Statistiques et exports par journée
+            models.Index(fields=['jour_commande'], name='commande_jour_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['table', 'cle_idempotence'],
+                name='commande_unique_cle_idempotence'
+            ),
+        ]
     
     def __str__(self):
         return f"Commande #{self.id} - {self.table.login} - {self.get_statut_display()}"
     
+    def save(self, *args, **kwargs):
+        self.jour_commande = jour_local(self.date_commande)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'date_commande' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'jour_commande'}
+        super().save(*args, **kwargs)
+    
     def est_modifiable(self):
         """Une commande ne peut être modifiée que si elle est en attente"""
         return self.statut == 'en_attente'
@@ -68,6 +115,72 @@ class Commande(models.Model):
     def peut_etre_payee(self):
         """Une commande peut être payée si elle est servie"""
         return self.statut == 'servie'
+    
+    # ==========================================
+    # TRANSITIONS D'ÉTAT (compare-and-set)
+    # ==========================================
+    
+    @classmethod
+    def transitionner(cls, commande_id, depuis, vers, **champs):
+        """
+        UPDATE ... SET statut = vers WHERE id = commande_id AND statut = depuis
+        Seules les colonnes passées sont écrites ; aucun verrou n'est posé
+        Retourne True si cet appel a effectué la transition
+        (False si un autre serveur l'a déjà faite ou si le statut ne convient pas)
+        """
+        champs['date_modification'] = timezone.now()
+        nombre = cls.objects.filter(pk=commande_id, statut=depuis).update(statut=vers, **champs)
+        return nombre == 1
+    
+    def marquer_servie(self, serveur):
+        """
+        en_attente -> servie, en traçant le serveur ; les lignes restantes
+        sont servies avec la commande, y compris celles encore en cuisine
+        (le serveur peut servir sans passer par l'écran cuisine)
+        """
+        if not Commande.transitionner(
+            self.pk, 'en_attente', 'servie',
+            serveur_ayant_servi=serveur,
+            lignes_non_servies=0
+        ):
+            return False
+        
+        self.items.exclude(statut='servie').update(statut='servie', date_modification=timezone.now())
+        self.statut = 'servie'
+        self.serveur_ayant_servi = serveur
+        self.lignes_non_servies = 0
+        return True
+    
+    @classmethod
+    def decompter_ligne_servie(cls, commande_id):
+        """
+        Une ligne de plus est servie : décrémente le compteur (un UPDATE)
+        et retourne le nombre de lignes restant à servir
+        La ligne de la commande reste verrouillée jusqu'à la fin de la
+        transaction : deux dernières lignes servies en même temps ne
+        peuvent pas lire toutes deux un compteur non nul
+        """
+        cls.objects.filter(pk=commande_id, lignes_non_servies__gt=0).update(
+            lignes_non_servies=F('lignes_non_servies') - 1,
+            date_modification=timezone.now()
+        )
+        return cls.objects.filter(pk=commande_id).values_list('lignes_non_servies', flat=True).get()
+    
+    def marquer_payee(self, serveur):
+        """servie -> payee ; le serveur n'est renseigné que s'il manquait"""
+        maintenant = timezone.now()
+        if not Commande.transitionner(
+            self.pk, 'servie', 'payee',
+            date_paiement=maintenant,
+            serveur_ayant_servi=Coalesce('serveur_ayant_servi', Value(serveur.pk))
+        ):
+            return False
+        
+        self.statut = 'payee'
+        self.date_paiement = maintenant
+        if self.serveur_ayant_servi_id is None:
+            self.serveur_ayant_servi = serveur
+        return True
 
 
 class CommandeItem(models.Model):
@@ -93,10 +206,42 @@ class CommandeItem(models.Model):
         validators=[MinValueValidator(0)]
     )
     
+    STATUS_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_preparation', 'En préparation'),
+        ('prete', 'Prête'),
+        ('servie', 'Servie'),
+    ]
+    
+    # Transitions autorisées : statut visé -> statuts de départ possibles
+    # (une boisson peut être prête sans passer par la préparation)
+    TRANSITIONS = {
+        'en_preparation': ['en_attente'],
+        'prete': ['en_attente', 'en_preparation'],
+        'servie': ['prete'],
+    }
+    
+    # Lignes encore à préparer (écran cuisine)
+    STATUTS_A_PREPARER = ['en_attente', 'en_preparation']
+    
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='en_attente'
+    )
+    
+    date_modification = models.DateTimeField(auto_now=True)
+    
     class Meta:
         verbose_name = 'Ligne de commande'
         verbose_name_plural = 'Lignes de commande'
         unique_together = ['commande', 'plat']
+        indexes = [
+            # Lignes à préparer / prêtes, par plat (écran cuisine, service)
+            models.Index(fields=['statut', 'plat'], name='ligne_statut_plat_idx'),
+            # Changements depuis un curseur (écran cuisine)
+            models.Index(fields=['date_modification'], name='ligne_modification_idx'),
+        ]
     
     def __str__(self):
         return f"{self.plat.nom} x{self.quantite}"
@@ -106,6 +251,23 @@ class CommandeItem(models.Model):
         """Calcule le sous-total de cette ligne"""
         return self.quantite * self.prix_unitaire
     
+    # ==========================================
+    # TRANSITIONS D'ÉTAT (compare-and-set)
+    # ==========================================
+    
+    @classmethod
+    def transitionner(cls, lignes, vers):
+        """
+        UPDATE ... SET statut = vers WHERE <lignes> AND statut IN (départs autorisés)
+        lignes : QuerySet des lignes visées (une ligne, ou toutes celles d'un plat)
+        Retourne le nombre de lignes passées au statut vers (0 si un autre
+        cuisinier ou serveur est passé avant)
+        """
+        return lignes.filter(statut__in=cls.TRANSITIONS[vers]).update(
+            statut=vers,
+            date_modification=timezone.now()
+        )
+    
     def save(self, *args, **kwargs):
         """Enregistre le prix unitaire actuel du plat"""
         if not self.prix_unitaire:
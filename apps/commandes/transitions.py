@@ -0,0 +1,138 @@
+# apps/commandes/transitions.py
+
+"""
+Transitions du cycle de vie d'une commande et leurs effets de bord
+(paiement, caisse, sessions de table, événements temps réel)
+
+Point d'entrée unique pour les vues serveur, les actions de l'admin
+et les traitements groupés. La transition elle-même est un
+compare-and-set (Commande.transitionner) : si deux serveurs valident
+en même temps, un seul l'emporte et l'autre reçoit False.
+
+Les compteurs et le statut courant de la table (TableRestaurant) sont
+mis à jour dans la même transaction que le changement de statut.
+
+Chaque ligne a son propre statut (en attente, en préparation, prête,
+servie) : la cuisine fait avancer les lignes d'un plat en une fois, le
+serveur sert les lignes prêtes une à une, et la commande passe à
+"servie" quand son compteur de lignes non servies tombe à zéro. Le
+serveur peut aussi servir toute la commande d'un coup : ses lignes
+restantes sont alors servies avec elle.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .evenements import publier_evenement, COMMANDE_SERVIE, COMMANDE_PAYEE, LIGNES_PRETES
+from .models import Commande, CommandeItem
+
+
+def servir_commande(commande, serveur):
+    """
+    Marque la commande comme servie, avec ses lignes restantes
+    Retourne True si la transition a eu lieu
+    """
+    from apps.dashboard.models import DailySalesSummary
+    from apps.restaurant.models import TableRestaurant
+    
+    with transaction.atomic():
+        if not commande.marquer_servie(serveur):
+            return False
+        
+        TableRestaurant.suivre_commande(commande, depuis='en_attente')
+        
+        # UPDATE sans signal : delta explicite au journal des ventes du jour
+        DailySalesSummary.cumuler_transition(commande, depuis='en_attente')
+    
+    publier_evenement(COMMANDE_SERVIE, commande)
+    return True
+
+
+def payer_commande(commande, serveur):
+    """
+    Marque la commande comme payée, enregistre le paiement et l'entrée
+    en caisse, puis programme l'expiration des sessions de la table
+    Retourne True si la transition a eu lieu
+    """
+    from apps.dashboard.models import DailySalesSummary
+    from apps.paiements.models import Paiement, MouvementCaisse
+    from apps.restaurant.models import TableRestaurant, TableSession
+    from apps.restaurant.tasks import programmer_expiration
+    
+    with transaction.atomic():
+        if not commande.marquer_payee(serveur):
+            return False
+        
+        TableRestaurant.suivre_commande(commande, depuis='servie')
+        
+        # Résumé du jour de la commande, qui peut différer du jour du
+        # paiement (celui-ci est cumulé par le signal du Paiement)
+        DailySalesSummary.cumuler_transition(commande, depuis='servie')
+        
+        paiement = Paiement.objects.create(
+            commande=commande,
+            montant=commande.montant_total
+        )
+        
+        # Entrée en caisse (journal en ajout seul, pas de verrou sur la caisse)
+        MouvementCaisse.enregistrer_paiement(paiement)
+        
+        # Marquer les sessions de la table pour expiration
+        sessions_marquees = []
+        for session in TableSession.objects.filter(table=commande.table, est_active=True):
+            session.marquer_payement(commande)
+            sessions_marquees.append(session)
+        
+        # Expiration ponctuelle à l'échéance exacte de ces sessions
+        programmer_expiration(sessions_marquees)
+        
+        publier_evenement(COMMANDE_PAYEE, commande)
+    
+    return True
+
+
+
+def avancer_plat(plat_id, vers):
+    """
+    Cuisine : passe toutes les lignes à préparer d'un plat au statut vers
+    (en_preparation ou prete) en un seul UPDATE
+    Les serveurs sont prévenus des commandes dont des lignes sont prêtes
+    Retourne le nombre de lignes modifiées
+    """
+    with transaction.atomic():
+        commande_ids = list(
+            CommandeItem.objects.filter(
+                plat_id=plat_id,
+                statut__in=CommandeItem.TRANSITIONS[vers]
+            ).values_list('commande_id', flat=True).distinct()
+        )
+        nombre = CommandeItem.transitionner(
+            CommandeItem.objects.filter(plat_id=plat_id, commande_id__in=commande_ids),
+            vers
+        )
+        
+        if vers == 'prete' and nombre:
+            commandes = Commande.objects.select_related('table').filter(
+                pk__in=commande_ids
+            ).annotate(nombre_lignes=Count('items', filter=Q(items__statut='prete')))
+            for commande in commandes:
+                publier_evenement(LIGNES_PRETES, commande, nombre_plats=commande.nombre_lignes)
+    
+    return nombre
+
+
+def servir_ligne(ligne, serveur):
+    """
+    Sert une ligne prête ; la dernière ligne servie fait passer
+    la commande à "servie" (servir_commande)
+    Retourne True si la ligne a été servie par cet appel
+    """
+    with transaction.atomic():
+        if not CommandeItem.transitionner(CommandeItem.objects.filter(pk=ligne.pk), 'servie'):
+            return False
+        
+        ligne.statut = 'servie'
+        if Commande.decompter_ligne_servie(ligne.commande_id) == 0:
+            servir_commande(ligne.commande, serveur)
+    
+    return True
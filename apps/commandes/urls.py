@@ -15,6 +15,11 @@ urlpatterns = [
     path('mes-commandes/', views.commande_list, name='commande_list'),
     path('commande/<int:commande_id>/', views.commande_detail, name='commande_detail'),
     
+    # Écran cuisine
+    path('cuisine/', views.ecran_cuisine, name='ecran_cuisine'),
+    path('cuisine/changements/', views.ecran_cuisine_changements, name='ecran_cuisine_changements'),
+    path('cuisine/plat/<int:plat_id>/<str:statut>/', views.ecran_cuisine_avancer, name='ecran_cuisine_avancer'),
+    
     # Reçus
     path('commande/<int:commande_id>/recu-pdf/', views.telecharger_recu_pdf, name='telecharger_recu_pdf'),
 ]
\ No newline at end of file
@@ -3,12 +3,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 from django.http import JsonResponse, HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from apps.menu.models import Plat
+from apps.dashboard.models import DailySalesSummary
+from apps.restaurant.models import TableRestaurant
 from .models import Commande, CommandeItem
 from .cart import Cart
+from .cuisine import etat_cuisine, changements_cuisine
+from .transitions import avancer_plat
 from .pdf_utils import generer_recu_pdf
+from .evenements import publier_evenement, COMMANDE_CREEE
+import uuid
+
+
+# Nombre de commandes par page dans l'historique d'une table
+COMMANDES_PAR_PAGE = 20
 
 
 # ========== GESTION DU PANIER (Tables uniquement) ==========
@@ -29,6 +42,8 @@ def cart_detail(request):
         'cart': cart,
         'total': cart.get_total_prix(),
         'items_count': cart.get_items_count(),
+        # Une clé par affichage du panier : les soumissions répétées la réutilisent
+        'cle_idempotence': uuid.uuid4(),
     }
     
     return render(request, 'commandes/cart_detail.html', context)
@@ -128,31 +143,80 @@ def commande_valider(request):
         messages.error(request, "Accès refusé.")
         return redirect('dashboard:index')
     
+    # Double clic / POST rejoué : renvoyer la commande déjà créée
+    cle_idempotence = _lire_cle_idempotence(request)
+    if cle_idempotence:
+        commande = Commande.objects.filter(
+            table=request.user,
+            cle_idempotence=cle_idempotence
+        ).only('id').first()
+        if commande:
+            messages.info(request, f"ℹ️ La commande #{commande.id} a déjà été enregistrée.")
+            return redirect('commandes:commande_detail', commande_id=commande.id)
+    
     cart = Cart(request)
     
     if cart.is_empty():
         messages.warning(request, "⚠️ Votre panier est vide.")
         return redirect('menu:plat_list_table')
     
-    # Créer la commande
-    commande = Commande.objects.create(
-        table=request.user,
-        montant_total=cart.get_total_prix(),
-        statut='en_attente'
-    )
-    
-    # Créer les lignes de commande
-    for item in cart:
-        CommandeItem.objects.create(
-            commande=commande,
-            plat=item['plat'],
-            quantite=item['quantite'],
-            prix_unitaire=item['prix_unitaire']
+    # Valider tout le panier contre les plats actuels (une requête)
+    lignes, indisponibles = cart.get_lignes_commande()
+    if indisponibles:
+        messages.warning(
+            request,
+            f"⚠️ Plat(s) plus disponible(s) : {', '.join(indisponibles)}. "
+            f"Veuillez les retirer du panier."
         )
+        return redirect('commandes:cart_detail')
+    
+    # Créer la commande et ses lignes ensemble (savepoint : deux POST
+    # simultanés avec la même clé) ; les recalculs planifiés après le
+    # commit voient donc toujours la commande complète
+    try:
+        with transaction.atomic():
+            commande = Commande.objects.create(
+                table=request.user,
+                montant_total=sum(plat.prix_unitaire * quantite for plat, quantite in lignes),
+                statut='en_attente',
+                lignes_non_servies=len(lignes),
+                cle_idempotence=cle_idempotence
+            )
+            
+            # Toutes les lignes de commande en un seul INSERT (sans signal :
+            # ventes par plat ajoutées explicitement au journal du jour)
+            items = CommandeItem.objects.bulk_create([
+                CommandeItem(
+                    commande=commande,
+                    plat=plat,
+                    quantite=quantite,
+                    prix_unitaire=plat.prix_unitaire
+                )
+                for plat, quantite in lignes
+            ])
+            DailySalesSummary.cumuler_lignes(commande, items)
+            
+            TableRestaurant.suivre_commande(commande)
+    except IntegrityError:
+        # Seul un rejeu de la même clé est attendu ici ; sans clé (ou sans
+        # commande pour cette clé), l'erreur est réelle
+        commande = None
+        if cle_idempotence:
+            commande = Commande.objects.only('id').filter(
+                table=request.user,
+                cle_idempotence=cle_idempotence
+            ).first()
+        if commande is None:
+            raise
+        messages.info(request, f"ℹ️ La commande #{commande.id} a déjà été enregistrée.")
+        return redirect('commandes:commande_detail', commande_id=commande.id)
     
     # Vider le panier
     cart.clear()
     
+    # Prévenir les serveurs en temps réel
+    publier_evenement(COMMANDE_CREEE, commande, nombre_plats=len(lignes))
+    
     messages.success(
         request, 
         f"✅ Commande #{commande.id} validée avec succès ! Montant : {commande.montant_total} GNF"
@@ -161,25 +225,96 @@ def commande_valider(request):
     return redirect('commandes:commande_detail', commande_id=commande.id)
 
 
+def _lire_cle_idempotence(request):
+    """Clé d'idempotence envoyée par le formulaire (None si absente ou invalide)"""
+    try:
+        return uuid.UUID(request.POST.get('cle_idempotence', ''))
+    except ValueError:
+        return None
+
+
 # ========== CONSULTATION DES COMMANDES ==========
 
 @login_required
 def commande_list(request):
     """
     Liste des commandes de la table connectée
+    
+    Par défaut : uniquement les commandes de la session en cours (scan QR),
+    le compte d'une table étant réutilisé par de nombreux clients.
+    L'historique complet est paginé par clé (?historique=1&avant=<id>).
     """
     if not request.user.is_table():
         messages.error(request, "Accès refusé.")
         return redirect('dashboard:index')
     
-    commandes = Commande.objects.filter(table=request.user).prefetch_related('items__plat')
+    from apps.restaurant.models import TableSession
+    
+    commandes = Commande.objects.filter(table=request.user)
+    
+    # Session en cours (connexion via QR Code)
+    session_table = None
+    session_token = request.session.get('table_session_token')
+    if session_token:
+        session_table = TableSession.objects.filter(
+            session_token=session_token,
+            table=request.user
+        ).only('date_creation').first()
+    
+    historique = request.GET.get('historique') == '1' or session_table is None
+    curseur_suivant = None
+    
+    if historique:
+        # Pagination par clé : page de commandes plus anciennes que ?avant=<id>
+        avant = request.GET.get('avant', '')
+        if avant.isdigit():
+            date_ref = commandes.filter(pk=avant).values_list('date_commande', flat=True).first()
+            if date_ref is not None:
+                commandes = commandes.filter(
+                    Q(date_commande__lt=date_ref) |
+                    Q(date_commande=date_ref, pk__lt=avant)
+                )
+        
+        page = list(
+            commandes.order_by('-date_commande', '-id')
+                     .prefetch_related('items__plat')[:COMMANDES_PAR_PAGE + 1]
+        )
+        if len(page) > COMMANDES_PAR_PAGE:
+            page = page[:COMMANDES_PAR_PAGE]
+            curseur_suivant = page[-1].id
+        
+        # Statistiques de tout l'historique : compteurs tenus à jour sur la
+        # table physique (agrégat sur les commandes si elle n'existe pas)
+        compteurs = TableRestaurant.compteurs_pour(request.user)
+        stats = {
+            'total': compteurs['nombre_commandes'],
+            'en_attente': compteurs['commandes_en_attente'],
+            'servies': compteurs['commandes_servies'],
+            'payees': compteurs['commandes_payees'],
+        }
+    else:
+        commandes = commandes.filter(date_commande__gte=session_table.date_creation)
+        page = list(
+            commandes.order_by('-date_commande', '-id').prefetch_related('items__plat')
+        )
+        
+        # Toutes les statistiques en un seul agrégat conditionnel
+        stats = commandes.aggregate(
+            total=Count('id'),
+            en_attente=Count('id', filter=Q(statut='en_attente')),
+            servies=Count('id', filter=Q(statut='servie')),
+            payees=Count('id', filter=Q(statut='payee')),
+        )
     
     context = {
-        'commandes': commandes,
-        'total_commandes': commandes.count(),
-        'commandes_en_attente': commandes.filter(statut='en_attente').count(),
-        'commandes_servies': commandes.filter(statut='servie').count(),
-        'commandes_payees': commandes.filter(statut='payee').count(),
+        'commandes': page,
+        'total_commandes': stats['total'],
+        'commandes_en_attente': stats['en_attente'],
+        'commandes_servies': stats['servies'],
+        'commandes_payees': stats['payees'],
+        'historique': historique,
+        'session_en_cours': session_table is not None,
+        'curseur_suivant': curseur_suivant,
     }
     
     return render(request, 'commandes/commande_list.html', context)
@@ -261,4 +396,94 @@ def telecharger_recu_pdf(request, commande_id):
         if user.is_table():
             return redirect('commandes:commande_detail', commande_id=commande.id)
         else:
-            return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
\ No newline at end of file
+            return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
+
+# ========== ÉCRAN CUISINE (Cuisiniers) ==========
+
+def _groupe_json(groupe):
+    """Groupe de la file cuisine sérialisable en JSON"""
+    return {
+        'plat_id': groupe['plat_id'],
+        'nom': groupe['plat__nom'],
+        'categorie': groupe['plat__categorie'],
+        'quantite': groupe['quantite'],
+        'en_preparation': groupe['en_preparation'],
+        'nombre_tables': groupe['nombre_tables'],
+        'nombre_commandes': groupe['nombre_commandes'],
+        'plus_ancienne': groupe['plus_ancienne'].isoformat(),
+    }
+
+
+@login_required
+def ecran_cuisine(request):
+    """
+    File des plats à préparer : lignes des commandes en attente
+    regroupées par plat, la plus ancienne commande d'abord
+    """
+    if not (request.user.is_cuisinier() or request.user.is_admin()):
+        messages.error(request, "Accès refusé : fonctionnalité réservée aux cuisiniers")
+        return redirect('dashboard:index')
+    
+    groupes, curseur = etat_cuisine()
+    
+    context = {
+        'groupes': groupes,
+        'total_plats': sum(groupe['quantite'] for groupe in groupes),
+        'curseur': curseur.isoformat(),
+    }
+    
+    return render(request, 'commandes/ecran_cuisine.html', context)
+
+
+@login_required
+def ecran_cuisine_changements(request):
+    """
+    Changements de la file cuisine depuis ?depuis=<curseur ISO>
+    Sans curseur valide : file complète
+    """
+    if not (request.user.is_cuisinier() or request.user.is_admin()):
+        return JsonResponse({'erreur': "Accès refusé"}, status=403)
+    
+    depuis = parse_datetime(request.GET.get('depuis', ''))
+    if depuis is None or timezone.is_naive(depuis):
+        groupes, curseur = etat_cuisine()
+        return JsonResponse({
+            'complet': True,
+            'groupes': [_groupe_json(groupe) for groupe in groupes],
+            'retires': [],
+            'curseur': curseur.isoformat(),
+        })
+    
+    groupes, retires, curseur = changements_cuisine(depuis)
+    return JsonResponse({
+        'complet': False,
+        'groupes': [_groupe_json(groupe) for groupe in groupes],
+        'retires': retires,
+        'curseur': curseur.isoformat(),
+    })
+
+
+@login_required
+def ecran_cuisine_avancer(request, plat_id, statut):
+    """
+    Passe toutes les lignes à préparer d'un plat en préparation ou prêtes
+    (les plats identiques sont préparés ensemble)
+    """
+    if not (request.user.is_cuisinier() or request.user.is_admin()):
+        messages.error(request, "Accès refusé : fonctionnalité réservée aux cuisiniers")
+        return redirect('dashboard:index')
+    
+    if statut not in ('en_preparation', 'prete'):
+        messages.error(request, "Statut invalide")
+        return redirect('commandes:ecran_cuisine')
+    
+    plat = get_object_or_404(Plat, id=plat_id)
+    nombre = avancer_plat(plat.id, statut)
+    
+    if nombre:
+        libelle = 'en préparation' if statut == 'en_preparation' else 'prête(s)'
+        messages.success(request, f"✅ {nombre} ligne(s) de {plat.nom} {libelle}")
+    else:
+        messages.info(request, f"ℹ️ Aucune ligne de {plat.nom} à faire avancer")
+    
+    return redirect('commandes:ecran_cuisine')
@@ -1,3 +1,55 @@
 from django.contrib import admin
+from .models import DailySalesSummary, DailyPlatSales, RapportGenere, ExecutionPeriodique
+
+
+@admin.register(DailySalesSummary)
+class DailySalesSummaryAdmin(admin.ModelAdmin):
+    """
+    Résumés recalculés automatiquement : consultation uniquement
+    (reconstruction : manage.py reconstruire_resume_ventes)
+    """
+    list_display = ('jour', 'revenus', 'depenses', 'commandes_total', 'commandes_payees', 'date_mise_a_jour')
+    date_hierarchy = 'jour'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyPlatSales)
+class DailyPlatSalesAdmin(admin.ModelAdmin):
+    list_display = ('jour', 'plat', 'quantite', 'revenu', 'nombre_commandes')
+    list_filter = ('plat__categorie',)
+    date_hierarchy = 'jour'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RapportGenere)
+class RapportGenereAdmin(admin.ModelAdmin):
+    list_display = ('id', 'debut', 'fin', 'statut', 'demande_par', 'date_creation', 'date_fin')
+    list_filter = ('statut',)
+    readonly_fields = ('fichier', 'empreinte', 'erreur', 'date_creation', 'date_fin')
+
+
+@admin.register(ExecutionPeriodique)
+class ExecutionPeriodiqueAdmin(admin.ModelAdmin):
+    """Suivi des tâches périodiques : consultation uniquement"""
+    list_display = (
+        'nom', 'dernier_statut', 'derniere_execution', 'derniere_duree',
+        'duree_moyenne', 'nombre_executions', 'nombre_echecs'
+    )
+    list_filter = ('dernier_statut',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-# Register your models here.
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dashboard'
-    verbose_name = 'Dashboard'
\ No newline at end of file
+    verbose_name = 'Dashboard'
+    
+    def ready(self):
+        """Branche le maintien des résumés de ventes journaliers"""
+        from . import signals  # noqa: F401
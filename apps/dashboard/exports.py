@@ -0,0 +1,254 @@
+# apps/dashboard/exports.py
+
+"""
+Exports de l'historique : CSV bruts (paiements, commandes, lignes de
+commande) et classeur Excel multi-feuilles
+
+Les lignes sont lues par paquets avec values_list().iterator() et
+écrites au fil de l'eau (StreamingHttpResponse pour le CSV, openpyxl en
+mode write_only pour l'Excel) : la mémoire reste constante, que la
+période contienne mille ou des millions de lignes.
+"""
+
+import csv
+import tempfile
+import zlib
+from datetime import date, datetime, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from apps.commandes.models import Commande, CommandeItem
+from apps.menu.models import Plat
+from apps.paiements.models import Paiement, Depense
+from restaurant.periodes import sur_jours
+from .models import DailySalesSummary
+from .statistiques import ventes_par_plat
+
+
+# Lignes lues par aller-retour avec la base
+TAILLE_PAQUET = 2000
+
+# Lignes CSV regroupées par morceau envoyé au client
+LIGNES_PAR_MORCEAU = 500
+
+# Période par défaut des exports (en jours)
+PERIODE_PAR_DEFAUT = 30
+
+
+def lire_periode(request, param_debut='debut', param_fin='fin', jours=PERIODE_PAR_DEFAUT):
+    """
+    Période demandée via ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ (bornes incluses)
+    Par défaut : les `jours` derniers jours. Lève ValueError si une date est invalide
+    """
+    fin = request.GET.get(param_fin)
+    fin = date.fromisoformat(fin) if fin else timezone.localdate()
+
+    debut = request.GET.get(param_debut)
+    debut = date.fromisoformat(debut) if debut else fin - timedelta(days=jours)
+
+    if debut > fin:
+        raise ValueError("La date de début doit précéder la date de fin")
+    return debut, fin
+
+
+def _paiements(debut, fin):
+    return Paiement.objects.filter(
+        **sur_jours('jour_paiement', debut, fin)
+    ).order_by('date_paiement', 'id').values_list(
+        'id', 'date_paiement', 'commande_id', 'commande__table__login', 'montant'
+    )
+
+
+def _commandes(debut, fin):
+    return Commande.objects.filter(
+        **sur_jours('jour_commande', debut, fin)
+    ).order_by('date_commande', 'id').values_list(
+        'id', 'date_commande', 'table__login', 'statut', 'montant_total',
+        'serveur_ayant_servi__login', 'date_paiement'
+    )
+
+
+def _lignes_commande(debut, fin):
+    return CommandeItem.objects.filter(
+        **sur_jours('commande__jour_commande', debut, fin)
+    ).annotate(
+        sous_total_ligne=F('quantite') * F('prix_unitaire')
+    ).order_by('commande__date_commande', 'commande_id', 'id').values_list(
+        'id', 'commande_id', 'commande__date_commande', 'commande__table__login',
+        'plat__nom', 'plat__categorie', 'quantite', 'prix_unitaire', 'sous_total_ligne'
+    )
+
+
+# Jeux exportables : nom -> (en-têtes, requête)
+JEUX_CSV = {
+    'paiements': (
+        ['ID paiement', 'Date', 'Commande', 'Table', 'Montant (GNF)'],
+        _paiements,
+    ),
+    'commandes': (
+        ['ID commande', 'Date', 'Table', 'Statut', 'Montant (GNF)', 'Serveur', 'Date de paiement'],
+        _commandes,
+    ),
+    'lignes': (
+        ['ID ligne', 'Commande', 'Date commande', 'Table', 'Plat', 'Catégorie',
+         'Quantité', 'Prix unitaire (GNF)', 'Sous-total (GNF)'],
+        _lignes_commande,
+    ),
+}
+
+
+class _Tampon:
+    """Pseudo-fichier : csv.writer renvoie directement la ligne formatée"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _cellule(valeur):
+    """Dates en heure locale, None en cellule vide"""
+    if valeur is None:
+        return ''
+    if hasattr(valeur, 'tzinfo') and valeur.tzinfo is not None:
+        return timezone.localtime(valeur).strftime('%Y-%m-%d %H:%M:%S')
+    return valeur
+
+
+def generer_csv(jeu, debut, fin):
+    """Génère le CSV d'un jeu par morceaux de texte (BOM UTF-8 pour Excel)"""
+    entetes, requete = JEUX_CSV[jeu]
+    writer = csv.writer(_Tampon())
+
+    morceau = ['\ufeff', writer.writerow(entetes)]
+    for ligne in requete(debut, fin).iterator(chunk_size=TAILLE_PAQUET):
+        morceau.append(writer.writerow([_cellule(valeur) for valeur in ligne]))
+        if len(morceau) >= LIGNES_PAR_MORCEAU:
+            yield ''.join(morceau)
+            morceau = []
+
+    if morceau:
+        yield ''.join(morceau)
+
+
+def compresser_gzip(morceaux):
+    """Compresse à la volée un flux de texte au format gzip"""
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for morceau in morceaux:
+        donnees = compresseur.compress(morceau.encode('utf-8'))
+        if donnees:
+            yield donnees
+    yield compresseur.flush()
+
+
+# ==========================================
+# CLASSEUR EXCEL (openpyxl, mode write_only)
+# ==========================================
+
+FORMAT_MONTANT = '#,##0.00'
+FORMAT_DATE = 'DD/MM/YYYY'
+FORMAT_DATE_HEURE = 'DD/MM/YYYY HH:MM'
+
+
+def _depenses(debut, fin):
+    return Depense.objects.filter(
+        **sur_jours('date_depense', debut, fin)
+    ).order_by('date_depense', 'id').values_list(
+        'id', 'date_depense', 'motif', 'montant', 'enregistree_par__login'
+    )
+
+
+def _ecrire_feuille(classeur, titre, entetes, lignes, formats):
+    """
+    Ajoute une feuille en flux : les lignes ne sont jamais gardées en mémoire
+    formats : index de colonne -> format numérique Excel
+    """
+    feuille = classeur.create_sheet(titre)
+    gras = Font(bold=True)
+
+    en_tete = []
+    for entete in entetes:
+        cellule = WriteOnlyCell(feuille, value=entete)
+        cellule.font = gras
+        en_tete.append(cellule)
+    feuille.append(en_tete)
+
+    for ligne in lignes:
+        valeurs = []
+        for index, valeur in enumerate(ligne):
+            if isinstance(valeur, datetime):
+                # Excel ne connaît pas les fuseaux : heure locale naïve
+                valeur = timezone.localtime(valeur).replace(tzinfo=None)
+            if index in formats and valeur is not None:
+                valeur = WriteOnlyCell(feuille, value=valeur)
+                valeur.number_format = formats[index]
+            valeurs.append(valeur)
+        feuille.append(valeurs)
+
+    return feuille
+
+
+def generer_classeur_xlsx(debut, fin):
+    """
+    Construit le classeur (résumé, paiements, dépenses, commandes, top plats)
+    dans un fichier temporaire et le renvoie positionné au début
+    Les dates et montants sont des cellules typées (pas du texte)
+    """
+    classeur = Workbook(write_only=True)
+    categories = dict(Plat.CATEGORIE_CHOICES)
+
+    # Résumé par jour, depuis les résumés journaliers
+    resumes = DailySalesSummary.objects.filter(
+        **sur_jours('jour', debut, fin)
+    ).order_by('jour').values_list(
+        'jour', 'commandes_total', 'commandes_payees', 'revenus', 'depenses'
+    )
+    _ecrire_feuille(
+        classeur, 'Résumé',
+        ['Jour', 'Commandes', 'Commandes payées', 'Revenus (GNF)', 'Dépenses (GNF)', 'Bénéfice (GNF)'],
+        (
+            (jour, commandes, payees, revenus, depenses, revenus - depenses)
+            for jour, commandes, payees, revenus, depenses in resumes.iterator(chunk_size=TAILLE_PAQUET)
+        ),
+        {0: FORMAT_DATE, 3: FORMAT_MONTANT, 4: FORMAT_MONTANT, 5: FORMAT_MONTANT},
+    )
+
+    _ecrire_feuille(
+        classeur, 'Paiements',
+        JEUX_CSV['paiements'][0],
+        _paiements(debut, fin).iterator(chunk_size=TAILLE_PAQUET),
+        {1: FORMAT_DATE_HEURE, 4: FORMAT_MONTANT},
+    )
+
+    _ecrire_feuille(
+        classeur, 'Dépenses',
+        ['ID dépense', 'Date', 'Motif', 'Montant (GNF)', 'Enregistrée par'],
+        _depenses(debut, fin).iterator(chunk_size=TAILLE_PAQUET),
+        {1: FORMAT_DATE, 3: FORMAT_MONTANT},
+    )
+
+    _ecrire_feuille(
+        classeur, 'Commandes',
+        JEUX_CSV['commandes'][0],
+        _commandes(debut, fin).iterator(chunk_size=TAILLE_PAQUET),
+        {1: FORMAT_DATE_HEURE, 4: FORMAT_MONTANT, 6: FORMAT_DATE_HEURE},
+    )
+
+    _ecrire_feuille(
+        classeur, 'Top plats',
+        ['Plat', 'Catégorie', 'Quantité vendue', 'Commandes', 'Revenu (GNF)'],
+        (
+            (plat['plat__nom'], categories.get(plat['plat__categorie'], plat['plat__categorie']),
+             plat['quantite_totale'], plat['nombre_commandes'], plat['revenu_total'])
+            for plat in ventes_par_plat(debut, fin)
+        ),
+        {4: FORMAT_MONTANT},
+    )
+
+    # Fichier temporaire : gros classeurs sur disque, pas en mémoire
+    fichier = tempfile.TemporaryFile()
+    classeur.save(fichier)
+    fichier.seek(0)
+    return fichier
@@ -0,0 +1,58 @@
+# apps/dashboard/management/commands/reconstruire_resume_ventes.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.models import DailySalesSummary, DailyPlatSales, DailyHourlySales
+from apps.dashboard.statistiques import invalider_analytics
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les résumés de ventes journaliers depuis les paiements, dépenses et commandes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depuis',
+            help="Première journée à recalculer (AAAA-MM-JJ) ; par défaut tout l'historique"
+        )
+        parser.add_argument(
+            '--jusqua',
+            help="Dernière journée à recalculer (AAAA-MM-JJ)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            depuis = date.fromisoformat(options['depuis']) if options['depuis'] else None
+            jusqua = date.fromisoformat(options['jusqua']) if options['jusqua'] else None
+        except ValueError:
+            raise CommandError("Les dates doivent être au format AAAA-MM-JJ")
+
+        jours = [
+            jour for jour in DailySalesSummary.jours_avec_activite()
+            if (depuis is None or jour >= depuis) and (jusqua is None or jour <= jusqua)
+        ]
+
+        # Journées sans activité restante (données supprimées) : résumés retirés
+        obsoletes = DailySalesSummary.objects.exclude(jour__in=jours)
+        ventes_obsoletes = DailyPlatSales.objects.exclude(jour__in=jours)
+        heures_obsoletes = DailyHourlySales.objects.exclude(jour__in=jours)
+        if depuis:
+            obsoletes = obsoletes.filter(jour__gte=depuis)
+            ventes_obsoletes = ventes_obsoletes.filter(jour__gte=depuis)
+            heures_obsoletes = heures_obsoletes.filter(jour__gte=depuis)
+        if jusqua:
+            obsoletes = obsoletes.filter(jour__lte=jusqua)
+            ventes_obsoletes = ventes_obsoletes.filter(jour__lte=jusqua)
+            heures_obsoletes = heures_obsoletes.filter(jour__lte=jusqua)
+        ventes_obsoletes.delete()
+        heures_obsoletes.delete()
+        supprimes, _ = obsoletes.delete()
+
+        for jour in jours:
+            DailySalesSummary.rafraichir_jour(jour)
+        invalider_analytics()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(jours)} journée(s) recalculée(s), {supprimes} résumé(s) obsolète(s) supprimé(s)"
+        ))
@@ -0,0 +1,74 @@
+# apps/dashboard/management/commands/verifier_index.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.commandes.models import Commande, CommandeItem
+from apps.paiements.models import Paiement
+from restaurant.periodes import jour_local, sur_jours
+
+
+def requetes_critiques():
+    """Requêtes fréquentes des statistiques et des écrans serveur -> index attendu"""
+    aujourd_hui = jour_local()
+    table_id = Commande.objects.values_list('table_id', flat=True).first() or 0
+
+    return [
+        (
+            "Paiements des 30 derniers jours (rapports, exports)",
+            Paiement.objects.filter(**sur_jours('jour_paiement', aujourd_hui - timedelta(days=30), aujourd_hui)),
+            'paiement_jour_idx',
+        ),
+        (
+            "Commandes du jour (résumés, rapport quotidien)",
+            Commande.objects.filter(**sur_jours('jour_commande', aujourd_hui)),
+            'commande_jour_idx',
+        ),
+        (
+            "Commandes en attente par ancienneté",
+            Commande.objects.filter(
+                statut='en_attente',
+                date_commande__gte=timezone.now() - timedelta(days=1)
+            ).order_by('date_commande'),
+            'commande_statut_date_idx',
+        ),
+        (
+            "Commandes en attente d'une table (comptage, existence)",
+            Commande.objects.filter(table_id=table_id, statut='en_attente').order_by(),
+            'commande_table_statut_idx',
+        ),
+        (
+            "Lignes modifiées depuis un curseur (écran cuisine)",
+            CommandeItem.objects.filter(date_modification__gt=timezone.now() - timedelta(seconds=5)),
+            'ligne_modification_idx',
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Vérifie avec EXPLAIN que les requêtes critiques utilisent leurs index"
+
+    def handle(self, *args, **options):
+        echecs = []
+
+        for libelle, queryset, index in requetes_critiques():
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    # Sur une petite base, PostgreSQL préfère un parcours
+                    # séquentiel : on vérifie que l'index est utilisable
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.explain()
+
+            if index in plan:
+                self.stdout.write(self.style.SUCCESS(f"✅ {libelle} : {index}"))
+            else:
+                echecs.append(libelle)
+                self.stdout.write(self.style.ERROR(f"❌ {libelle} : {index} non utilisé"))
+                self.stdout.write(plan)
+
+        if echecs:
+            raise CommandError(f"{len(echecs)} requête(s) sans leur index")
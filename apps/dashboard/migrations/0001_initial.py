@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-18 05:42
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('menu', '0002_alter_plat_options_plat_categorie_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(unique=True, verbose_name='Jour')),
+                ('revenus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Revenus')),
+                ('nombre_paiements', models.PositiveIntegerField(default=0, verbose_name='Paiements')),
+                ('depenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Dépenses')),
+                ('nombre_depenses', models.PositiveIntegerField(default=0, verbose_name='Dépenses enregistrées')),
+                ('commandes_total', models.PositiveIntegerField(default=0, verbose_name='Commandes')),
+                ('commandes_en_attente', models.PositiveIntegerField(default=0, verbose_name='En attente')),
+                ('commandes_servies', models.PositiveIntegerField(default=0, verbose_name='Servies')),
+                ('commandes_payees', models.PositiveIntegerField(default=0, verbose_name='Payées')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Résumé des ventes du jour',
+                'verbose_name_plural': 'Résumés des ventes par jour',
+                'ordering': ['-jour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPlatSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('quantite', models.PositiveIntegerField(default=0, verbose_name='Quantité')),
+                ('revenu', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Revenu')),
+                ('nombre_commandes', models.PositiveIntegerField(default=0, verbose_name='Commandes')),
+                ('plat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventes_journalieres', to='menu.plat', verbose_name='Plat')),
+            ],
+            options={
+                'verbose_name': "Ventes d'un plat par jour",
+                'verbose_name_plural': 'Ventes des plats par jour',
+                'ordering': ['-jour'],
+                'unique_together': {('jour', 'plat')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-18 05:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RapportGenere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debut', models.DateField(verbose_name='Début de période')),
+                ('fin', models.DateField(verbose_name='Fin de période')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('pret', 'Prêt'), ('echec', 'Échec')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('fichier', models.FileField(blank=True, upload_to='rapports/', verbose_name='Fichier')),
+                ('empreinte', models.CharField(blank=True, max_length=64, verbose_name='Empreinte SHA-256')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+                ('demande_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rapports_demandes', to=settings.AUTH_USER_MODEL, verbose_name='Demandé par')),
+            ],
+            options={
+                'verbose_name': 'Rapport généré',
+                'verbose_name_plural': 'Rapports générés',
+                'ordering': ['-date_creation'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('statut__in', ['en_attente', 'en_cours'])), fields=('debut', 'fin'), name='rapport_unique_generation_en_cours')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-18 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_rapportgenere'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='rapportgenere',
+            name='rapport_unique_generation_en_cours',
+        ),
+        migrations.AddField(
+            model_name='rapportgenere',
+            name='sous_totaux_par_jour',
+            field=models.BooleanField(default=False, verbose_name='Sous-totaux par jour'),
+        ),
+        migrations.AddConstraint(
+            model_name='rapportgenere',
+            constraint=models.UniqueConstraint(condition=models.Q(('statut__in', ['en_attente', 'en_cours'])), fields=('debut', 'fin', 'sous_totaux_par_jour'), name='rapport_unique_generation_en_cours'),
+        ),
+    ]
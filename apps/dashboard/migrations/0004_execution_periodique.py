@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_rapportgenere_sous_totaux_par_jour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionPeriodique',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True, verbose_name='Tâche périodique')),
+                ('tache', models.CharField(max_length=200, verbose_name='Tâche Celery')),
+                ('derniere_execution', models.DateTimeField(verbose_name='Dernière exécution')),
+                ('derniere_duree', models.FloatField(default=0, verbose_name='Dernière durée (s)')),
+                ('dernier_statut', models.CharField(max_length=20, verbose_name='Dernier statut')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('nombre_executions', models.PositiveIntegerField(default=0, verbose_name='Exécutions')),
+                ('nombre_echecs', models.PositiveIntegerField(default=0, verbose_name='Échecs')),
+                ('duree_totale', models.FloatField(default=0, verbose_name='Durée cumulée (s)')),
+            ],
+            options={
+                'verbose_name': 'Exécution périodique',
+                'verbose_name_plural': 'Exécutions périodiques',
+                'ordering': ['nom'],
+            },
+        ),
+    ]
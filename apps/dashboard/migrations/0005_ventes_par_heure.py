@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-18 05:58
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_execution_periodique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('heure', models.PositiveSmallIntegerField(verbose_name='Heure')),
+                ('commandes', models.PositiveIntegerField(default=0, verbose_name='Commandes')),
+                ('revenus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Revenus')),
+                ('nombre_paiements', models.PositiveIntegerField(default=0, verbose_name='Paiements')),
+            ],
+            options={
+                'verbose_name': "Ventes d'une heure",
+                'verbose_name_plural': 'Ventes par heure',
+                'ordering': ['-jour', 'heure'],
+                'unique_together': {('jour', 'heure')},
+            },
+        ),
+    ]
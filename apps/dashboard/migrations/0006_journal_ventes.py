@@ -0,0 +1,45 @@
+# Generated by Django 5.1 on 2026-10-18 06:36
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_ventes_par_heure'),
+        ('menu', '0002_alter_plat_options_plat_categorie_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysalessummary',
+            name='a_construire',
+            field=models.BooleanField(default=False, verbose_name='À construire'),
+        ),
+        migrations.CreateModel(
+            name='EcritureVentes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heure', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Heure')),
+                ('revenus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('nombre_paiements', models.IntegerField(default=0)),
+                ('depenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('nombre_depenses', models.IntegerField(default=0)),
+                ('commandes_total', models.IntegerField(default=0)),
+                ('commandes_en_attente', models.IntegerField(default=0)),
+                ('commandes_servies', models.IntegerField(default=0)),
+                ('commandes_payees', models.IntegerField(default=0)),
+                ('quantite', models.IntegerField(default=0)),
+                ('revenu', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('nombre_commandes', models.IntegerField(default=0)),
+                ('plat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='menu.plat', verbose_name='Plat')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ecritures', to='dashboard.dailysalessummary', verbose_name='Résumé du jour')),
+            ],
+            options={
+                'verbose_name': 'Écriture de ventes',
+                'verbose_name_plural': 'Journal des ventes',
+            },
+        ),
+    ]
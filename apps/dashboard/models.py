@@ -1,3 +1,651 @@
-from django.db import models
+# apps/dashboard/models.py
 
-# Create your models here.
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from restaurant.periodes import sur_jours
+
+
+class DailySalesSummary(models.Model):
+    """
+    Résumé des ventes d'une journée locale (fuseau TIME_ZONE)
+    Alimente le dashboard analytics sans relire tout l'historique
+
+    Les créations et transitions n'y écrivent pas : elles ajoutent leurs
+    deltas au journal du jour (EcritureVentes, cumuler) dans leur propre
+    transaction, et une tâche les reporte ensuite dans le résumé
+    (consolider_jour). Les modifications et suppressions plus rares
+    planifient un recalcul complet du jour (rafraichir_jour), regroupé et
+    fait sous verrou (voir apps/dashboard/signals.py)
+    """
+    jour = models.DateField(unique=True, verbose_name="Jour")
+
+    revenus = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Revenus"
+    )
+    nombre_paiements = models.PositiveIntegerField(default=0, verbose_name="Paiements")
+
+    depenses = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Dépenses"
+    )
+    nombre_depenses = models.PositiveIntegerField(default=0, verbose_name="Dépenses enregistrées")
+
+    # Commandes passées ce jour-là, selon leur statut actuel
+    commandes_total = models.PositiveIntegerField(default=0, verbose_name="Commandes")
+    commandes_en_attente = models.PositiveIntegerField(default=0, verbose_name="En attente")
+    commandes_servies = models.PositiveIntegerField(default=0, verbose_name="Servies")
+    commandes_payees = models.PositiveIntegerField(default=0, verbose_name="Payées")
+
+    # Ligne créée par une écriture : le jour peut avoir une activité
+    # antérieure, il est calculé en entier à sa première consolidation
+    a_construire = models.BooleanField(default=False, verbose_name="À construire")
+
+    date_mise_a_jour = models.DateTimeField(auto_now=True)
+
+    # Compteur du résumé pour chaque statut de commande
+    COMPTEURS_STATUT = {
+        'en_attente': 'commandes_en_attente',
+        'servie': 'commandes_servies',
+        'payee': 'commandes_payees',
+    }
+
+    # Champs du résumé alimentés par le journal
+    CHAMPS_CUMULES = (
+        'revenus', 'nombre_paiements', 'depenses', 'nombre_depenses',
+        'commandes_total', 'commandes_en_attente', 'commandes_servies', 'commandes_payees',
+    )
+
+    class Meta:
+        verbose_name = "Résumé des ventes du jour"
+        verbose_name_plural = "Résumés des ventes par jour"
+        ordering = ['-jour']
+
+    def __str__(self):
+        return f"Ventes du {self.jour:%d/%m/%Y} - {self.revenus} GNF"
+
+    @classmethod
+    def cumuler(cls, jour, *ecritures):
+        """
+        Ajoute des écritures au journal du jour, dans la transaction de
+        l'appelant, et planifie leur report après le commit
+        ecritures : champs de EcritureVentes (deltas, heure, plat_id)
+
+        Simple INSERT : la ligne du jour n'est que référencée (verrou
+        partagé de clé étrangère), les écritures simultanées ne
+        s'attendent donc pas. Seul un recalcul complet du même jour les
+        fait patienter (verrou exclusif, voir rafraichir_jour).
+        """
+        from .tasks import programmer_consolidation
+
+        resume, _ = cls.objects.get_or_create(jour=jour, defaults={'a_construire': True})
+        EcritureVentes.objects.bulk_create([
+            EcritureVentes(resume=resume, **ecriture) for ecriture in ecritures
+        ])
+        programmer_consolidation(jour)
+
+    @classmethod
+    def cumuler_commande(cls, commande):
+        """Commande créée : comptée dans son statut et dans son heure"""
+        cls.cumuler(commande.jour_commande, {
+            'heure': timezone.localtime(commande.date_commande).hour,
+            'commandes_total': 1,
+            cls.COMPTEURS_STATUT[commande.statut]: 1,
+        })
+
+    @classmethod
+    def cumuler_transition(cls, commande, depuis):
+        """Commande passée du statut depuis à commande.statut"""
+        cls.cumuler(commande.jour_commande, {
+            cls.COMPTEURS_STATUT[depuis]: -1,
+            cls.COMPTEURS_STATUT[commande.statut]: 1,
+        })
+
+    @classmethod
+    def cumuler_lignes(cls, commande, lignes):
+        """Lignes créées d'une commande (une ligne par plat, comme le panier)"""
+        ventes_plats = {}
+        for ligne in lignes:
+            ventes = ventes_plats.setdefault(ligne.plat_id, {
+                'plat_id': ligne.plat_id,
+                'quantite': 0,
+                'revenu': Decimal('0.00'),
+                'nombre_commandes': 1,
+            })
+            ventes['quantite'] += ligne.quantite
+            ventes['revenu'] += ligne.quantite * ligne.prix_unitaire
+        cls.cumuler(commande.jour_commande, *ventes_plats.values())
+
+    @classmethod
+    def cumuler_paiement(cls, paiement):
+        """Paiement encaissé : revenus du jour et de son heure"""
+        cls.cumuler(paiement.jour_paiement, {
+            'heure': timezone.localtime(paiement.date_paiement).hour,
+            'revenus': paiement.montant,
+            'nombre_paiements': 1,
+        })
+
+    @classmethod
+    def cumuler_depense(cls, depense):
+        """Dépense enregistrée"""
+        cls.cumuler(depense.date_depense, {'depenses': depense.montant, 'nombre_depenses': 1})
+
+    @classmethod
+    def consolider_jour(cls, jour):
+        """
+        Reporte le journal du jour dans le résumé et ses lignes de détail
+        Retourne le nombre d'écritures reportées
+
+        Verrou de mise à jour sans clé : exclut les autres reports et les
+        recalculs du jour, pas les nouvelles écritures. La liste des
+        écritures est figée : celles validées pendant le report restent
+        pour le passage suivant
+        """
+        with transaction.atomic():
+            resume = cls.objects.select_for_update(no_key=True).filter(jour=jour).first()
+            if resume is None:
+                return 0
+            if not resume.a_construire:
+                return resume._reporter_ecritures()
+
+        # Première consolidation d'une ligne créée par une écriture
+        return cls.rafraichir_jour(jour).ecritures_reprises
+
+    def _reporter_ecritures(self):
+        """Ajoute les écritures en attente au résumé (verrouillé par l'appelant)"""
+        ecritures = list(self.ecritures.values('id', 'heure', 'plat_id', *EcritureVentes.CHAMPS_DELTA))
+        if not ecritures:
+            return 0
+
+        totaux = {champ: sum(e[champ] for e in ecritures) for champ in self.CHAMPS_CUMULES}
+        heures = {}
+        plats = {}
+        for ecriture in ecritures:
+            if ecriture['heure'] is not None:
+                ventes = heures.setdefault(
+                    ecriture['heure'],
+                    {'commandes': 0, 'revenus': Decimal('0.00'), 'nombre_paiements': 0}
+                )
+                ventes['commandes'] += ecriture['commandes_total']
+                ventes['revenus'] += ecriture['revenus']
+                ventes['nombre_paiements'] += ecriture['nombre_paiements']
+            if ecriture['plat_id'] is not None:
+                ventes = plats.setdefault(
+                    ecriture['plat_id'],
+                    {'quantite': 0, 'revenu': Decimal('0.00'), 'nombre_commandes': 0}
+                )
+                ventes['quantite'] += ecriture['quantite']
+                ventes['revenu'] += ecriture['revenu']
+                ventes['nombre_commandes'] += ecriture['nombre_commandes']
+
+        DailySalesSummary.objects.filter(pk=self.pk).update(
+            date_mise_a_jour=timezone.now(),
+            **{champ: F(champ) + delta for champ, delta in totaux.items() if delta}
+        )
+        for heure, ventes in heures.items():
+            _cumuler_ligne(DailyHourlySales, {'jour': self.jour, 'heure': heure}, ventes)
+        for plat_id, ventes in plats.items():
+            _cumuler_ligne(DailyPlatSales, {'jour': self.jour, 'plat_id': plat_id}, ventes)
+
+        EcritureVentes.objects.filter(pk__in=[e['id'] for e in ecritures]).delete()
+        return len(ecritures)
+
+    @classmethod
+    def rafraichir_jour(cls, jour):
+        """
+        Recalcule le résumé d'une journée depuis les tables sources
+        Coût borné par l'activité du jour, quel que soit l'historique
+        La ligne du jour est verrouillée avant la lecture : un recalcul
+        plus ancien ne peut pas écraser un ajout plus récent, et le journal
+        du jour, compris dans le recalcul, est vidé
+        """
+        with transaction.atomic():
+            resume, _ = cls.objects.get_or_create(jour=jour)
+            # Verrou exclusif : attend les écritures du jour en cours (elles
+            # tiennent la clé de la ligne) et retient les suivantes ; celles
+            # en attente sont donc toutes déjà dans les tables sources
+            resume = cls.objects.select_for_update().get(pk=resume.pk)
+            resume._recalculer()
+
+        return resume
+
+    def _recalculer(self):
+        """Réécrit le résumé (verrouillé par l'appelant) et ses lignes de détail"""
+        from apps.commandes.models import Commande, CommandeItem
+        from apps.paiements.models import Paiement, Depense
+
+        jour = self.jour
+
+        paiements = Paiement.objects.filter(
+            **sur_jours('jour_paiement', jour)
+        ).aggregate(total=Sum('montant'), nombre=Count('id'))
+
+        depenses = Depense.objects.filter(**sur_jours('date_depense', jour)).aggregate(
+            total=Sum('montant'),
+            nombre=Count('id')
+        )
+
+        commandes = Commande.objects.filter(
+            **sur_jours('jour_commande', jour)
+        ).aggregate(
+            total=Count('id'),
+            en_attente=Count('id', filter=Q(statut='en_attente')),
+            servies=Count('id', filter=Q(statut='servie')),
+            payees=Count('id', filter=Q(statut='payee')),
+        )
+
+        # Activité par heure locale (fuseau Africa/Conakry, TIME_ZONE)
+        fuseau = timezone.get_default_timezone()
+        commandes_par_heure = Commande.objects.filter(
+            **sur_jours('jour_commande', jour)
+        ).annotate(
+            heure=ExtractHour('date_commande', tzinfo=fuseau)
+        ).values('heure').annotate(nombre=Count('id')).order_by()
+
+        paiements_par_heure = Paiement.objects.filter(
+            **sur_jours('jour_paiement', jour)
+        ).annotate(
+            heure=ExtractHour('date_paiement', tzinfo=fuseau)
+        ).values('heure').annotate(total=Sum('montant'), nombre=Count('id')).order_by()
+
+        heures = {}
+        for ligne in commandes_par_heure:
+            heures.setdefault(ligne['heure'], {})['commandes'] = ligne['nombre']
+        for ligne in paiements_par_heure:
+            heures.setdefault(ligne['heure'], {}).update(
+                revenus=ligne['total'],
+                nombre_paiements=ligne['nombre']
+            )
+
+        ventes_plats = CommandeItem.objects.filter(
+            **sur_jours('commande__jour_commande', jour)
+        ).values('plat_id').annotate(
+            quantite_totale=Sum('quantite'),
+            revenu_total=Sum(F('quantite') * F('prix_unitaire')),
+            nombre_commandes=Count('commande', distinct=True)
+        )
+
+        self.revenus = paiements['total'] or Decimal('0.00')
+        self.nombre_paiements = paiements['nombre']
+        self.depenses = depenses['total'] or Decimal('0.00')
+        self.nombre_depenses = depenses['nombre']
+        self.commandes_total = commandes['total']
+        self.commandes_en_attente = commandes['en_attente']
+        self.commandes_servies = commandes['servies']
+        self.commandes_payees = commandes['payees']
+        self.a_construire = False
+        self.save()
+
+        self.ecritures_reprises, _ = self.ecritures.all().delete()
+
+        DailyPlatSales.objects.filter(jour=jour).delete()
+        DailyPlatSales.objects.bulk_create([
+            DailyPlatSales(
+                jour=jour,
+                plat_id=ligne['plat_id'],
+                quantite=ligne['quantite_totale'],
+                revenu=ligne['revenu_total'],
+                nombre_commandes=ligne['nombre_commandes'],
+            )
+            for ligne in ventes_plats
+        ])
+
+        DailyHourlySales.objects.filter(jour=jour).delete()
+        DailyHourlySales.objects.bulk_create([
+            DailyHourlySales(jour=jour, heure=heure, **valeurs)
+            for heure, valeurs in heures.items()
+        ])
+
+    @classmethod
+    def jours_avec_activite(cls):
+        """Toutes les journées locales ayant au moins une commande, un paiement ou une dépense"""
+        from apps.commandes.models import Commande
+        from apps.paiements.models import Paiement, Depense
+
+        jours = set(Depense.objects.values_list('date_depense', flat=True).distinct())
+        for modele, champ in ((Commande, 'jour_commande'), (Paiement, 'jour_paiement')):
+            jours.update(modele.objects.values_list(champ, flat=True).distinct())
+        return sorted(jours)
+
+
+def _cumuler_ligne(modele, cles, deltas):
+    """Ajoute les deltas à une ligne de détail du résumé, créée au premier report"""
+    if modele.objects.filter(**cles).update(
+        **{champ: F(champ) + delta for champ, delta in deltas.items()}
+    ):
+        return
+
+    try:
+        with transaction.atomic():
+            modele.objects.create(**cles, **deltas)
+    except IntegrityError:
+        # Créée en parallèle : on réessaie la mise à jour
+        _cumuler_ligne(modele, cles, deltas)
+
+
+class DailyPlatSales(models.Model):
+    """
+    Quantités vendues par plat et par journée locale
+    Sert aux classements des plats et à la répartition par catégorie
+    """
+    jour = models.DateField(verbose_name="Jour")
+
+    plat = models.ForeignKey(
+        'menu.Plat',
+        on_delete=models.CASCADE,
+        related_name='ventes_journalieres',
+        verbose_name="Plat"
+    )
+
+    quantite = models.PositiveIntegerField(default=0, verbose_name="Quantité")
+    revenu = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Revenu"
+    )
+    nombre_commandes = models.PositiveIntegerField(default=0, verbose_name="Commandes")
+
+    class Meta:
+        verbose_name = "Ventes d'un plat par jour"
+        verbose_name_plural = "Ventes des plats par jour"
+        unique_together = ['jour', 'plat']
+        ordering = ['-jour']
+
+    def __str__(self):
+        return f"{self.plat.nom} x{self.quantite} le {self.jour:%d/%m/%Y}"
+
+
+class DailyHourlySales(models.Model):
+    """
+    Commandes passées et paiements encaissés par heure locale d'une journée
+    Sert à la carte de chaleur heure x jour de la semaine (affluence)
+    Seules les heures avec de l'activité ont une ligne
+    """
+    jour = models.DateField(verbose_name="Jour")
+    heure = models.PositiveSmallIntegerField(verbose_name="Heure")
+
+    commandes = models.PositiveIntegerField(default=0, verbose_name="Commandes")
+    revenus = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Revenus"
+    )
+    nombre_paiements = models.PositiveIntegerField(default=0, verbose_name="Paiements")
+
+    class Meta:
+        verbose_name = "Ventes d'une heure"
+        verbose_name_plural = "Ventes par heure"
+        unique_together = ['jour', 'heure']
+        ordering = ['-jour', 'heure']
+
+    def __str__(self):
+        return f"{self.jour:%d/%m/%Y} {self.heure}h - {self.commandes} commande(s)"
+
+
+class EcritureVentes(models.Model):
+    """
+    Journal des ventes en ajout seul : deltas d'une création ou d'une
+    transition, en attente de report dans le résumé de leur jour
+    Une écriture avec une heure compte aussi dans DailyHourlySales
+    (commandes_total, revenus, nombre_paiements), une écriture avec un plat
+    dans DailyPlatSales (quantite, revenu, nombre_commandes)
+    Supprimée une fois reportée (DailySalesSummary.consolider_jour) ou
+    comprise dans un recalcul complet du jour
+    """
+    resume = models.ForeignKey(
+        DailySalesSummary,
+        on_delete=models.CASCADE,
+        related_name='ecritures',
+        verbose_name="Résumé du jour"
+    )
+    heure = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Heure")
+    plat = models.ForeignKey(
+        'menu.Plat',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Plat"
+    )
+
+    # Deltas signés (une transition retire une commande d'un statut)
+    revenus = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    nombre_paiements = models.IntegerField(default=0)
+    depenses = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    nombre_depenses = models.IntegerField(default=0)
+    commandes_total = models.IntegerField(default=0)
+    commandes_en_attente = models.IntegerField(default=0)
+    commandes_servies = models.IntegerField(default=0)
+    commandes_payees = models.IntegerField(default=0)
+
+    quantite = models.IntegerField(default=0)
+    revenu = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    nombre_commandes = models.IntegerField(default=0)
+
+    CHAMPS_DELTA = DailySalesSummary.CHAMPS_CUMULES + ('quantite', 'revenu', 'nombre_commandes')
+
+    class Meta:
+        verbose_name = "Écriture de ventes"
+        verbose_name_plural = "Journal des ventes"
+
+    def __str__(self):
+        return f"Écriture #{self.pk} du résumé #{self.resume_id}"
+
+    @classmethod
+    def jours_en_attente(cls):
+        """Journées dont le journal a des écritures à reporter"""
+        return list(
+            cls.objects.order_by('resume__jour').values_list('resume__jour', flat=True).distinct()
+        )
+
+
+class RapportGenere(models.Model):
+    """
+    Rapport PDF des ventes généré en tâche de fond
+    Une seule génération en cours par période : les demandes simultanées
+    pour la même période partagent le même rapport
+    """
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('pret', 'Prêt'),
+        ('echec', 'Échec'),
+    ]
+
+    # Au-delà, une génération non terminée est considérée comme perdue
+    # (worker arrêté) et une nouvelle peut être lancée
+    DELAI_ABANDON = timedelta(minutes=15)
+
+    debut = models.DateField(verbose_name="Début de période")
+    fin = models.DateField(verbose_name="Fin de période")
+    sous_totaux_par_jour = models.BooleanField(default=False, verbose_name="Sous-totaux par jour")
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+
+    # Nom dérivé des paramètres et des données du rapport (empreinte SHA-256)
+    fichier = models.FileField(upload_to='rapports/', blank=True, verbose_name="Fichier")
+    empreinte = models.CharField(max_length=64, blank=True, verbose_name="Empreinte SHA-256")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+
+    demande_par = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='rapports_demandes',
+        verbose_name="Demandé par"
+    )
+
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Terminé le")
+
+    class Meta:
+        verbose_name = "Rapport généré"
+        verbose_name_plural = "Rapports générés"
+        ordering = ['-date_creation']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['debut', 'fin', 'sous_totaux_par_jour'],
+                condition=Q(statut__in=['en_attente', 'en_cours']),
+                name='rapport_unique_generation_en_cours'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Rapport du {self.debut:%d/%m/%Y} au {self.fin:%d/%m/%Y} - {self.get_statut_display()}"
+
+    @property
+    def est_termine(self):
+        return self.statut in ('pret', 'echec')
+
+    @classmethod
+    def obtenir_ou_lancer(cls, debut, fin, sous_totaux_par_jour=False, demande_par=None):
+        """
+        Retourne la génération en cours pour la période, ou en crée une
+        et planifie la tâche après le commit
+        Retourne (rapport, cree)
+        """
+        from apps.dashboard.tasks import generer_rapport_pdf
+        from restaurant.celery import planifier_tache
+
+        # Génération abandonnée : libère la place pour une nouvelle
+        en_cours = cls.objects.filter(
+            debut=debut,
+            fin=fin,
+            sous_totaux_par_jour=sous_totaux_par_jour,
+            statut__in=['en_attente', 'en_cours']
+        )
+        en_cours.filter(
+            date_creation__lt=timezone.now() - cls.DELAI_ABANDON
+        ).update(statut='echec', erreur="Génération abandonnée", date_fin=timezone.now())
+
+        try:
+            with transaction.atomic():
+                rapport = cls.objects.create(
+                    debut=debut,
+                    fin=fin,
+                    sous_totaux_par_jour=sous_totaux_par_jour,
+                    demande_par=demande_par
+                )
+        except IntegrityError:
+            # Une autre demande vient de lancer la même période ; si elle
+            # s'est terminée depuis, la place est de nouveau libre
+            rapport = en_cours.first()
+            if rapport is None:
+                return cls.obtenir_ou_lancer(debut, fin, sous_totaux_par_jour, demande_par)
+            return rapport, False
+
+        transaction.on_commit(lambda: planifier_tache(generer_rapport_pdf, args=[rapport.pk]))
+        return rapport, True
+
+    def generer(self):
+        """
+        Construit le PDF et l'enregistre sous un nom dérivé de ses données
+        Appelé par la tâche Celery ; un seul worker passe la transition en_cours
+        """
+        from .rapports import enregistrer_rapport_pdf
+
+        if not RapportGenere.objects.filter(pk=self.pk, statut='en_attente').update(statut='en_cours'):
+            return False
+
+        try:
+            nom, empreinte = enregistrer_rapport_pdf(
+                self.debut, self.fin,
+                sous_totaux_par_jour=self.sous_totaux_par_jour
+            )
+
+            self.fichier.name = nom
+            self.empreinte = empreinte
+            self.statut = 'pret'
+        except Exception as e:
+            self.statut = 'echec'
+            self.erreur = str(e)
+            raise
+        finally:
+            self.date_fin = timezone.now()
+            self.save(update_fields=['fichier', 'empreinte', 'statut', 'erreur', 'date_fin'])
+
+        return True
+
+
+class ExecutionPeriodique(models.Model):
+    """
+    Dernière exécution de chaque tâche périodique (voir TACHES_PERIODIQUES
+    dans restaurant/celery.py), mise à jour par les signaux Celery
+    Les cumuls permettent de voir ce que coûte chaque tâche
+    """
+    nom = models.CharField(max_length=100, unique=True, verbose_name="Tâche périodique")
+    tache = models.CharField(max_length=200, verbose_name="Tâche Celery")
+
+    derniere_execution = models.DateTimeField(verbose_name="Dernière exécution")
+    derniere_duree = models.FloatField(default=0, verbose_name="Dernière durée (s)")
+    dernier_statut = models.CharField(max_length=20, verbose_name="Dernier statut")
+    derniere_erreur = models.TextField(blank=True, verbose_name="Dernière erreur")
+
+    nombre_executions = models.PositiveIntegerField(default=0, verbose_name="Exécutions")
+    nombre_echecs = models.PositiveIntegerField(default=0, verbose_name="Échecs")
+    duree_totale = models.FloatField(default=0, verbose_name="Durée cumulée (s)")
+
+    class Meta:
+        verbose_name = "Exécution périodique"
+        verbose_name_plural = "Exécutions périodiques"
+        ordering = ['nom']
+
+    def __str__(self):
+        return f"{self.nom} - {self.dernier_statut} en {self.derniere_duree:.2f} s"
+
+    @property
+    def duree_moyenne(self):
+        if not self.nombre_executions:
+            return 0
+        return self.duree_totale / self.nombre_executions
+
+    @classmethod
+    def enregistrer(cls, nom, tache, duree, statut, erreur=''):
+        """Ajoute une exécution aux compteurs (UPDATE atomique, sans relecture)"""
+        echec = 0 if statut == 'SUCCESS' else 1
+        valeurs = {
+            'tache': tache,
+            'derniere_execution': timezone.now(),
+            'derniere_duree': duree,
+            'dernier_statut': statut,
+            'derniere_erreur': erreur,
+        }
+
+        if cls.objects.filter(nom=nom).update(
+            nombre_executions=F('nombre_executions') + 1,
+            nombre_echecs=F('nombre_echecs') + echec,
+            duree_totale=F('duree_totale') + duree,
+            **valeurs
+        ):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    nom=nom,
+                    nombre_executions=1,
+                    nombre_echecs=echec,
+                    duree_totale=duree,
+                    **valeurs
+                )
+        except IntegrityError:
+            # Première exécution enregistrée en parallèle : on réessaie la mise à jour
+            cls.enregistrer(nom, tache, duree, statut, erreur)
@@ -0,0 +1,341 @@
+# apps/dashboard/rapports.py
+
+"""
+Rapport PDF des ventes (reportlab)
+Utilisé par la génération en tâche de fond (RapportGenere) et l'envoi par email
+"""
+
+import hashlib
+import itertools
+from io import BytesIO
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.enums import TA_LEFT
+
+from apps.paiements.models import Paiement, Depense
+from restaurant.periodes import sur_jours
+from restaurant.verrous import execution_unique
+from .statistiques import statistiques_plats
+
+
+# Lignes par tableau du détail (environ une page A4) : chaque tableau
+# répète l'en-tête et reste petit, quel que soit le nombre de paiements
+LIGNES_PAR_TABLEAU = 35
+
+# Paiements lus par aller-retour avec la base
+TAILLE_PAQUET = 2000
+
+ENTETES_DETAIL = ['Date', 'Commande', 'Table', 'Montant', 'Mode']
+
+STYLE_DETAIL = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16a34a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+])
+
+STYLE_PLATS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+])
+
+STYLE_SOUS_TOTAL = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#dcfce7')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+])
+
+
+class FlowablesALaDemande(list):
+    """
+    Liste de flowables alimentée au fil de la mise en page par un itérable :
+    reportlab ne voit jamais plus que quelques tableaux à la fois, la
+    mémoire reste donc constante quel que soit le nombre de lignes
+    """
+
+    # Flowables gardés d'avance (keepWithNext regarde les suivants)
+    AVANCE = 4
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def _alimenter(self):
+        while self._source is not None and list.__len__(self) < self.AVANCE:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._alimenter()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._alimenter()
+        return list.__getitem__(self, index)
+
+
+def _tableau_detail(lignes):
+    tableau = Table([ENTETES_DETAIL] + lignes, colWidths=[70, 130, 100, 90, 70], repeatRows=1)
+    tableau.setStyle(STYLE_DETAIL)
+    return tableau
+
+
+def _sous_total(jour, total):
+    tableau = Table(
+        [[f"Sous-total du {jour.strftime('%d/%m/%Y')}", f"{float(total):.2f} GNF"]],
+        colWidths=[300, 160]
+    )
+    tableau.setStyle(STYLE_SOUS_TOTAL)
+    return tableau
+
+
+def _sections_detail(paiements_qs, sous_totaux_par_jour, styles):
+    """
+    Génère les tableaux du détail par blocs de LIGNES_PAR_TABLEAU,
+    à partir d'un itérateur sur les seules colonnes utiles
+    """
+    paiements = paiements_qs.order_by('-date_paiement', '-id').values_list(
+        'date_paiement', 'commande_id', 'commande__table__login', 'montant'
+    ).iterator(chunk_size=TAILLE_PAQUET)
+
+    jour_courant = None
+    total_jour = Decimal('0.00')
+    bloc = []
+
+    for date_paiement, commande_id, table_nom, montant in paiements:
+        date_locale = timezone.localtime(date_paiement)
+
+        if sous_totaux_par_jour and date_locale.date() != jour_courant:
+            if jour_courant is not None:
+                if bloc:
+                    yield _tableau_detail(bloc)
+                    bloc = []
+                yield _sous_total(jour_courant, total_jour)
+            jour_courant = date_locale.date()
+            total_jour = Decimal('0.00')
+            yield Paragraph(f"<b>{jour_courant.strftime('%d/%m/%Y')}</b>", styles['Heading4'])
+
+        total_jour += montant
+        bloc.append([
+            date_locale.strftime('%d/%m/%Y'),
+            f"CMD-{date_locale.strftime('%Y%m%d')}-{commande_id:04d}",
+            table_nom or '',
+            f"{float(montant):.2f} GNF",
+            'Espèces',
+        ])
+
+        if len(bloc) >= LIGNES_PAR_TABLEAU:
+            yield _tableau_detail(bloc)
+            bloc = []
+
+    if bloc:
+        yield _tableau_detail(bloc)
+    if sous_totaux_par_jour and jour_courant is not None:
+        yield _sous_total(jour_courant, total_jour)
+
+
+@execution_unique(
+    'enregistrer_rapport_pdf',
+    cle=lambda debut, fin, sous_totaux_par_jour=False: f"{debut}:{fin}:{int(sous_totaux_par_jour)}",
+    duree=15 * 60,
+    attente=5 * 60,
+    # Les appels qui attendaient retrouvent le fichier par son empreinte
+    conservation=0,
+)
+def enregistrer_rapport_pdf(debut_periode, fin_periode, sous_totaux_par_jour=False):
+    """
+    Construit le PDF de la période et l'enregistre dans le stockage sous un
+    nom dérivé de ses paramètres et des données lues (empreinte_rapport) ;
+    retourne (nom, empreinte). Un rapport déjà enregistré pour les mêmes
+    données est réutilisé sans être reconstruit.
+    Un seul calcul par période à la fois : les appels simultanés partagent
+    le même fichier. Seule sa référence passe par le cache, pas les octets.
+    """
+    empreinte = empreinte_rapport(debut_periode, fin_periode, sous_totaux_par_jour)
+
+    nom = f"rapports/rapport_ventes_{empreinte}.pdf"
+    if not default_storage.exists(nom):
+        pdf = build_sales_report_pdf(
+            debut_periode, fin_periode, timezone.now(),
+            sous_totaux_par_jour=sous_totaux_par_jour
+        )
+        nom = default_storage.save(nom, ContentFile(pdf))
+    return nom, empreinte
+
+
+def empreinte_rapport(debut_periode, fin_periode, sous_totaux_par_jour=False):
+    """
+    Empreinte SHA-256 des paramètres normalisés du rapport et de l'état des
+    paiements et dépenses de la période (nombre, total, dernier id) :
+    elle change dès qu'une donnée du rapport est ajoutée, modifiée ou
+    supprimée, pas à chaque génération (le PDF contient sa date)
+    """
+    etat = [debut_periode.isoformat(), fin_periode.isoformat(), str(int(bool(sous_totaux_par_jour)))]
+    for modele, champ in ((Paiement, 'jour_paiement'), (Depense, 'date_depense')):
+        agregat = modele.objects.filter(**sur_jours(champ, debut_periode, fin_periode)).aggregate(
+            nombre=Count('id'), total=Sum('montant'), dernier=Max('id')
+        )
+        etat.extend(str(agregat[cle]) for cle in ('nombre', 'total', 'dernier'))
+    return hashlib.sha256('|'.join(etat).encode()).hexdigest()
+
+
+def build_sales_report_pdf(debut_periode, aujourd_hui, maintenant, sous_totaux_par_jour=False):
+    """
+    Construit le PDF de rapport de ventes pour une période donnée (bornes incluses) et renvoie les bytes.
+    sous_totaux_par_jour : détail découpé en sections par journée, avec sous-total
+    """
+
+    # Paiements et dépenses sur la période
+    paiements_qs = Paiement.objects.filter(
+        **sur_jours('jour_paiement', debut_periode, aujourd_hui)
+    )
+    total_ventes = paiements_qs.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
+    nombre_commandes = paiements_qs.count()
+
+    depenses_qs = Depense.objects.filter(
+        **sur_jours('date_depense', debut_periode, aujourd_hui)
+    )
+    total_depenses = depenses_qs.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
+
+    panier_moyen = Decimal('0.00')
+    if nombre_commandes > 0:
+        panier_moyen = total_ventes / nombre_commandes
+
+    benefice_net = total_ventes - total_depenses
+
+    # Préparation du buffer et du document
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=40,
+        rightMargin=40,
+        topMargin=40,
+        bottomMargin=40,
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = styles['Title']
+    title_style.alignment = TA_LEFT
+    normal = styles['Normal']
+    heading = styles['Heading2']
+
+    elements = []
+
+    # Titre principal
+    elements.append(Paragraph('<font color="#2563eb">RAPPORT DES VENTES</font>', title_style))
+    elements.append(Spacer(1, 12))
+
+    # Infos de période et date de génération
+    periode_txt = f"Période: {debut_periode.strftime('%d/%m/%Y')} - {aujourd_hui.strftime('%d/%m/%Y')}"
+    genere_txt = f"Généré le: {maintenant.strftime('%d/%m/%Y à %H:%M')}"
+    elements.append(Paragraph(periode_txt, normal))
+    elements.append(Paragraph(genere_txt, normal))
+    elements.append(Spacer(1, 24))
+
+    # Section RÉSUMÉ
+    elements.append(Paragraph('<b>RÉSUMÉ</b>', heading))
+    elements.append(Spacer(1, 8))
+
+    resume_data = [
+        ['Indicateur', 'Valeur'],
+        ['Total des ventes', f"{total_ventes:.2f} GNF"],
+        ['Nombre de commandes', str(nombre_commandes)],
+        ['Panier moyen', f"{panier_moyen:.2f} GNF"],
+        ['Total des dépenses', f"{total_depenses:.2f} GNF"],
+        ['Bénéfice net', f"{benefice_net:.2f} GNF"],
+    ]
+
+    resume_table = Table(resume_data, colWidths=[220, 220])
+    resume_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ]))
+
+    elements.append(resume_table)
+    elements.append(Spacer(1, 24))
+
+    # Sections CATÉGORIES et TOP PLATS (une seule requête groupée par plat)
+    ventes_plats = statistiques_plats(debut_periode, aujourd_hui)
+    if ventes_plats['plats']:
+        elements.append(Paragraph('<b>VENTES PAR CATÉGORIE</b>', heading))
+        elements.append(Spacer(1, 8))
+        categories_table = Table(
+            [['Catégorie', 'Quantité', 'Revenu']] + [
+                [cat['categorie'], str(cat['quantite']), f"{float(cat['revenu']):.2f} GNF"]
+                for cat in ventes_plats['categories']
+            ],
+            colWidths=[200, 100, 160]
+        )
+        categories_table.setStyle(STYLE_PLATS)
+        elements.append(categories_table)
+        elements.append(Spacer(1, 24))
+
+        elements.append(Paragraph('<b>TOP 10 DES PLATS</b>', heading))
+        elements.append(Spacer(1, 8))
+        plats_table = Table(
+            [['Plat', 'Quantité', 'Commandes', 'Revenu']] + [
+                [plat['plat__nom'], str(plat['quantite_totale']), str(plat['nombre_commandes']),
+                 f"{float(plat['revenu_total']):.2f} GNF"]
+                for plat in ventes_plats['top_plats']
+            ],
+            colWidths=[180, 80, 80, 120]
+        )
+        plats_table.setStyle(STYLE_PLATS)
+        elements.append(plats_table)
+        elements.append(Spacer(1, 24))
+
+    # Section DÉTAIL DES PAIEMENTS (générée au fil de la mise en page)
+    elements.append(Paragraph('<b>DÉTAIL DES PAIEMENTS</b>', heading))
+    elements.append(Spacer(1, 8))
+
+    if nombre_commandes == 0:
+        elements.append(Paragraph("Aucun paiement sur la période.", normal))
+    else:
+        details = _sections_detail(paiements_qs, sous_totaux_par_jour, styles)
+        elements = FlowablesALaDemande(itertools.chain(elements, details))
+
+    # Construction du PDF
+    doc.build(elements)
+
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
@@ -0,0 +1,90 @@
+# apps/dashboard/signals.py
+
+"""
+Maintien des résumés de ventes journaliers (DailySalesSummary)
+
+Une création (paiement, dépense, commande) ajoute ses deltas au journal
+de son jour dans sa propre transaction (EcritureVentes), reporté ensuite
+dans le résumé par une tâche. Les écritures sans signal y ajoutent les
+leurs explicitement : transitions de statut
+(apps/commandes/transitions.py), bulk_create des lignes (commande_valider).
+Les modifications et suppressions, plus rares, planifient un recalcul
+complet du jour, regroupé et fait après le commit.
+
+Les mêmes écritures (et celles sur les plats) invalident le contexte du
+dashboard analytics mis en cache.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.commandes.models import Commande, CommandeItem
+from apps.menu.models import Plat
+from apps.paiements.models import Paiement, Depense
+from .models import DailySalesSummary
+from .statistiques import invalider_analytics, invalider_jours_sans_resume
+from .tasks import programmer_rafraichissement
+
+
+@receiver(post_save, sender=Paiement)
+def paiement_enregistre(sender, instance, created, **kwargs):
+    if created:
+        DailySalesSummary.cumuler_paiement(instance)
+    else:
+        programmer_rafraichissement(instance.jour_paiement)
+
+
+@receiver(post_save, sender=Depense)
+def depense_enregistree(sender, instance, created, **kwargs):
+    if created:
+        DailySalesSummary.cumuler_depense(instance)
+    else:
+        programmer_rafraichissement(instance.date_depense)
+
+
+@receiver(post_save, sender=Commande)
+def commande_enregistree(sender, instance, created, **kwargs):
+    if created:
+        DailySalesSummary.cumuler_commande(instance)
+    else:
+        programmer_rafraichissement(instance.jour_commande)
+
+
+@receiver(post_delete, sender=Paiement)
+def paiement_supprime(sender, instance, **kwargs):
+    programmer_rafraichissement(instance.jour_paiement)
+
+
+@receiver(post_delete, sender=Depense)
+def depense_supprimee(sender, instance, **kwargs):
+    programmer_rafraichissement(instance.date_depense)
+
+
+@receiver(post_delete, sender=Commande)
+def commande_supprimee(sender, instance, **kwargs):
+    programmer_rafraichissement(instance.jour_commande)
+
+
+@receiver([post_save, post_delete], sender=CommandeItem)
+def commande_item_modifie(sender, instance, **kwargs):
+    # Lignes ajoutées ou modifiées une à une (admin) : recalcul complet,
+    # le nombre de commandes distinctes par plat ne se cumule pas
+    jour_commande = Commande.objects.filter(
+        pk=instance.commande_id
+    ).values_list('jour_commande', flat=True).first()
+    if jour_commande:
+        programmer_rafraichissement(jour_commande)
+
+
+@receiver([post_save, post_delete], sender=Paiement)
+@receiver([post_save, post_delete], sender=Depense)
+@receiver([post_save, post_delete], sender=Commande)
+@receiver([post_save, post_delete], sender=Plat)
+def statistiques_modifiees(sender, instance, **kwargs):
+    transaction.on_commit(invalider_analytics)
+
+
+@receiver(post_delete, sender=DailySalesSummary)
+def resume_supprime(sender, instance, **kwargs):
+    transaction.on_commit(invalider_jours_sans_resume)
@@ -0,0 +1,309 @@
+# apps/dashboard/statistiques.py
+
+"""
+Statistiques de ventes calculées sur les résumés journaliers
+(DailySalesSummary, DailyPlatSales), réutilisables par le dashboard,
+les exports et les rapports
+"""
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from apps.commandes.models import Commande
+from apps.menu.models import Plat
+from apps.paiements.models import Paiement
+from restaurant.periodes import sur_jours
+from .models import DailySalesSummary, DailyPlatSales, DailyHourlySales
+
+
+# Version courante des statistiques : toute écriture qui les change
+# l'incrémente, ce qui rend obsolètes les contextes mis en cache
+CLE_VERSION_ANALYTICS = 'analytics:version'
+
+# Filet de sécurité : un contexte n'est jamais servi plus de 5 minutes
+ANALYTICS_CACHE_TTL = 5 * 60
+
+# Journées d'activité sans résumé sur tout l'historique (antérieures aux
+# résumés) : liste qui ne peut que diminuer, toute nouvelle écriture créant
+# le résumé de son jour ; recalculée une fois par jour au plus
+CLE_JOURS_SANS_RESUME = 'analytics:jours-sans-resume'
+JOURS_SANS_RESUME_TTL = 24 * 60 * 60
+
+# Taille du classement des plats
+TOP_PLATS = 10
+
+JOURS_SEMAINE = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+# Granularité choisie selon la longueur de la période (en jours)
+JOUR = 'jour'
+SEMAINE = 'semaine'
+MOIS = 'mois'
+
+MAX_JOURS_PAR_JOUR = 31
+MAX_JOURS_PAR_SEMAINE = 183
+
+_TRONCATURES = {
+    JOUR: TruncDay,
+    SEMAINE: TruncWeek,
+    MOIS: TruncMonth,
+}
+
+
+def _nouvelle_version():
+    # Partir de l'heure évite de réutiliser une ancienne version encore en cache
+    return int(time.time() * 1000)
+
+
+def version_analytics():
+    """Version courante des statistiques (créée au premier appel)"""
+    return cache.get_or_set(CLE_VERSION_ANALYTICS, _nouvelle_version, timeout=None)
+
+
+def invalider_analytics():
+    """Change la version : les contextes en cache ne seront plus relus"""
+    try:
+        cache.incr(CLE_VERSION_ANALYTICS)
+    except ValueError:
+        # Version absente (expulsée du cache) : on en repart une nouvelle
+        cache.set(CLE_VERSION_ANALYTICS, _nouvelle_version(), timeout=None)
+
+
+def cle_cache_analytics(aujourd_hui, debut_evolution, fin_evolution):
+    """Clé du contexte du dashboard analytics pour la version courante"""
+    return (
+        f"analytics:v{version_analytics()}:{aujourd_hui.isoformat()}:"
+        f"{debut_evolution.isoformat()}:{fin_evolution.isoformat()}"
+    )
+
+
+def granularite_pour(debut, fin):
+    """Jour jusqu'à un mois, semaine jusqu'à six mois, mois au-delà"""
+    nombre_jours = (fin - debut).days + 1
+    if nombre_jours <= MAX_JOURS_PAR_JOUR:
+        return JOUR
+    if nombre_jours <= MAX_JOURS_PAR_SEMAINE:
+        return SEMAINE
+    return MOIS
+
+
+def _debut_periode(jour, granularite):
+    """Premier jour de la période (jour, semaine ISO, mois) contenant jour"""
+    if granularite == SEMAINE:
+        return jour - timedelta(days=jour.weekday())
+    if granularite == MOIS:
+        return jour.replace(day=1)
+    return jour
+
+
+def _periode_suivante(jour, granularite):
+    if granularite == SEMAINE:
+        return jour + timedelta(days=7)
+    if granularite == MOIS:
+        return date(jour.year + jour.month // 12, jour.month % 12 + 1, 1)
+    return jour + timedelta(days=1)
+
+
+def _libelle(jour, granularite):
+    if granularite == SEMAINE:
+        return f"Sem. {jour:%d/%m}"
+    if granularite == MOIS:
+        return f"{jour:%m/%Y}"
+    return f"{jour:%d/%m}"
+
+
+def evolution_ventes(debut, fin, granularite=None):
+    """
+    Commandes et revenus de debut à fin (bornes incluses), regroupés par
+    jour, semaine ou mois en une seule requête GROUP BY
+    Les périodes sans activité sont complétées à zéro
+    Retourne (granularite, [{'date', 'debut', 'commandes', 'revenus'}, ...])
+    """
+    granularite = granularite or granularite_pour(debut, fin)
+    troncature = _TRONCATURES[granularite]
+
+    par_periode = {
+        ligne['periode']: ligne
+        for ligne in DailySalesSummary.objects.filter(
+            **sur_jours('jour', debut, fin)
+        ).annotate(
+            periode=troncature('jour')
+        ).values('periode').annotate(
+            commandes=Sum('commandes_total'),
+            revenus_periode=Sum('revenus')
+        ).order_by()
+    }
+
+    evolution = []
+    periode = _debut_periode(debut, granularite)
+    while periode <= fin:
+        ligne = par_periode.get(periode, {})
+        evolution.append({
+            'date': _libelle(periode, granularite),
+            'debut': periode,
+            'commandes': ligne.get('commandes') or 0,
+            'revenus': float(ligne.get('revenus_periode') or Decimal('0.00')),
+        })
+        periode = _periode_suivante(periode, granularite)
+
+    return granularite, evolution
+
+
+def ventes_par_plat(debut=None, fin=None):
+    """
+    Ventes de chaque plat sur la période (tout l'historique par défaut),
+    en une seule requête groupée par plat
+    Triées par quantité vendue décroissante
+    """
+    ventes = DailyPlatSales.objects.filter(**sur_jours('jour', debut, fin))
+
+    return list(
+        ventes.values(
+            'plat_id', 'plat__nom', 'plat__categorie', 'plat__prix_unitaire'
+        ).annotate(
+            quantite_totale=Sum('quantite'),
+            nombre_commandes=Sum('nombre_commandes'),
+            revenu_total=Sum('revenu')
+        ).order_by('-quantite_totale', 'plat__nom')
+    )
+
+
+def repartition_categories(plats):
+    """
+    Quantités et revenus par catégorie, déduits des ventes par plat
+    (dans l'ordre de Plat.CATEGORIE_CHOICES, catégories vendues uniquement)
+    """
+    totaux = {}
+    for plat in plats:
+        quantite, revenu = totaux.get(plat['plat__categorie'], (0, Decimal('0.00')))
+        totaux[plat['plat__categorie']] = (
+            quantite + plat['quantite_totale'],
+            revenu + plat['revenu_total'],
+        )
+
+    categories = []
+    for code, label in Plat.CATEGORIE_CHOICES:
+        quantite, revenu = totaux.get(code, (0, Decimal('0.00')))
+        if quantite:
+            categories.append({
+                'code': code,
+                'categorie': label,
+                'quantite': quantite,
+                'revenu': revenu,
+            })
+    return categories
+
+
+def statistiques_plats(debut=None, fin=None, top=TOP_PLATS):
+    """
+    Classement des plats et répartition par catégorie, issus de la même requête
+    Retourne {'plats', 'top_plats', 'categories'}
+    """
+    plats = ventes_par_plat(debut, fin)
+    return {
+        'plats': plats,
+        'top_plats': plats[:top],
+        'categories': repartition_categories(plats),
+    }
+
+
+def jours_non_resumes(debut, fin):
+    """
+    Journées de la période avec de l'activité mais sans résumé construit :
+    historique antérieur aux résumés (avant reconstruire_resume_ventes) ou
+    résumé créé par une écriture et pas encore calculé
+    Lu sur les résumés de la période (une ligne par jour) ; les journées
+    d'activité de l'historique ne sont parcourues qu'à l'expiration du cache
+    """
+    resumes = dict(DailySalesSummary.objects.filter(
+        **sur_jours('jour', debut, fin)
+    ).values_list('jour', 'a_construire'))
+
+    anciens = cache.get(CLE_JOURS_SANS_RESUME)
+    if anciens is None:
+        anciens = _jours_actifs_sans_resume()
+        cache.set(CLE_JOURS_SANS_RESUME, anciens, JOURS_SANS_RESUME_TTL)
+
+    # Une journée résumée depuis la mise en cache n'est plus manquante
+    manquants = {jour for jour, a_construire in resumes.items() if a_construire}
+    manquants.update(jour for jour in anciens if debut <= jour <= fin and jour not in resumes)
+    return sorted(manquants)
+
+
+def invalider_jours_sans_resume():
+    """Résumé supprimé : son jour peut redevenir manquant, la liste est recalculée"""
+    cache.delete(CLE_JOURS_SANS_RESUME)
+
+
+def _jours_actifs_sans_resume():
+    """Journées avec des commandes ou des paiements mais sans résumé, sur tout l'historique"""
+    jours = set(Commande.objects.values_list('jour_commande', flat=True).distinct())
+    jours.update(Paiement.objects.values_list('jour_paiement', flat=True).distinct())
+    jours.difference_update(DailySalesSummary.objects.values_list('jour', flat=True))
+    return sorted(jours)
+
+
+def carte_affluence(debut, fin):
+    """
+    Commandes et revenus par heure de la journée et jour de la semaine
+    (heure locale Africa/Conakry), de debut à fin (bornes incluses)
+    Une seule requête groupée sur les ventes horaires (DailyHourlySales) ;
+    les journées pas encore résumées sont lues sur les commandes et les
+    paiements, et leur nombre est renvoyé pour le signaler
+
+    Retourne {'jours', 'heures', 'commandes', 'revenus', 'max_commandes',
+    'jours_non_resumes'} :
+    commandes[j][h] et revenus[j][h] pour j = 0 (lundi) à 6, h = 0 à 23
+    """
+    commandes = [[0] * 24 for _ in JOURS_SEMAINE]
+    revenus = [[0.0] * 24 for _ in JOURS_SEMAINE]
+
+    lignes = DailyHourlySales.objects.filter(
+        **sur_jours('jour', debut, fin)
+    ).annotate(
+        jour_semaine=ExtractIsoWeekDay('jour')
+    ).values('jour_semaine', 'heure').annotate(
+        total_commandes=Sum('commandes'),
+        total_revenus=Sum('revenus')
+    ).order_by()
+
+    for ligne in lignes:
+        j, h = ligne['jour_semaine'] - 1, ligne['heure']
+        commandes[j][h] = ligne['total_commandes']
+        revenus[j][h] = float(ligne['total_revenus'])
+
+    manquants = jours_non_resumes(debut, fin)
+    if manquants:
+        fuseau = timezone.get_default_timezone()
+
+        commandes_par_heure = Commande.objects.filter(
+            jour_commande__in=manquants
+        ).annotate(
+            jour_semaine=ExtractIsoWeekDay('jour_commande'),
+            heure=ExtractHour('date_commande', tzinfo=fuseau)
+        ).values('jour_semaine', 'heure').annotate(nombre=Count('id')).order_by()
+        for ligne in commandes_par_heure:
+            commandes[ligne['jour_semaine'] - 1][ligne['heure']] += ligne['nombre']
+
+        paiements_par_heure = Paiement.objects.filter(
+            jour_paiement__in=manquants
+        ).annotate(
+            jour_semaine=ExtractIsoWeekDay('jour_paiement'),
+            heure=ExtractHour('date_paiement', tzinfo=fuseau)
+        ).values('jour_semaine', 'heure').annotate(total=Sum('montant')).order_by()
+        for ligne in paiements_par_heure:
+            revenus[ligne['jour_semaine'] - 1][ligne['heure']] += float(ligne['total'])
+
+    return {
+        'jours': JOURS_SEMAINE,
+        'heures': list(range(24)),
+        'commandes': commandes,
+        'revenus': revenus,
+        'max_commandes': max(max(ligne) for ligne in commandes),
+        'jours_non_resumes': len(manquants),
+    }
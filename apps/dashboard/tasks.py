@@ -1,16 +1,141 @@
+import logging
+from smtplib import SMTPException
+
 from celery import shared_task
-from django.core.mail import EmailMessage
+from celery.utils.time import get_exponential_backoff_interval
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Sum
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
 
 from apps.paiements.models import Paiement, Depense, Caisse
 from apps.commandes.models import Commande
+from apps.dashboard.models import DailySalesSummary, EcritureVentes, RapportGenere
+from apps.dashboard.statistiques import invalider_analytics, statistiques_plats
+from restaurant.celery import planifier_tache
+from restaurant.periodes import jour_local, sur_jours
+from restaurant.verrous import tache_unique
+
+logger = logging.getLogger(__name__)
+
+# Relances d'envoi : 30 s, 1 min, 2 min, 4 min... plafonnées à 30 min
+EMAIL_RELANCES_MAX = 6
+EMAIL_RELANCE_BASE = 30
+EMAIL_RELANCE_MAX_DELAI = 30 * 60
+
+
+# Recalculs complets d'un même jour regroupés sur ce délai (s) ; la clé de
+# regroupement expire d'elle-même si la tâche est perdue
+RAFRAICHISSEMENT_DELAI = 5
+RAFRAICHISSEMENT_CLE_DUREE = 60
+
+# Reports du journal des ventes regroupés sur ce délai (s)
+CONSOLIDATION_DELAI = 2
+
+
+def _cle_rafraichissement(jour):
+    return f"rafraichir-resume-ventes:{jour}"
+
+
+def _cle_consolidation(jour):
+    return f"consolider-resume-ventes:{jour}"
+
+
+@shared_task
+def rafraichir_resume_ventes(jours):
+    """
+    Recalcule les résumés de ventes des journées données (dates ISO)
+    """
+    for jour in jours:
+        # Libérée avant la lecture : une écriture pendant le recalcul en
+        # planifie un nouveau
+        cache.delete(_cle_rafraichissement(jour))
+        DailySalesSummary.rafraichir_jour(date.fromisoformat(jour))
+    invalider_analytics()
+    return f"{len(jours)} journée(s) recalculée(s)"
 
 
 @shared_task
+def consolider_resume_ventes(jours=None):
+    """
+    Reporte le journal des ventes dans les résumés des journées données
+    (dates ISO), ou de toutes celles qui ont des écritures en attente
+    (tâche périodique, filet de sécurité si un report planifié est perdu)
+    """
+    if jours is None:
+        jours = [jour.isoformat() for jour in EcritureVentes.jours_en_attente()]
+    
+    nombre = 0
+    for jour in jours:
+        cache.delete(_cle_consolidation(jour))
+        nombre += DailySalesSummary.consolider_jour(date.fromisoformat(jour))
+    if nombre:
+        invalider_analytics()
+    return f"{nombre} écriture(s) reportée(s) sur {len(jours)} journée(s)"
+
+
+@shared_task
+@tache_unique()
+def generer_rapport_pdf(rapport_id):
+    """
+    Génère le PDF d'un RapportGenere (hors requête HTTP)
+    """
+    rapport = RapportGenere.objects.filter(pk=rapport_id).first()
+    if rapport is None or not rapport.generer():
+        return f"Rapport #{rapport_id} ignoré (déjà traité)"
+    return f"Rapport #{rapport_id} prêt : {rapport.fichier.name}"
+
+
+def programmer_rafraichissement(*jours):
+    """
+    Planifie le recalcul complet des résumés des journées touchées
+    (modifications et suppressions ; les créations et transitions passent
+    par le journal, DailySalesSummary.cumuler)
+    La tâche n'est envoyée qu'après le commit, pour lire les données validées,
+    et une seule est en attente par jour : les écritures rapprochées
+    partagent le même recalcul
+    """
+    _planifier_par_jour(
+        jours, rafraichir_resume_ventes, _cle_rafraichissement,
+        RAFRAICHISSEMENT_DELAI, RAFRAICHISSEMENT_CLE_DUREE
+    )
+
+
+def programmer_consolidation(*jours):
+    """
+    Planifie le report du journal des ventes des journées touchées, après
+    le commit, une seule tâche en attente par jour
+    """
+    _planifier_par_jour(
+        jours, consolider_resume_ventes, _cle_consolidation,
+        CONSOLIDATION_DELAI, RAFRAICHISSEMENT_CLE_DUREE
+    )
+
+
+def _planifier_par_jour(jours, tache, cle, delai, duree_cle):
+    """Envoie tache(jours) après le commit pour les jours sans tâche déjà en attente"""
+    jours = sorted({jour.isoformat() for jour in jours if jour})
+    if not jours:
+        return
+    
+    def planifier():
+        a_planifier = [jour for jour in jours if cache.add(cle(jour), True, duree_cle)]
+        if a_planifier:
+            planifier_tache(
+                tache,
+                args=[a_planifier],
+                eta=timezone.now() + timedelta(seconds=delai)
+            )
+    
+    transaction.on_commit(planifier)
+
+
+@shared_task
+@tache_unique(cle=lambda: timezone.localdate().isoformat(), conservation=2 * 60 * 60)
 def envoyer_rapport_quotidien():
     """
     Tâche Celery exécutée quotidiennement à 18h
@@ -21,13 +146,13 @@ def envoyer_rapport_quotidien():
     3. Envoyer le rapport par email à l'admin
     """
     maintenant = timezone.now()
-    aujourd_hui = maintenant.date()
+    aujourd_hui = jour_local(maintenant)
     
     # ===== CALCUL DES STATISTIQUES DU JOUR =====
     
     # Paiements de la journée
     paiements_jour = Paiement.objects.filter(
-        date_paiement__date=aujourd_hui
+        **sur_jours('jour_paiement', aujourd_hui)
     )
     total_paiements = paiements_jour.aggregate(
         total=Sum('montant')
@@ -36,7 +161,7 @@ def envoyer_rapport_quotidien():
     
     # Dépenses de la journée
     depenses_jour = Depense.objects.filter(
-        date_depense=aujourd_hui
+        **sur_jours('date_depense', aujourd_hui)
     )
     total_depenses = depenses_jour.aggregate(
         total=Sum('montant')
@@ -48,7 +173,7 @@ def envoyer_rapport_quotidien():
     
     # Commandes de la journée
     commandes_jour = Commande.objects.filter(
-        date_commande__date=aujourd_hui
+        **sur_jours('jour_commande', aujourd_hui)
     )
     nombre_commandes = commandes_jour.count()
     commandes_payees = commandes_jour.filter(statut='payee').count()
@@ -107,6 +232,20 @@ Solde actuel : {solde_caisse:,.0f} GNF
             body += f"     Montant : {depense.montant:,.0f} GNF\n"
             body += f"     Par : {depense.enregistree_par.login}\n\n"
     
+    # Plats les plus vendus et répartition par catégorie du jour
+    ventes_plats = statistiques_plats(aujourd_hui, aujourd_hui, top=5)
+    if ventes_plats['plats']:
+        body += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+        body += "🍽️ PLATS LES PLUS VENDUS\n"
+        body += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        
+        for plat in ventes_plats['top_plats']:
+            body += f"   • {plat['plat__nom']} : {plat['quantite_totale']} vendu(s), {plat['revenu_total']:,.0f} GNF\n"
+        
+        body += "\n   Par catégorie :\n"
+        for categorie in ventes_plats['categories']:
+            body += f"   • {categorie['categorie']} : {categorie['quantite']} vendu(s), {categorie['revenu']:,.0f} GNF\n"
+    
     body += """
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -125,24 +264,76 @@ Restaurant Manager - Système de Gestion
 
     # ===== ENVOI DE L'EMAIL =====
     
-    to_email = getattr(settings, 'REPORT_EMAIL_TO', None)
+    destinataires = destinataires_rapport()
     
-    if not to_email:
+    if not destinataires:
         return "❌ Aucune adresse email configurée (REPORT_EMAIL_TO)"
     
+    planifier_tache(envoyer_rapport_email, args=[subject, body, destinataires])
+    
+    return f"✅ Rapport quotidien planifié pour {', '.join(destinataires)}"
+
+
+def destinataires_rapport():
+    """Adresses de REPORT_EMAIL_TO (une ou plusieurs, séparées par des virgules)"""
+    adresses = getattr(settings, 'REPORT_EMAIL_TO', None) or ''
+    return [adresse.strip() for adresse in adresses.split(',') if adresse.strip()]
+
+
+@shared_task(bind=True, max_retries=EMAIL_RELANCES_MAX)
+def envoyer_rapport_email(self, sujet, corps, destinataires, periode=None, fichier=None):
+    """
+    Envoie un rapport par email, un message par destinataire, sur une seule
+    connexion SMTP ouverte pour tout le lot
+
+    periode : [debut, fin] (dates ISO) pour joindre le rapport PDF des ventes
+    fichier : nom du rapport déjà enregistré (relances)
+
+    En cas d'échec SMTP, la tâche est relancée avec un délai exponentiel,
+    uniquement pour les destinataires qui n'ont pas encore reçu le message ;
+    le PDF, construit au premier essai, est repris tel quel
+    """
+    from django.core.files.storage import default_storage
+    from .rapports import enregistrer_rapport_pdf
+
+    if periode and not fichier:
+        debut, fin = (date.fromisoformat(jour) for jour in periode)
+        fichier, _ = enregistrer_rapport_pdf(debut, fin)
+
+    pdf = None
+    if fichier:
+        with default_storage.open(fichier, 'rb') as contenu:
+            pdf = contenu.read()
+
+    restants = list(destinataires)
     try:
-        email = EmailMessage(
-            subject=subject,
-            body=body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[to_email],
+        with get_connection(fail_silently=False) as connexion:
+            while restants:
+                email = EmailMessage(
+                    subject=sujet,
+                    body=corps,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[restants[0]],
+                    connection=connexion,
+                )
+                if pdf is not None:
+                    email.attach('rapport_ventes.pdf', pdf, 'application/pdf')
+                email.send()
+                restants.pop(0)
+    except (SMTPException, OSError) as e:
+        delai = get_exponential_backoff_interval(
+            factor=EMAIL_RELANCE_BASE,
+            retries=self.request.retries,
+            maximum=EMAIL_RELANCE_MAX_DELAI,
+            full_jitter=True,
         )
-        email.send(fail_silently=False)
-        
-        return f"✅ Rapport quotidien envoyé avec succès à {to_email}"
-        
-    except Exception as e:
-        return f"❌ Erreur lors de l'envoi : {str(e)}"
+        logger.warning(
+            "Envoi du rapport échoué (%s), nouvel essai dans %s s pour %s",
+            e, delai, ', '.join(restants)
+        )
+        raise self.retry(args=[sujet, corps, restants, None, fichier], exc=e, countdown=delai)
+
+    return f"✅ Rapport envoyé à {', '.join(destinataires)}"
 
 
 @shared_task
@@ -156,12 +347,16 @@ def test_email():
     from django.core.mail import send_mail
     from django.conf import settings
     
+    destinataires = destinataires_rapport()
+    if not destinataires:
+        return "❌ Aucune adresse email configurée (REPORT_EMAIL_TO)"
+    
     try:
         send_mail(
             subject='🧪 Test Email - Restaurant Manager',
             message='Ceci est un email de test. Si vous recevez ce message, la configuration email fonctionne !',
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.REPORT_EMAIL_TO],
+            recipient_list=destinataires,
             fail_silently=False,
         )
         return "✅ Email de test envoyé avec succès"
@@ -6,7 +6,11 @@ app_name = 'dashboard'
 urlpatterns = [
     path('', views.index, name='index'),
     path('analytics/', views.analytics_dashboard, name='analytics'),
+    path('analytics/affluence/', views.affluence_json, name='affluence'),
     path('export/excel/', views.export_excel, name='export_excel'),
+    path('export/csv/<str:jeu>/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
+    path('rapports/<int:rapport_id>/', views.rapport_statut, name='rapport_statut'),
+    path('rapports/<int:rapport_id>/telecharger/', views.rapport_telecharger, name='rapport_telecharger'),
     path('rapport/email/', views.send_sales_report_email, name='send_sales_report_email'),
 ]
\ No newline at end of file
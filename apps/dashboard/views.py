@@ -1,24 +1,17 @@
 # apps/dashboard/views.py
 
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Avg, Q, F
 from django.utils import timezone
-from django.http import HttpResponse
-from django.core.mail import EmailMessage
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib import messages
 
 from datetime import timedelta, datetime
 from decimal import Decimal
-import csv
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.enums import TA_LEFT
 
 from apps.accounts.models import User
 from apps.menu.models import Plat
@@ -26,6 +19,15 @@ from apps.commandes.models import Commande, CommandeItem
 from apps.paiements.models import Paiement, Caisse, Depense
 from apps.restaurant.models import TableRestaurant
 from apps.accounts.decorators import admin_required
+from .models import DailySalesSummary, RapportGenere
+from .tasks import destinataires_rapport, envoyer_rapport_email
+from restaurant.celery import planifier_tache
+from .statistiques import (
+    ANALYTICS_CACHE_TTL, carte_affluence, cle_cache_analytics, evolution_ventes, statistiques_plats
+)
+from .exports import (
+    JEUX_CSV, lire_periode, generer_csv, compresser_gzip, generer_classeur_xlsx
+)
 
 @login_required
 def index(request):
@@ -65,7 +67,8 @@ def index(request):
                 'description': 'Historique des commandes',
                 'status': 'Disponible',
                 'url': '/commandes/mes-commandes/',
-                'badge': 'Actif'
+                # Statut lu sur la ligne de la table (TableRestaurant)
+                'badge': dict(TableRestaurant.STATUT_CHOICES)[TableRestaurant.statut_pour(user)]
             },
         ]
     
@@ -99,6 +102,14 @@ def index(request):
     
     elif user.is_cuisinier():
         context['features'] = [
+            {
+                'icon': '🔥',
+                'title': 'Écran cuisine',
+                'description': 'Plats à préparer, regroupés',
+                'status': 'Disponible',
+                'url': '/commandes/cuisine/',
+                'badge': 'Actif'
+            },
             {
                 'icon': '🍳',
                 'title': 'Gérer les plats',
@@ -270,9 +281,33 @@ def analytics_dashboard(request):
     """
     Dashboard Analytics avancé
     Accessible uniquement par les administrateurs
+
+    Le contexte calculé est mis en cache sous la version courante des
+    statistiques (changée à chaque paiement, dépense, commande ou plat
+    modifié) : les rechargements sans nouvelle activité ne relancent
+    aucune agrégation
     """
-    # Période de temps
-    aujourd_hui = timezone.now().date()
+    # Période de temps (journée locale, comme les résumés journaliers)
+    aujourd_hui = timezone.localdate()
+    
+    # ===== ÉVOLUTION DES COMMANDES (?from=&to=, 7 derniers jours par défaut) =====
+    try:
+        debut_evolution, fin_evolution = lire_periode(request, 'from', 'to', jours=6)
+    except ValueError:
+        messages.error(request, "Période d'évolution invalide : affichage des 7 derniers jours.")
+        debut_evolution, fin_evolution = aujourd_hui - timedelta(days=6), aujourd_hui
+    
+    cle = cle_cache_analytics(aujourd_hui, debut_evolution, fin_evolution)
+    context = cache.get(cle)
+    if context is None:
+        context = _contexte_analytics(aujourd_hui, debut_evolution, fin_evolution)
+        cache.set(cle, context, ANALYTICS_CACHE_TTL)
+    
+    return render(request, 'dashboard/analytics.html', context)
+
+
+def _contexte_analytics(aujourd_hui, debut_evolution, fin_evolution):
+    """Calcule les statistiques affichées par le dashboard analytics"""
     debut_mois = aujourd_hui.replace(day=1)
     debut_semaine = aujourd_hui - timedelta(days=aujourd_hui.weekday())
     
@@ -285,43 +320,55 @@ def analytics_dashboard(request):
         'plats_disponibles': Plat.objects.filter(disponible=True).count(),
     }
     
+    # ===== RÉSUMÉS JOURNALIERS (une requête, quel que soit l'historique) =====
+    filtre_semaine = Q(jour__gte=debut_semaine)
+    filtre_mois = Q(jour__gte=debut_mois)
+    filtre_jour = Q(jour=aujourd_hui)
+    
+    totaux = DailySalesSummary.objects.aggregate(
+        commandes=Sum('commandes_total'),
+        commandes_jour=Sum('commandes_total', filter=filtre_jour),
+        commandes_semaine=Sum('commandes_total', filter=filtre_semaine),
+        commandes_mois=Sum('commandes_total', filter=filtre_mois),
+        en_attente=Sum('commandes_en_attente'),
+        servies=Sum('commandes_servies'),
+        payees=Sum('commandes_payees'),
+        revenus_total=Sum('revenus'),
+        revenus_mois=Sum('revenus', filter=filtre_mois),
+        revenus_semaine=Sum('revenus', filter=filtre_semaine),
+        revenus_jour=Sum('revenus', filter=filtre_jour),
+        depenses_total=Sum('depenses'),
+        depenses_mois=Sum('depenses', filter=filtre_mois),
+        depenses_semaine=Sum('depenses', filter=filtre_semaine),
+        depenses_jour=Sum('depenses', filter=filtre_jour),
+    )
+    for cle, valeur in totaux.items():
+        if valeur is None:
+            totaux[cle] = Decimal('0.00') if cle.startswith(('revenus', 'depenses')) else 0
+    
     # ===== COMMANDES =====
     commandes_stats = {
-        'total': Commande.objects.count(),
-        'aujourd_hui': Commande.objects.filter(date_commande__date=aujourd_hui).count(),
-        'cette_semaine': Commande.objects.filter(date_commande__date__gte=debut_semaine).count(),
-        'ce_mois': Commande.objects.filter(date_commande__date__gte=debut_mois).count(),
-        'en_attente': Commande.objects.filter(statut='en_attente').count(),
-        'servies': Commande.objects.filter(statut='servie').count(),
-        'payees': Commande.objects.filter(statut='payee').count(),
+        'total': totaux['commandes'],
+        'aujourd_hui': totaux['commandes_jour'],
+        'cette_semaine': totaux['commandes_semaine'],
+        'ce_mois': totaux['commandes_mois'],
+        'en_attente': totaux['en_attente'],
+        'servies': totaux['servies'],
+        'payees': totaux['payees'],
     }
     
     # ===== FINANCES =====
     caisse = Caisse.get_instance()
     
-    # Revenus (paiements)
-    revenus_total = Paiement.objects.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    revenus_mois = Paiement.objects.filter(
-        date_paiement__date__gte=debut_mois
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    revenus_semaine = Paiement.objects.filter(
-        date_paiement__date__gte=debut_semaine
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    revenus_jour = Paiement.objects.filter(
-        date_paiement__date=aujourd_hui
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
+    revenus_total = totaux['revenus_total']
+    revenus_mois = totaux['revenus_mois']
+    revenus_semaine = totaux['revenus_semaine']
+    revenus_jour = totaux['revenus_jour']
     
-    # Dépenses
-    depenses_total = Depense.objects.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    depenses_mois = Depense.objects.filter(
-        date_depense__gte=debut_mois
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    depenses_semaine = Depense.objects.filter(
-        date_depense__gte=debut_semaine
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    depenses_jour = Depense.objects.filter(
-        date_depense=aujourd_hui
-    ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
+    depenses_total = totaux['depenses_total']
+    depenses_mois = totaux['depenses_mois']
+    depenses_semaine = totaux['depenses_semaine']
+    depenses_jour = totaux['depenses_jour']
     
     finances_stats = {
         'solde_caisse': caisse.solde_actuel,
@@ -345,62 +392,44 @@ def analytics_dashboard(request):
         }
     }
     
-    # ===== TOP PLATS =====
-    top_plats = CommandeItem.objects.values(
-        'plat__nom', 'plat__prix_unitaire'
-    ).annotate(
-        quantite_totale=Sum('quantite'),
-        nombre_commandes=Count('commande', distinct=True),
-        revenu_total=Sum(F('quantite') * F('prix_unitaire'))
-    ).order_by('-quantite_totale')[:10]
+    # ===== TOP PLATS ET CATÉGORIES (une seule requête groupée par plat) =====
+    ventes_plats = statistiques_plats()
     
-    # ===== TOP TABLES =====
-    top_tables = Commande.objects.values(
-        'table__login'
-    ).annotate(
-        nombre_commandes=Count('id'),
-        montant_total=Sum('montant_total', filter=Q(statut='payee'))
-    ).order_by('-montant_total')[:10]
+    # ===== TOP TABLES (compteurs tenus à jour sur TableRestaurant) =====
+    top_tables = list(TableRestaurant.objects.filter(
+        nombre_commandes__gt=0
+    ).order_by('-montant_paye', '-nombre_commandes').values(
+        'nombre_commandes',
+        login=F('utilisateur__login'),
+        montant_total=F('montant_paye')
+    )[:10])
     
-    # ===== ÉVOLUTION DES COMMANDES (7 derniers jours) =====
-    evolution_commandes = []
-    for i in range(6, -1, -1):
-        jour = aujourd_hui - timedelta(days=i)
-        nb_commandes = Commande.objects.filter(date_commande__date=jour).count()
-        revenus = Paiement.objects.filter(
-            date_paiement__date=jour
-        ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-        
-        evolution_commandes.append({
-            'date': jour.strftime('%d/%m'),
-            'commandes': nb_commandes,
-            'revenus': float(revenus),
-        })
+    # ===== ÉVOLUTION DES COMMANDES =====
+    granularite, evolution_commandes = evolution_ventes(debut_evolution, fin_evolution)
+    evolution_max = max((periode['commandes'] for periode in evolution_commandes), default=0)
     
-    # ===== RÉPARTITION PAR CATÉGORIE =====
-    categories_stats = []
-    for code, label in Plat.CATEGORIE_CHOICES:
-        # Calculer la quantité totale vendue
-        quantite_totale = CommandeItem.objects.filter(
-            plat__categorie=code
-        ).aggregate(total=Sum('quantite'))['total'] or 0
-        
-        # Calculer le revenu total
-        revenu_total = CommandeItem.objects.filter(
-            plat__categorie=code
-        ).aggregate(
-            total=Sum(F('quantite') * F('prix_unitaire'))
-        )['total'] or Decimal('0.00')
-        
-        if quantite_totale > 0:
-            categories_stats.append({
-                'categorie': label,
-                'quantite': quantite_totale,
-                'revenu': float(revenu_total),
-            })
+    # ===== AFFLUENCE (heure x jour de la semaine, même période) =====
+    affluence = carte_affluence(debut_evolution, fin_evolution)
+    affluence_lignes = [
+        {
+            'jour': jour,
+            'cellules': [
+                {
+                    'heure': heure,
+                    'commandes': affluence['commandes'][j][heure],
+                    'revenus': affluence['revenus'][j][heure],
+                    # Opacité de la cellule (texte, pour ne pas être localisée)
+                    'intensite': f"{affluence['commandes'][j][heure] / affluence['max_commandes']:.2f}"
+                    if affluence['max_commandes'] else '0',
+                }
+                for heure in affluence['heures']
+            ],
+        }
+        for j, jour in enumerate(affluence['jours'])
+    ]
     
     # ===== TAUX DE CONVERSION =====
-    commandes_validees = Commande.objects.filter(statut='payee').count()
+    commandes_validees = commandes_stats['payees']
     taux_conversion = 0
     if commandes_stats['total'] > 0:
         taux_conversion = (commandes_validees / commandes_stats['total']) * 100
@@ -410,209 +439,171 @@ def analytics_dashboard(request):
     if commandes_validees > 0:
         panier_moyen = revenus_total / commandes_validees
     
-    context = {
+    return {
         'stats_generales': stats_generales,
         'commandes_stats': commandes_stats,
         'finances_stats': finances_stats,
-        'top_plats': top_plats,
+        'top_plats': ventes_plats['top_plats'],
         'top_tables': top_tables,
         'evolution_commandes': evolution_commandes,
-        'categories_stats': categories_stats,
+        'evolution_max': evolution_max,
+        'evolution_granularite': granularite,
+        'debut_evolution': debut_evolution,
+        'fin_evolution': fin_evolution,
+        'categories_stats': ventes_plats['categories'],
+        'affluence_lignes': affluence_lignes,
+        'affluence_heures': affluence['heures'],
+        'affluence_jours_non_resumes': affluence['jours_non_resumes'],
         'taux_conversion': round(taux_conversion, 2),
         'panier_moyen': panier_moyen,
         'aujourd_hui': aujourd_hui,
         'debut_semaine': debut_semaine,
         'debut_mois': debut_mois,
     }
-    
-    return render(request, 'dashboard/analytics.html', context)
 
 
 @login_required
 @admin_required
-def export_excel(request):
-    """Export simple des statistiques du dashboard au format CSV (compatible Excel)."""
-    aujourd_hui = timezone.now().date()
-    debut_mois = aujourd_hui.replace(day=1)
-    debut_semaine = aujourd_hui - timedelta(days=aujourd_hui.weekday())
+def affluence_json(request):
+    """
+    Carte d'affluence en JSON : commandes et revenus par heure (0-23) et
+    jour de la semaine (lundi = 0), ?from=AAAA-MM-JJ&to=AAAA-MM-JJ
+    (30 derniers jours par défaut)
+    """
+    try:
+        debut, fin = lire_periode(request, 'from', 'to')
+    except ValueError as e:
+        return JsonResponse({'erreur': str(e)}, status=400)
 
-    # Statistiques de base proches de celles du dashboard
-    total_commandes = Commande.objects.count()
-    commandes_payees = Commande.objects.filter(statut='payee').count()
+    return JsonResponse({
+        'debut': debut.isoformat(),
+        'fin': fin.isoformat(),
+        **carte_affluence(debut, fin),
+    })
 
-    revenus_total = Paiement.objects.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    depenses_total = Depense.objects.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    benefice_total = revenus_total - depenses_total
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="dashboard_analytics.csv"'
+@login_required
+@admin_required
+def export_excel(request):
+    """
+    Classeur Excel de la période (?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ, 30 jours par défaut)
+    Feuilles : résumé par jour, paiements, dépenses, commandes, top plats
+    """
+    try:
+        debut, fin = lire_periode(request)
+    except ValueError:
+        messages.error(request, "Période invalide : utilisez le format AAAA-MM-JJ.")
+        return redirect('dashboard:analytics')
+
+    fichier = generer_classeur_xlsx(debut, fin)
+
+    # FileResponse envoie le fichier temporaire par blocs puis le ferme
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=f"rapport_restaurant_{debut:%Y%m%d}_{fin:%Y%m%d}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
 
-    writer = csv.writer(response)
-    writer.writerow(['Période', 'Total commandes', 'Commandes payées', 'Revenus (GNF)', 'Dépenses (GNF)', 'Bénéfice (GNF)'])
-    writer.writerow([
-        f"Du {debut_mois.strftime('%d/%m/%Y')} au {aujourd_hui.strftime('%d/%m/%Y')}",
-        total_commandes,
-        commandes_payees,
-        int(revenus_total),
-        int(depenses_total),
-        int(benefice_total),
-    ])
+@login_required
+@admin_required
+def export_csv(request, jeu):
+    """
+    Export brut (paiements, commandes ou lignes) sur une période, en flux
+    ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ ; ?gzip=1 pour un fichier compressé
+    """
+    if jeu not in JEUX_CSV:
+        messages.error(request, "Export inconnu.")
+        return redirect('dashboard:analytics')
+
+    try:
+        debut, fin = lire_periode(request)
+    except ValueError:
+        messages.error(request, "Période invalide : utilisez le format AAAA-MM-JJ.")
+        return redirect('dashboard:analytics')
+
+    nom_fichier = f"{jeu}_{debut:%Y%m%d}_{fin:%Y%m%d}.csv"
+    morceaux = generer_csv(jeu, debut, fin)
+
+    if request.GET.get('gzip') == '1':
+        response = StreamingHttpResponse(compresser_gzip(morceaux), content_type='application/gzip')
+        nom_fichier += '.gz'
+    else:
+        response = StreamingHttpResponse(morceaux, content_type='text/csv; charset=utf-8')
 
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
     return response
 
 
 @login_required
 @admin_required
 def export_pdf(request):
-    """Génère un rapport PDF structuré des ventes et le renvoie en téléchargement."""
-
-    maintenant = timezone.now()
-    aujourd_hui = maintenant.date()
-    debut_periode = aujourd_hui - timedelta(days=30)
-
-    pdf = _build_sales_report_pdf(debut_periode, aujourd_hui, maintenant)
+    """
+    Lance la génération du rapport PDF des ventes en tâche de fond
+    (?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ, 30 jours par défaut ; ?par_jour=1
+    pour des sous-totaux par journée) et redirige
+    vers la page de suivi, qui affiche le lien de téléchargement une fois prêt
+    """
+    try:
+        debut, fin = lire_periode(request)
+    except ValueError:
+        messages.error(request, "Période invalide : utilisez le format AAAA-MM-JJ.")
+        return redirect('dashboard:analytics')
+
+    rapport, cree = RapportGenere.obtenir_ou_lancer(
+        debut, fin,
+        sous_totaux_par_jour=request.GET.get('par_jour') == '1',
+        demande_par=request.user
+    )
+    if not cree:
+        messages.info(request, "Un rapport pour cette période est déjà en cours de génération.")
 
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="rapport_ventes.pdf"'
-    return response
+    return redirect('dashboard:rapport_statut', rapport_id=rapport.id)
 
 
-def _build_sales_report_pdf(debut_periode, aujourd_hui, maintenant):
-    """Construit le PDF de rapport de ventes pour une période donnée et renvoie les bytes."""
+@login_required
+@admin_required
+def rapport_statut(request, rapport_id):
+    """Suivi d'un rapport PDF (la page interroge ?format=json jusqu'à ce qu'il soit prêt)"""
+    rapport = get_object_or_404(RapportGenere, id=rapport_id)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'statut': rapport.statut,
+            'statut_display': rapport.get_statut_display(),
+            'termine': rapport.est_termine,
+            'url': reverse('dashboard:rapport_telecharger', args=[rapport.id]) if rapport.statut == 'pret' else None,
+            'erreur': rapport.erreur,
+        })
 
-    # Paiements et dépenses sur la période
-    paiements_qs = Paiement.objects.filter(date_paiement__date__gte=debut_periode)
-    total_ventes = paiements_qs.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
-    nombre_commandes = paiements_qs.count()
+    return render(request, 'dashboard/rapport_statut.html', {'rapport': rapport})
 
-    depenses_qs = Depense.objects.filter(date_depense__gte=debut_periode)
-    total_depenses = depenses_qs.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
 
-    panier_moyen = Decimal('0.00')
-    if nombre_commandes > 0:
-        panier_moyen = total_ventes / nombre_commandes
-
-    benefice_net = total_ventes - total_depenses
-
-    # Préparation du buffer et du document
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=40,
-        rightMargin=40,
-        topMargin=40,
-        bottomMargin=40,
+@login_required
+@admin_required
+def rapport_telecharger(request, rapport_id):
+    """Téléchargement d'un rapport PDF prêt"""
+    rapport = get_object_or_404(RapportGenere, id=rapport_id, statut='pret')
+
+    return FileResponse(
+        rapport.fichier.open('rb'),
+        as_attachment=True,
+        filename=f"rapport_ventes_{rapport.debut:%Y%m%d}_{rapport.fin:%Y%m%d}.pdf",
+        content_type='application/pdf'
     )
 
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    title_style.alignment = TA_LEFT
-    normal = styles['Normal']
-    heading = styles['Heading2']
-
-    elements = []
-
-    # Titre principal
-    elements.append(Paragraph('<font color="#2563eb">RAPPORT DES VENTES</font>', title_style))
-    elements.append(Spacer(1, 12))
-
-    # Infos de période et date de génération
-    periode_txt = f"Période: {debut_periode.strftime('%d/%m/%Y')} - {aujourd_hui.strftime('%d/%m/%Y')}"
-    genere_txt = f"Généré le: {maintenant.strftime('%d/%m/%Y à %H:%M')}"
-    elements.append(Paragraph(periode_txt, normal))
-    elements.append(Paragraph(genere_txt, normal))
-    elements.append(Spacer(1, 24))
-
-    # Section RÉSUMÉ
-    elements.append(Paragraph('<b>RÉSUMÉ</b>', heading))
-    elements.append(Spacer(1, 8))
-
-    resume_data = [
-        ['Indicateur', 'Valeur'],
-        ['Total des ventes', f"{total_ventes:.2f} GNF"],
-        ['Nombre de commandes', str(nombre_commandes)],
-        ['Panier moyen', f"{panier_moyen:.2f} GNF"],
-        ['Total des dépenses', f"{total_depenses:.2f} GNF"],
-        ['Bénéfice net', f"{benefice_net:.2f} GNF"],
-    ]
-
-    resume_table = Table(resume_data, colWidths=[220, 220])
-    resume_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-
-    elements.append(resume_table)
-    elements.append(Spacer(1, 24))
-
-    # Section DÉTAIL DES PAIEMENTS
-    elements.append(Paragraph('<b>DÉTAIL DES PAIEMENTS</b>', heading))
-    elements.append(Spacer(1, 8))
-
-    paiements_liste = paiements_qs.select_related('commande__table').order_by('-date_paiement')
-
-    detail_data = [['Date', 'Commande', 'Table', 'Montant', 'Mode']]
-    for p in paiements_liste:
-        code_commande = f"CMD-{p.date_paiement.strftime('%Y%m%d')}-{p.commande.id:04d}"
-        table_nom = getattr(p.commande.table, 'login', str(p.commande.table_id))
-        montant_str = f"{float(p.montant):.2f} GNF"
-        mode = 'Espèces'
-        detail_data.append([
-            p.date_paiement.strftime('%d/%m/%Y'),
-            code_commande,
-            table_nom,
-            montant_str,
-            mode,
-        ])
-
-    if len(detail_data) == 1:
-        elements.append(Paragraph("Aucun paiement sur la période.", normal))
-    else:
-        detail_table = Table(detail_data, colWidths=[70, 130, 100, 90, 70])
-        detail_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16a34a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(detail_table)
-
-    # Construction du PDF
-    doc.build(elements)
-
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
-
 
 @login_required
 @admin_required
 def send_sales_report_email(request):
-    """Génère le rapport de ventes et l'envoie par email à l'adresse configurée."""
-
-    maintenant = timezone.now()
-    aujourd_hui = maintenant.date()
+    """
+    Planifie l'envoi du rapport de ventes (PDF joint) aux adresses configurées
+    La génération et l'envoi SMTP se font dans la tâche Celery
+    """
+    aujourd_hui = timezone.localdate()
     debut_periode = aujourd_hui - timedelta(days=30)
 
-    pdf = _build_sales_report_pdf(debut_periode, aujourd_hui, maintenant)
-
     subject = "Rapport des ventes - Dashboard Restaurant"
     body = (
         "Bonjour,\n\n"
@@ -621,14 +612,13 @@ def send_sales_report_email(request):
         "Ceci est un envoi automatique depuis le Dashboard Analytics.\n"
     )
 
-    to_email = getattr(settings, 'REPORT_EMAIL_TO', None)
-    if not to_email:
+    destinataires = destinataires_rapport()
+    if not destinataires:
         messages.error(request, "Aucune adresse email de destination n'est configurée (REPORT_EMAIL_TO).")
         return redirect('dashboard:index')
 
-    email = EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [to_email])
-    email.attach('rapport_ventes.pdf', pdf, 'application/pdf')
-    email.send(fail_silently=False)
+    periode = [debut_periode.isoformat(), aujourd_hui.isoformat()]
+    planifier_tache(envoyer_rapport_email, args=[subject, body, destinataires, periode])
 
-    messages.success(request, f"Rapport envoyé avec succès à {to_email}.")
-    return redirect('dashboard:index')
\ No newline at end of file
+    messages.success(request, f"Rapport en cours d'envoi à {', '.join(destinataires)}.")
+    return redirect('dashboard:index')
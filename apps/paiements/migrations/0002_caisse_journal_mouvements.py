@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0001_initial'),
+    ]
+
+    operations = [
+        # Le solde existant devient le premier point de contrôle
+        migrations.RenameField(
+            model_name='caisse',
+            old_name='solde_actuel',
+            new_name='solde_consolide',
+        ),
+        migrations.AlterField(
+            model_name='caisse',
+            name='solde_consolide',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Solde consolidé'),
+        ),
+        migrations.AddField(
+            model_name='caisse',
+            name='dernier_mouvement_id',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Dernier mouvement consolidé'),
+        ),
+        migrations.CreateModel(
+            name='MouvementCaisse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_mouvement', models.CharField(choices=[('entree', 'Entrée'), ('sortie', 'Sortie')], max_length=10, verbose_name='Type')),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant')),
+                ('libelle', models.CharField(blank=True, max_length=255, verbose_name='Libellé')),
+                ('date_mouvement', models.DateTimeField(auto_now_add=True, verbose_name='Date du mouvement')),
+                ('depense', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvement_caisse', to='paiements.depense', verbose_name='Dépense')),
+                ('paiement', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvement_caisse', to='paiements.paiement', verbose_name='Paiement')),
+            ],
+            options={
+                'verbose_name': 'Mouvement de caisse',
+                'verbose_name_plural': 'Mouvements de caisse',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
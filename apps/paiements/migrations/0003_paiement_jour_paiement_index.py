@@ -0,0 +1,43 @@
+from zoneinfo import ZoneInfo
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def remplir_jour_paiement(apps, schema_editor):
+    """Journée locale (Africa/Conakry) des paiements existants, en un seul UPDATE"""
+    Paiement = apps.get_model('paiements', 'Paiement')
+    Paiement.objects.update(
+        jour_paiement=TruncDate('date_paiement', tzinfo=ZoneInfo('Africa/Conakry'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0002_caisse_journal_mouvements'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paiement',
+            name='date_paiement',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Date de paiement'),
+        ),
+        migrations.AddField(
+            model_name='paiement',
+            name='jour_paiement',
+            field=models.DateField(editable=False, null=True, verbose_name='Jour du paiement'),
+        ),
+        migrations.RunPython(remplir_jour_paiement, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='paiement',
+            name='jour_paiement',
+            field=models.DateField(editable=False, verbose_name='Jour du paiement'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['jour_paiement'], name='paiement_jour_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+def marquer_consolides(apps, schema_editor):
+    """Mouvements déjà inclus dans le solde consolidé (jusqu'au point de contrôle)"""
+    Caisse = apps.get_model('paiements', 'Caisse')
+    MouvementCaisse = apps.get_model('paiements', 'MouvementCaisse')
+
+    caisse = Caisse.objects.filter(pk=1).first()
+    if caisse is not None:
+        MouvementCaisse.objects.filter(
+            id__lte=caisse.dernier_mouvement_id
+        ).update(consolide=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0003_paiement_jour_paiement_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mouvementcaisse',
+            name='consolide',
+            field=models.BooleanField(default=False, verbose_name='Consolidé'),
+        ),
+        migrations.RunPython(marquer_consolides, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='caisse',
+            name='dernier_mouvement_id',
+        ),
+        migrations.AddIndex(
+            model_name='mouvementcaisse',
+            index=models.Index(condition=models.Q(('consolide', False)), fields=['id'], name='mouvement_non_consolide_idx'),
+        ),
+    ]
@@ -1,9 +1,14 @@
 # apps/paiements/models.py
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
 from decimal import Decimal
 from django.db import transaction
 
+from restaurant.periodes import jour_local
+
 class Paiement(models.Model):
     """
     Enregistrement d'un paiement
@@ -23,27 +28,44 @@ class Paiement(models.Model):
         verbose_name="Montant"
     )
     
-    date_paiement = models.DateTimeField(auto_now_add=True, verbose_name="Date de paiement")
+    date_paiement = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Date de paiement")
+    
+    # Journée locale (Africa/Conakry) de date_paiement, indexée pour les filtres par jour
+    jour_paiement = models.DateField(editable=False, verbose_name="Jour du paiement")
     
     class Meta:
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
         ordering = ['-date_paiement']
+        indexes = [
+            models.Index(fields=['jour_paiement'], name='paiement_jour_idx'),
+        ]
     
     def __str__(self):
         return f"Paiement #{self.pk} - {self.montant} GNF - {self.date_paiement}"
+    
+    def save(self, *args, **kwargs):
+        self.jour_paiement = jour_local(self.date_paiement)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'date_paiement' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'jour_paiement'}
+        super().save(*args, **kwargs)
 
 
 class Caisse(models.Model):
     """
     Caisse du restaurant
     Il ne doit y avoir qu'une seule instance de ce modèle
+
+    Le solde n'est plus modifié à chaque paiement : les entrées et sorties
+    sont ajoutées au journal MouvementCaisse, et le solde courant vaut
+    solde_consolide + somme des mouvements pas encore consolidés
     """
-    solde_actuel = models.DecimalField(
+    solde_consolide = models.DecimalField(
         max_digits=12,
         decimal_places=2,
         default=Decimal('0.00'),
-        verbose_name="Solde actuel"
+        verbose_name="Solde consolidé"
     )
     
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -62,11 +84,134 @@ class Caisse(models.Model):
         caisse, created = cls.objects.get_or_create(pk=1)
         return caisse
     
+    @cached_property
+    def solde_actuel(self):
+        """Solde courant : solde consolidé + mouvements non encore consolidés"""
+        queue = MouvementCaisse.objects.filter(
+            consolide=False
+        ).aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
+        return self.solde_consolide + queue
+    
+    @classmethod
+    def consolider(cls):
+        """
+        Reporte les mouvements validés dans solde_consolide et les marque
+        consolidés (tâche périodique ou à la demande)
+        Chaque mouvement est repris par son propre drapeau, pas par un
+        point de contrôle sur les ids : un mouvement validé après un id
+        plus élevé est consolidé au passage suivant
+        Retourne le nombre de mouvements consolidés
+        """
+        with transaction.atomic():
+            cls.get_instance()
+            caisse = cls.objects.select_for_update().get(pk=1)
+            
+            # Liste figée : un mouvement validé pendant la consolidation
+            # reste compté dans la queue jusqu'au passage suivant
+            mouvements = list(
+                MouvementCaisse.objects.filter(consolide=False).values_list('id', 'montant')
+            )
+            if not mouvements:
+                return 0
+            
+            MouvementCaisse.objects.filter(
+                pk__in=[mouvement_id for mouvement_id, _ in mouvements]
+            ).update(consolide=True)
+            caisse.solde_consolide += sum(montant for _, montant in mouvements)
+            caisse.save(update_fields=['solde_consolide', 'date_modification'])
+        
+        return len(mouvements)
+    
     def peut_effectuer_depense(self, montant):
         """Vérifie si une dépense peut être effectuée"""
         return self.solde_actuel >= montant
 
 
+class MouvementCaisse(models.Model):
+    """
+    Journal de caisse en ajout seul : une ligne par entrée ou sortie
+    Les montants ne sont jamais modifiés ; le montant est signé
+    (positif pour un paiement, négatif pour une dépense).
+    Seul le drapeau consolide change, quand Caisse.consolider reporte la
+    ligne dans le solde consolidé
+    """
+    TYPE_CHOICES = [
+        ('entree', 'Entrée'),
+        ('sortie', 'Sortie'),
+    ]
+    
+    type_mouvement = models.CharField(
+        max_length=10,
+        choices=TYPE_CHOICES,
+        verbose_name="Type"
+    )
+    
+    montant = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Montant"
+    )
+    
+    paiement = models.OneToOneField(
+        Paiement,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvement_caisse',
+        verbose_name="Paiement"
+    )
+    
+    depense = models.OneToOneField(
+        'Depense',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvement_caisse',
+        verbose_name="Dépense"
+    )
+    
+    libelle = models.CharField(max_length=255, blank=True, verbose_name="Libellé")
+    date_mouvement = models.DateTimeField(auto_now_add=True, verbose_name="Date du mouvement")
+    
+    consolide = models.BooleanField(default=False, verbose_name="Consolidé")
+    
+    class Meta:
+        verbose_name = "Mouvement de caisse"
+        verbose_name_plural = "Mouvements de caisse"
+        ordering = ['-id']
+        indexes = [
+            # Queue lue à chaque Caisse.solde_actuel : seulement les lignes non consolidées
+            models.Index(
+                fields=['id'],
+                condition=Q(consolide=False),
+                name='mouvement_non_consolide_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_type_mouvement_display()} {self.montant} GNF - {self.date_mouvement}"
+    
+    @classmethod
+    def enregistrer_paiement(cls, paiement):
+        """Entrée en caisse correspondant à un paiement"""
+        return cls.objects.create(
+            type_mouvement='entree',
+            montant=paiement.montant,
+            paiement=paiement,
+            libelle=f"Paiement commande #{paiement.commande_id}"
+        )
+    
+    @classmethod
+    def enregistrer_depense(cls, depense):
+        """Sortie de caisse correspondant à une dépense"""
+        return cls.objects.create(
+            type_mouvement='sortie',
+            montant=-depense.montant,
+            depense=depense,
+            libelle=depense.motif[:255]
+        )
+
+
 class Depense(models.Model):
     """
     Dépense enregistrée par le comptable
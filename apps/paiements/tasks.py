@@ -0,0 +1,14 @@
+# apps/paiements/tasks.py
+
+from celery import shared_task
+from apps.paiements.models import Caisse
+
+
+@shared_task
+def consolider_caisse():
+    """
+    Reporte le journal de caisse dans le solde consolidé
+    Garde courte la somme calculée à chaque lecture de Caisse.solde_actuel
+    """
+    count = Caisse.consolider()
+    return f"{count} mouvement(s) consolidé(s)"
@@ -5,13 +5,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum
 from django.db import transaction
-from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from .models import Paiement, Caisse, Depense
+from .models import Paiement, Caisse, Depense, MouvementCaisse
 from apps.commandes.models import Commande
 from .forms import DepenseForm
+from restaurant.periodes import jour_local, sur_jours
 
 # ==========================================
 # DASHBOARD CAISSE (Comptable/Admin)
@@ -25,35 +25,31 @@ def caisse_dashboard(request):
     caisse = Caisse.get_instance()
     
     periode = request.GET.get('periode', 'aujourd_hui')
-    date_debut = None
-    date_fin = timezone.now()
+    aujourd_hui = jour_local()
+    jour_debut = aujourd_hui
     
     if periode == 'aujourd_hui':
-        date_debut = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
         titre_periode = "Aujourd'hui"
     elif periode == 'semaine':
-        date_debut = timezone.now() - timedelta(days=7)
+        jour_debut = aujourd_hui - timedelta(days=7)
         titre_periode = "Cette semaine"
     elif periode == 'mois':
-        date_debut = timezone.now() - timedelta(days=30)
+        jour_debut = aujourd_hui - timedelta(days=30)
         titre_periode = "Ce mois"
     elif periode == 'tout':
-        date_debut = None
+        jour_debut = None
         titre_periode = "Depuis le début"
     else:
-        date_debut = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
         titre_periode = "Aujourd'hui"
     
-    paiements_query = Paiement.objects.all()
-    if date_debut:
-        paiements_query = paiements_query.filter(date_paiement__gte=date_debut)
+    paiements_query = Paiement.objects.filter(**sur_jours('jour_paiement', jour_debut, aujourd_hui))
     
     total_paiements = paiements_query.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
     nombre_paiements = paiements_query.count()
     
     depenses_query = Depense.objects.all()
-    if date_debut:
-        depenses_query = depenses_query.filter(date_depense__gte=date_debut.date())
+    if jour_debut:
+        depenses_query = depenses_query.filter(**sur_jours('date_depense', jour_debut, aujourd_hui))
     
     total_depenses = depenses_query.aggregate(total=Sum('montant'))['total'] or Decimal('0.00')
     nombre_depenses = depenses_query.count()
@@ -96,15 +92,14 @@ def paiement_list(request):
     
     if date_debut:
         try:
-            date_debut = datetime.strptime(date_debut, '%Y-%m-%d')
-            paiements = paiements.filter(date_paiement__gte=date_debut)
+            date_debut = datetime.strptime(date_debut, '%Y-%m-%d').date()
+            paiements = paiements.filter(jour_paiement__gte=date_debut)
         except ValueError:
             pass
     if date_fin:
         try:
-            date_fin = datetime.strptime(date_fin, '%Y-%m-%d')
-            date_fin = date_fin.replace(hour=23, minute=59, second=59)
-            paiements = paiements.filter(date_paiement__lte=date_fin)
+            date_fin = datetime.strptime(date_fin, '%Y-%m-%d').date()
+            paiements = paiements.filter(jour_paiement__lte=date_fin)
         except ValueError:
             pass
     if table_filter:
@@ -195,12 +190,12 @@ def depense_create(request):
                     depense.enregistree_par = request.user
                     depense.save()
                     
-                    caisse.solde_actuel -= montant
-                    caisse.save()
+                    MouvementCaisse.enregistrer_depense(depense)
+                    nouveau_solde = caisse.solde_actuel - montant
                     
                     messages.success(
                         request,
-                        f"✅ Dépense enregistrée avec succès ! Nouveau solde : {caisse.solde_actuel} GNF"
+                        f"✅ Dépense enregistrée avec succès ! Nouveau solde : {nouveau_solde} GNF"
                     )
                     return redirect('paiements:depense_list')
             except Exception as e:
@@ -221,8 +216,7 @@ def depense_detail(request, depense_id):
         return redirect('dashboard:index')
     
     depense = get_object_or_404(Depense.objects.select_related('enregistree_par'), id=depense_id)
-    caisse = Caisse.objects.first()
-
+    caisse = Caisse.get_instance()
     
     context = {
         'depense': depense,
@@ -12,10 +12,12 @@ class TableRestaurantAdmin(admin.ModelAdmin):
         'nombre_places',
         'utilisateur_login',
         'utilisateur_actif',
+        'statut_courant',
         'date_creation',
     ]
     
     list_filter = [
+        'statut_courant',
         'nombre_places',
         'date_creation',
         'utilisateur__actif',
@@ -27,6 +29,13 @@ class TableRestaurantAdmin(admin.ModelAdmin):
     ]
     
     readonly_fields = [
+        'statut_courant',
+        'commande_active',
+        'nombre_commandes',
+        'commandes_en_attente',
+        'commandes_servies',
+        'commandes_payees',
+        'montant_paye',
         'date_creation',
         'date_modification',
     ]
@@ -38,6 +47,14 @@ class TableRestaurantAdmin(admin.ModelAdmin):
         ('Association', {
             'fields': ('utilisateur',)
         }),
+        ('Activité', {
+            'fields': (
+                ('statut_courant', 'commande_active'),
+                'nombre_commandes',
+                ('commandes_en_attente', 'commandes_servies', 'commandes_payees'),
+                'montant_paye',
+            )
+        }),
         ('Métadonnées', {
             'fields': ('date_creation', 'date_modification'),
             'classes': ('collapse',)
@@ -61,6 +78,13 @@ class TableRestaurantAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimisation des requêtes"""
         return super().get_queryset(request).select_related('utilisateur')
+    
+    def save_model(self, request, obj, form, change):
+        """Modification : champs du formulaire seulement (compteurs tenus par F())"""
+        if change:
+            obj.save(update_fields=[*form.changed_data, 'date_modification'])
+        else:
+            obj.save()
 
 
 
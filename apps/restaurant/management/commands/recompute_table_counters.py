@@ -0,0 +1,35 @@
+# apps/restaurant/management/commands/recompute_table_counters.py
+
+from django.core.management.base import BaseCommand
+
+from apps.restaurant.models import TableRestaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les compteurs de commandes des tables depuis leurs commandes "
+        "(après une suppression de commandes ou une écriture hors des transitions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'numeros',
+            nargs='*',
+            help="Numéros des tables à recalculer ; par défaut toutes les tables"
+        )
+
+    def handle(self, *args, **options):
+        tables = TableRestaurant.objects.all()
+        if options['numeros']:
+            tables = tables.filter(numero_table__in=options['numeros'])
+
+        total = corrigees = 0
+        for table in tables.iterator():
+            total += 1
+            if table.recalculer_compteurs():
+                corrigees += 1
+                self.stdout.write(self.style.WARNING(f"⚠️ {table} : compteurs corrigés"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} table(s) vérifiée(s), {corrigees} corrigée(s)"
+        ))
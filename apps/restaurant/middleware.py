@@ -4,71 +4,101 @@ from django.utils import timezone
 from django.contrib.auth import logout
 from django.shortcuts import redirect
 from django.contrib import messages
-from apps.restaurant.models import TableSession
+from apps.restaurant.models import TableRestaurant, TableSession
 
 
 class AutoLogoutTableMiddleware:
     """
-    Middleware qui déconnecte automatiquement les tables 
+    Middleware qui déconnecte automatiquement les tables
     1 minute après le paiement via le token de session
+
+    La session Django de la table porte un marqueur : la date de la
+    prochaine vérification en base (l'échéance, recopiée au paiement, ou
+    au plus tard TableSession.INTERVALLE_CONTROLE). Avant cette date, le
+    middleware ne fait aucune requête SQL.
     """
-    
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+
     def __call__(self, request):
-        # Nettoyer les sessions expirées (périodiquement)
-        TableSession.nettoyer_sessions_expirees()
-        
-        # Vérifier uniquement pour les utilisateurs connectés avec rôle Table
-        if request.user.is_authenticated and request.user.is_table():
-            
-            # Récupérer le token de session stocké
-            session_token = request.session.get('table_session_token')
-            
-            if session_token:
-                try:
-                    session_table = TableSession.objects.get(
-                        session_token=session_token,
-                        table=request.user
-                    )
-                    
-                    # Vérifier si la session doit expirer
-                    if session_table.doit_etre_expiree():
-                        # Vérifier qu'il n'y a pas de nouvelle commande en cours
-                        from apps.commandes.models import Commande
-                        
-                        a_commande_en_cours = Commande.objects.filter(
-                            table=request.user,
-                            statut__in=['en_attente', 'servie']
-                        ).exists()
-                        
-                        if not a_commande_en_cours:
-                            # Expirer la session
-                            session_table.expirer()
-                            
-                            # Déconnexion automatique
-                            messages.info(
-                                request,
-                                "⏱️ Votre session a expiré (1 minute après le paiement). "
-                                "Scannez à nouveau le QR Code pour une nouvelle commande."
-                            )
-                            logout(request)
-                            return redirect('accounts:login')
-                    
-                    # Session toujours active - vérifier si elle est marquée comme inactive
-                    elif not session_table.est_active:
-                        messages.info(
-                            request,
-                            "⏱️ Votre session a expiré. "
-                            "Scannez à nouveau le QR Code pour commander."
-                        )
-                        logout(request)
-                        return redirect('accounts:login')
-                
-                except TableSession.DoesNotExist:
-                    # Session invalide ou supprimée
-                    pass
-        
+        marqueur = request.session.get(TableSession.CLE_SESSION_ECHEANCE)
+
+        # Chemin rapide : prochaine vérification pas encore atteinte
+        if marqueur is None or self._controle_atteint(marqueur):
+            if request.user.is_authenticated and request.user.is_table():
+                response = self._verifier_expiration(request)
+                if response is not None:
+                    return response
+            elif marqueur is not None:
+                request.session.pop(TableSession.CLE_SESSION_ECHEANCE, None)
+
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+    @staticmethod
+    def _controle_atteint(marqueur):
+        """Vérifie le marqueur stocké en session (sans accès à la base)"""
+        if not marqueur.get('active', True):
+            return True
+
+        # Marqueur d'une version précédente : revérifier
+        timestamp = marqueur.get('controle')
+        return timestamp is None or timezone.now().timestamp() >= timestamp
+
+    def _verifier_expiration(self, request):
+        """
+        Échéance atteinte : confirme l'expiration en base
+        Retourne une redirection si la table doit être déconnectée
+        """
+        session_token = request.session.get('table_session_token')
+
+        session_table = None
+        if session_token:
+            session_table = TableSession.objects.filter(
+                session_token=session_token,
+                table=request.user
+            ).first()
+
+        if session_table is None:
+            # Pas de token ou session supprimée : rien à surveiller avant
+            # le prochain contrôle
+            request.session[TableSession.CLE_SESSION_ECHEANCE] = TableSession.donnees_controle()
+            return None
+
+        # Vérifier si la session doit expirer
+        if session_table.doit_etre_expiree():
+            # Vérifier qu'il n'y a pas de nouvelle commande en cours
+            if TableRestaurant.a_commande_active(request.user):
+                # Garder le marqueur : nouvelle vérification au prochain
+                # contrôle, qui verra la date du prochain paiement
+                request.session[TableSession.CLE_SESSION_ECHEANCE] = session_table.get_donnees_session()
+                return None
+
+            # Expirer la session
+            if session_table.est_active:
+                session_table.expirer()
+
+            # Déconnexion automatique
+            messages.info(
+                request,
+                "⏱️ Votre session a expiré (1 minute après le paiement). "
+                "Scannez à nouveau le QR Code pour une nouvelle commande."
+            )
+            logout(request)
+            return redirect('accounts:login')
+
+        # Session toujours active - vérifier si elle est marquée comme inactive
+        if not session_table.est_active:
+            messages.info(
+                request,
+                "⏱️ Votre session a expiré. "
+                "Scannez à nouveau le QR Code pour commander."
+            )
+            logout(request)
+            return redirect('accounts:login')
+
+        # Échéance pas encore atteinte en base (ou pas de paiement) :
+        # resynchroniser la session
+        request.session[TableSession.CLE_SESSION_ECHEANCE] = session_table.get_donnees_session()
+        return None
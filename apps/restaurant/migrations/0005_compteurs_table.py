@@ -0,0 +1,59 @@
+# Generated by Django 5.1 on 2026-10-18 06:03
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def remplir_compteurs(apps, schema_editor):
+    """Compteurs des tables existantes, calculés depuis leurs commandes"""
+    TableRestaurant = apps.get_model('restaurant', 'TableRestaurant')
+    Commande = apps.get_model('commandes', 'Commande')
+
+    for table in TableRestaurant.objects.all():
+        compteurs = Commande.objects.filter(table_id=table.utilisateur_id).aggregate(
+            nombre_commandes=Count('id'),
+            commandes_en_attente=Count('id', filter=Q(statut='en_attente')),
+            commandes_servies=Count('id', filter=Q(statut='servie')),
+            commandes_payees=Count('id', filter=Q(statut='payee')),
+            montant_paye=Sum('montant_total', filter=Q(statut='payee')),
+        )
+        compteurs['montant_paye'] = compteurs['montant_paye'] or Decimal('0.00')
+        TableRestaurant.objects.filter(pk=table.pk).update(**compteurs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0007_commande_jour_commande_index'),
+        ('restaurant', '0004_tablesession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='commandes_en_attente',
+            field=models.IntegerField(default=0, editable=False, verbose_name='En attente'),
+        ),
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='commandes_payees',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Payées'),
+        ),
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='commandes_servies',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Servies'),
+        ),
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='montant_paye',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Montant payé'),
+        ),
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='nombre_commandes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Commandes'),
+        ),
+        migrations.RunPython(remplir_compteurs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-18 06:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_statut_courant(apps, schema_editor):
+    """Statut et commande active des tables existantes : leur dernière commande non payée"""
+    TableRestaurant = apps.get_model('restaurant', 'TableRestaurant')
+    Commande = apps.get_model('commandes', 'Commande')
+
+    for table in TableRestaurant.objects.all():
+        commande = Commande.objects.filter(
+            table_id=table.utilisateur_id,
+            statut__in=['en_attente', 'servie']
+        ).order_by('-date_commande', '-id').values('id', 'statut').first()
+        if commande:
+            TableRestaurant.objects.filter(pk=table.pk).update(
+                statut_courant=commande['statut'],
+                commande_active_id=commande['id']
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0007_commande_jour_commande_index'),
+        ('restaurant', '0005_compteurs_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='commande_active',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='commandes.commande', verbose_name='Commande active'),
+        ),
+        migrations.AddField(
+            model_name='tablerestaurant',
+            name='statut_courant',
+            field=models.CharField(choices=[('libre', 'Libre'), ('en_attente', 'Commande en attente'), ('servie', 'Servie (attente paiement)')], default='libre', editable=False, max_length=20, verbose_name='Statut'),
+        ),
+        migrations.RunPython(remplir_statut_courant, migrations.RunPython.noop),
+    ]
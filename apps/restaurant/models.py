@@ -1,6 +1,10 @@
 # apps/restaurant/models.py
 
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator
 import uuid
@@ -34,6 +38,58 @@ class TableRestaurant(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     
+    # Compteurs de l'historique des commandes de la table, tenus à jour
+    # par F() dans la même transaction que la création et les transitions
+    # (commande recompute_table_counters pour corriger une dérive)
+    nombre_commandes = models.IntegerField(default=0, editable=False, verbose_name="Commandes")
+    commandes_en_attente = models.IntegerField(default=0, editable=False, verbose_name="En attente")
+    commandes_servies = models.IntegerField(default=0, editable=False, verbose_name="Servies")
+    commandes_payees = models.IntegerField(default=0, editable=False, verbose_name="Payées")
+    montant_paye = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Montant payé"
+    )
+    
+    # Statut courant de la table : celui de sa dernière commande non payée
+    STATUT_LIBRE = 'libre'
+    STATUT_CHOICES = [
+        (STATUT_LIBRE, 'Libre'),
+        ('en_attente', 'Commande en attente'),
+        ('servie', 'Servie (attente paiement)'),
+    ]
+    
+    # Statuts d'une commande qui occupe la table
+    STATUTS_ACTIFS = ['en_attente', 'servie']
+    
+    # Tenus à jour avec les compteurs (tâche reconcilier_statuts_tables en filet de sécurité)
+    statut_courant = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default=STATUT_LIBRE,
+        editable=False,
+        verbose_name="Statut"
+    )
+    
+    commande_active = models.ForeignKey(
+        'commandes.Commande',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name="Commande active"
+    )
+    
+    # Compteur de chaque statut de commande
+    COMPTEURS_STATUT = {
+        'en_attente': 'commandes_en_attente',
+        'servie': 'commandes_servies',
+        'payee': 'commandes_payees',
+    }
+    
     class Meta:
         verbose_name = "Table"
         verbose_name_plural = "Tables"
@@ -42,29 +98,226 @@ class TableRestaurant(models.Model):
     def __str__(self):
         return f"Table {self.numero_table}"
     
-    def get_current_status(self):
+    # Champs repris de l'historique de l'utilisateur associé
+    CHAMPS_SUIVIS = (
+        'nombre_commandes', 'commandes_en_attente', 'commandes_servies', 'commandes_payees',
+        'montant_paye', 'statut_courant', 'commande_active',
+    )
+    
+    # Utilisateur lu en base (voir from_db)
+    _utilisateur_charge = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._utilisateur_charge = instance.__dict__.get('utilisateur_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Table créée, ou réaffectée à un autre utilisateur : compteurs, statut
+        # et commande active repartent de l'historique de cet utilisateur
+        reprise = self.utilisateur_id and (
+            self._state.adding or self.utilisateur_id != self._utilisateur_charge
+        )
+        if not reprise:
+            super().save(*args, **kwargs)
+            return
+        
+        with transaction.atomic():
+            if not self._state.adding:
+                # Ligne verrouillée avant le calcul (voir recalculer_compteurs)
+                TableRestaurant.objects.select_for_update().filter(pk=self.pk).exists()
+            for champ, valeur in self.calculer_compteurs(self.utilisateur_id).items():
+                setattr(self, champ, valeur)
+            self.statut_courant, self.commande_active_id = self.calculer_statut(self.utilisateur_id)
+            
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *self.CHAMPS_SUIVIS}
+            super().save(*args, **kwargs)
+        
+        self._utilisateur_charge = self.utilisateur_id
+    
+    @classmethod
+    def _commandes_actives(cls, utilisateur_id):
+        """Commandes non payées d'un utilisateur table, la plus récente d'abord"""
+        from apps.commandes.models import Commande
+        
+        return Commande.objects.filter(
+            table_id=utilisateur_id,
+            statut__in=cls.STATUTS_ACTIFS
+        ).order_by('-date_commande', '-id')
+    
+    @classmethod
+    def suivre_commande(cls, commande, depuis=None):
         """
-        Retourne le statut actuel de la table
-        États: LIBRE, EN_ATTENTE, SERVIE, PAYEE
+        Répercute sur la table une commande créée (depuis=None) ou passée
+        du statut depuis à commande.statut, en un seul UPDATE :
+        - compteurs incrémentés par F() (montant ajouté au paiement)
+        - statut courant et commande active, si la commande est la plus récente
+        À appeler dans la transaction de la création ou de la transition
+        (sans effet si l'utilisateur n'a pas de table physique)
         """
-        from apps.commandes.models import Commande, StatutCommande
+        vers = commande.statut
+        champs = {cls.COMPTEURS_STATUT[vers]: F(cls.COMPTEURS_STATUT[vers]) + 1}
         
-        derniere_commande = self.commandes.filter(
-            statut__in=[StatutCommande.EN_ATTENTE, StatutCommande.SERVIE]
-        ).order_by('-date_commande').first()
+        if depuis is None:
+            champs['nombre_commandes'] = F('nombre_commandes') + 1
+            # La nouvelle commande est la plus récente de la table
+            champs['statut_courant'] = vers
+            champs['commande_active'] = commande.pk
+        else:
+            champs[cls.COMPTEURS_STATUT[depuis]] = F(cls.COMPTEURS_STATUT[depuis]) - 1
         
-        if not derniere_commande:
-            return 'LIBRE'
+        est_active = Q(commande_active_id=commande.pk)
+        if vers == 'payee':
+            champs['montant_paye'] = F('montant_paye') + commande.montant_total
+            # La table passe à sa commande non payée suivante, ou se libère
+            suivantes = cls._commandes_actives(commande.table_id).exclude(pk=commande.pk)
+            champs['commande_active'] = Case(
+                When(est_active, then=Subquery(suivantes.values('id')[:1])),
+                default=F('commande_active'),
+            )
+            champs['statut_courant'] = Case(
+                When(est_active, then=Coalesce(
+                    Subquery(suivantes.values('statut')[:1]), Value(cls.STATUT_LIBRE)
+                )),
+                default=F('statut_courant'),
+            )
+        elif depuis is not None:
+            champs['statut_courant'] = Case(
+                When(est_active, then=Value(vers)),
+                default=F('statut_courant'),
+            )
         
-        return derniere_commande.statut
+        return cls.objects.filter(utilisateur_id=commande.table_id).update(**champs)
     
-    def has_active_commande(self):
-        """Vérifie si la table a une commande active"""
-        from apps.commandes.models import Commande, StatutCommande
+    @staticmethod
+    def calculer_compteurs(utilisateur_id):
+        """Compteurs recalculés depuis les commandes de l'utilisateur (une requête)"""
+        from apps.commandes.models import Commande
+        
+        compteurs = Commande.objects.filter(table_id=utilisateur_id).aggregate(
+            nombre_commandes=Count('id'),
+            commandes_en_attente=Count('id', filter=Q(statut='en_attente')),
+            commandes_servies=Count('id', filter=Q(statut='servie')),
+            commandes_payees=Count('id', filter=Q(statut='payee')),
+            montant_paye=Sum('montant_total', filter=Q(statut='payee')),
+        )
+        compteurs['montant_paye'] = compteurs['montant_paye'] or Decimal('0.00')
+        return compteurs
+    
+    def get_compteurs(self):
+        """Compteurs enregistrés, sous la même forme que calculer_compteurs()"""
+        return {
+            'nombre_commandes': self.nombre_commandes,
+            'commandes_en_attente': self.commandes_en_attente,
+            'commandes_servies': self.commandes_servies,
+            'commandes_payees': self.commandes_payees,
+            'montant_paye': self.montant_paye,
+        }
+    
+    @classmethod
+    def compteurs_pour(cls, utilisateur):
+        """
+        Compteurs d'un utilisateur table : ceux de sa table physique,
+        ou recalculés s'il n'en a pas (aucune table ne les tient à jour)
+        """
+        try:
+            return utilisateur.table_restaurant.get_compteurs()
+        except cls.DoesNotExist:
+            return cls.calculer_compteurs(utilisateur.pk)
+    
+    def recalculer_compteurs(self):
+        """
+        Remet les compteurs en accord avec les commandes
+        La ligne est verrouillée avant le calcul : une transition concurrente
+        applique son incrément après l'écriture, sans être perdue
+        Retourne True si les compteurs avaient dérivé
+        """
+        with transaction.atomic():
+            TableRestaurant.objects.select_for_update().filter(pk=self.pk).exists()
+            compteurs = self.calculer_compteurs(self.utilisateur_id)
+            TableRestaurant.objects.filter(pk=self.pk).update(**compteurs)
+        
+        derive = compteurs != self.get_compteurs()
+        for champ, valeur in compteurs.items():
+            setattr(self, champ, valeur)
+        return derive
+    
+    @classmethod
+    def calculer_statut(cls, utilisateur_id):
+        """(statut, id de la commande active) recalculés depuis les commandes (une requête)"""
+        commande = cls._commandes_actives(utilisateur_id).values('id', 'statut').first()
+        if commande is None:
+            return cls.STATUT_LIBRE, None
+        return commande['statut'], commande['id']
+    
+    @classmethod
+    def reconcilier_statuts(cls):
+        """
+        Corrige les tables dont le statut ne correspond plus à leurs commandes
+        Le statut attendu de toutes les tables est lu en une requête ; chaque
+        correction est un compare-and-set sur la valeur lue, pour ne pas
+        écraser une transition survenue entre-temps
+        Retourne la liste des tables corrigées
+        """
+        actives = cls._commandes_actives(OuterRef('utilisateur_id'))
+        tables = cls.objects.annotate(
+            statut_attendu=Coalesce(
+                Subquery(actives.values('statut')[:1]), Value(cls.STATUT_LIBRE)
+            ),
+            commande_attendue=Subquery(actives.values('id')[:1]),
+        )
         
-        return self.commandes.filter(
-            statut__in=[StatutCommande.EN_ATTENTE, StatutCommande.SERVIE]
-        ).exists()
+        corrigees = []
+        for table in tables:
+            if (table.statut_courant, table.commande_active_id) == (
+                table.statut_attendu, table.commande_attendue
+            ):
+                continue
+            if cls.objects.filter(
+                pk=table.pk,
+                statut_courant=table.statut_courant,
+                commande_active_id=table.commande_active_id,
+            ).update(
+                statut_courant=table.statut_attendu,
+                commande_active_id=table.commande_attendue,
+            ):
+                corrigees.append(table)
+        return corrigees
+    
+    @classmethod
+    def a_commande_active(cls, utilisateur):
+        """
+        L'utilisateur table a-t-il une commande non payée ?
+        Lu sur sa table physique, ou sur ses commandes s'il n'en a pas
+        """
+        table = cls.objects.filter(utilisateur=utilisateur).only('commande_active').first()
+        if table is None:
+            return cls._commandes_actives(utilisateur.pk).exists()
+        return table.has_active_commande()
+    
+    @classmethod
+    def statut_pour(cls, utilisateur):
+        """
+        Statut courant d'un utilisateur table : celui de sa table physique,
+        ou recalculé depuis ses commandes s'il n'en a pas
+        """
+        table = cls.objects.filter(utilisateur=utilisateur).only('statut_courant').first()
+        if table is None:
+            return cls.calculer_statut(utilisateur.pk)[0]
+        return table.statut_courant
+    
+    def get_current_status(self):
+        """
+        Retourne le statut actuel de la table, lu sur la ligne
+        États : libre, en_attente, servie
+        """
+        return self.statut_courant
+    
+    def has_active_commande(self):
+        """Vérifie si la table a une commande non payée"""
+        return self.commande_active_id is not None
 
 
 # Token de connexion via QR Code
@@ -202,6 +455,17 @@ class TableSession(models.Model):
         verbose_name="Session active"
     )
     
+    # Délai entre le paiement et la déconnexion automatique
+    DELAI_EXPIRATION = timedelta(minutes=1)
+    
+    # Clé de la session Django dans laquelle l'échéance est recopiée
+    # (le middleware la lit sans interroger la base)
+    CLE_SESSION_ECHEANCE = 'table_session_echeance'
+    
+    # Intervalle maximal entre deux vérifications en base par le middleware :
+    # borne le retard si l'échéance n'a pas pu être recopiée dans la session
+    INTERVALLE_CONTROLE = timedelta(minutes=1)
+    
     class Meta:
         verbose_name = "Session de table"
         verbose_name_plural = "Sessions de tables"
@@ -218,6 +482,62 @@ class TableSession(models.Model):
         self.commande_payee = commande
         self.date_paiement = timezone.now()
         self.save()
+        self.propager_echeance()
+    
+    def get_echeance(self):
+        """
+        Retourne la date de déconnexion prévue (None si pas de paiement)
+        """
+        if not self.date_paiement:
+            return None
+        return self.date_paiement + self.DELAI_EXPIRATION
+    
+    @classmethod
+    def donnees_controle(cls, controle=None):
+        """
+        Marqueur recopié dans la session Django de la table
+        controle : date de la prochaine vérification en base (par défaut
+        dans INTERVALLE_CONTROLE), en timestamp pour rester sérialisable en JSON
+        """
+        if controle is None:
+            controle = timezone.now() + cls.INTERVALLE_CONTROLE
+        return {'controle': controle.timestamp(), 'active': True}
+    
+    def get_donnees_session(self):
+        """
+        Données recopiées dans la session Django de la table : prochaine
+        vérification à l'échéance si elle est à venir, sinon au plus tard
+        dans INTERVALLE_CONTROLE (échéance passée avec une nouvelle commande)
+        """
+        maintenant = timezone.now()
+        controle = maintenant + self.INTERVALLE_CONTROLE
+        echeance = self.get_echeance()
+        if echeance and maintenant < echeance < controle:
+            controle = echeance
+        
+        donnees = self.donnees_controle(controle)
+        donnees['active'] = self.est_active
+        return donnees
+    
+    def propager_echeance(self):
+        """
+        Écrit l'échéance dans la session Django de la table pour que le
+        middleware vérifie l'expiration dès l'échéance
+        Simple accélération : une requête concurrente de la table peut
+        écraser cette écriture, le middleware revérifie alors la base au
+        plus tard après INTERVALLE_CONTROLE
+        """
+        from importlib import import_module
+        
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore(session_key=self.django_session_key)
+        session[self.CLE_SESSION_ECHEANCE] = self.get_donnees_session()
+        
+        # La session Django n'existe plus (déconnexion, purge) : rien à faire
+        if session.session_key is None:
+            return
+        
+        session.save()
     
     def doit_etre_expiree(self):
         """
@@ -228,7 +548,7 @@ class TableSession(models.Model):
             return False
         
         temps_ecoule = timezone.now() - self.date_paiement
-        return temps_ecoule > timedelta(minutes=1)
+        return temps_ecoule > self.DELAI_EXPIRATION
     
     def expirer(self):
         """
@@ -246,8 +566,29 @@ class TableSession(models.Model):
         sessions_a_expirer = cls.objects.filter(
             est_active=True,
             date_paiement__isnull=False,
-            date_paiement__lt=timezone.now() - timedelta(minutes=1)
-        )
+            date_paiement__lt=timezone.now() - cls.DELAI_EXPIRATION
+        ).exclude(cls._filtre_commande_en_cours())
         
         count = sessions_a_expirer.update(est_active=False)
-        return count
\ No newline at end of file
+        return count
+    
+    @staticmethod
+    def _filtre_commande_en_cours():
+        """
+        Sessions dont la table a recommandé depuis le paiement : elles restent
+        actives (comme dans le middleware), le prochain paiement les marquera
+        """
+        return Exists(TableRestaurant._commandes_actives(OuterRef('table_id')))
+    
+    @classmethod
+    def expirer_sessions_echues(cls, session_ids):
+        """
+        Expire uniquement les sessions indiquées dont l'échéance est passée
+        Appelée à l'échéance exacte par la tâche planifiée au paiement
+        """
+        return cls.objects.filter(
+            pk__in=session_ids,
+            est_active=True,
+            date_paiement__isnull=False,
+            date_paiement__lte=timezone.now() - cls.DELAI_EXPIRATION
+        ).exclude(cls._filtre_commande_en_cours()).update(est_active=False)
\ No newline at end of file
@@ -1,13 +1,75 @@
 # apps/restaurant/tasks.py
 
+from datetime import timedelta
+
+import logging
+
 from celery import shared_task
-from apps.restaurant.models import TableSession
+from django.db import transaction
+from apps.restaurant.models import TableRestaurant, TableSession
+from restaurant.celery import planifier_tache
+from restaurant.verrous import tache_unique
+
+
+logger = logging.getLogger(__name__)
+
+# Tâches dépendant de l'heure : un appel qui suit une exécution terminée
+# relit les sessions et les tables au lieu de reprendre son résultat
+# (conservation=0, seul le verrou d'exécution est partagé)
+
 
 @shared_task
+@tache_unique(duree=5 * 60, conservation=0)
 def nettoyer_sessions_expirees():
     """
     Tâche Celery pour nettoyer les sessions expirées
-    À exécuter toutes les 30 secondes ou 1 minute
+    Filet de sécurité basse fréquence : l'expiration normale est
+    planifiée au paiement (voir programmer_expiration)
     """
     count = TableSession.nettoyer_sessions_expirees()
-    return f"{count} session(s) expirée(s)"
\ No newline at end of file
+    return f"{count} session(s) expirée(s)"
+
+
+@shared_task
+@tache_unique(duree=5 * 60, conservation=0)
+def expirer_sessions(session_ids):
+    """
+    Expire les sessions marquées lors d'un paiement, à leur échéance
+    """
+    count = TableSession.expirer_sessions_echues(session_ids)
+    return f"{count} session(s) expirée(s)"
+
+
+@shared_task
+@tache_unique(duree=5 * 60, conservation=0)
+def reconcilier_statuts_tables():
+    """
+    Filet de sécurité : remet le statut courant des tables en accord
+    avec leurs commandes (écriture hors des transitions, suppression...)
+    """
+    corrigees = TableRestaurant.reconcilier_statuts()
+    for table in corrigees:
+        logger.warning(
+            "%s : statut corrigé en %s (commande active %s)",
+            table, table.statut_attendu, table.commande_attendue
+        )
+    return f"{len(corrigees)} table(s) corrigée(s)"
+
+
+def programmer_expiration(sessions):
+    """
+    Planifie l'expiration ponctuelle des sessions qui viennent d'être
+    marquées via TableSession.marquer_payement
+    La tâche n'est envoyée qu'après le commit de la transaction
+    """
+    sessions = [session for session in sessions if session.date_paiement]
+    if not sessions:
+        return
+    
+    session_ids = [session.pk for session in sessions]
+    # Petite marge pour que le filtre "date_paiement <= now - délai" passe
+    echeance = max(session.get_echeance() for session in sessions) + timedelta(seconds=1)
+    
+    transaction.on_commit(
+        lambda: planifier_tache(expirer_sessions, args=[session_ids], eta=echeance)
+    )
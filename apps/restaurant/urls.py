@@ -38,4 +38,8 @@ urlpatterns = [
     # Actions sur les commandes
     path('commandes/<int:commande_id>/servie/', views.commande_marquer_servie, name='commande_marquer_servie'),
     path('commandes/<int:commande_id>/payee/', views.commande_marquer_payee, name='commande_marquer_payee'),
+    path('lignes/<int:ligne_id>/servie/', views.ligne_marquer_servie, name='ligne_marquer_servie'),
+    
+    # Flux temps réel (SSE) des commandes
+    path('commandes/flux/', views.flux_commandes, name='flux_commandes'),
 ]
\ No newline at end of file
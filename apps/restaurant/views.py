@@ -3,16 +3,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count
 from apps.accounts.models import User
-from apps.commandes.models import Commande
+from apps.commandes.models import Commande, CommandeItem
+from apps.commandes.evenements import get_broker
+from apps.commandes.transitions import servir_commande, servir_ligne, payer_commande
 from apps.accounts.decorators import admin_required
 from .models import TableRestaurant
 from .forms import TableRestaurantForm, TableSearchForm
-from decimal import Decimal
+import json
 import qrcode
 from io import BytesIO
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from .models import TableToken
 from django.utils import timezone
@@ -119,21 +122,19 @@ def table_detail_admin(request, pk):
         pk=pk
     )
     
-    # Statistiques de la table
-    commandes = Commande.objects.filter(table=table.utilisateur)
-    
+    # Statistiques de la table (compteurs lus avec la table)
     stats = {
-        'total_commandes': commandes.count(),
-        'commandes_en_attente': commandes.filter(statut='en_attente').count(),
-        'commandes_servies': commandes.filter(statut='servie').count(),
-        'commandes_payees': commandes.filter(statut='payee').count(),
-        'montant_total': commandes.filter(statut='payee').aggregate(
-            total=Sum('montant_total')
-        )['total'] or Decimal('0.00'),
+        'total_commandes': table.nombre_commandes,
+        'commandes_en_attente': table.commandes_en_attente,
+        'commandes_servies': table.commandes_servies,
+        'commandes_payees': table.commandes_payees,
+        'montant_total': table.montant_paye,
     }
     
     # Dernières commandes
-    dernieres_commandes = commandes.order_by('-date_commande')[:10]
+    dernieres_commandes = Commande.objects.filter(
+        table=table.utilisateur
+    ).order_by('-date_commande')[:10]
     
     context = {
         'table': table,
@@ -155,7 +156,10 @@ def table_update(request, pk):
     if request.method == 'POST':
         form = TableRestaurantForm(request.POST, instance=table)
         if form.is_valid():
-            table = form.save()
+            # Champs du formulaire seulement : les compteurs, tenus à jour
+            # par F() pendant le service, ne sont pas réécrits
+            table = form.save(commit=False)
+            table.save(update_fields=[*form.changed_data, 'date_modification'])
             messages.success(
                 request, 
                 f"✅ Table '{table.numero_table}' modifiée avec succès !"
@@ -202,7 +206,7 @@ def table_delete(request, pk):
         return redirect('restaurant:table_list_admin')
     
     # Vérifier les dépendances (commandes)
-    commandes_count = Commande.objects.filter(table=table.utilisateur).count()
+    commandes_count = table.nombre_commandes
     
     context = {
         'table': table,
@@ -228,39 +232,56 @@ def table_list_serveur(request):
         messages.error(request, "Accès refusé : fonctionnalité réservée aux serveurs")
         return redirect('dashboard:index')
     
-    # Récupérer toutes les tables (utilisateurs avec rôle Rtable)
-    tables = User.objects.filter(role='Rtable').prefetch_related('commandes')
+    # Une seule requête pour les tables physiques : statut, commande active
+    # et compteurs sont tenus à jour sur leur ligne
+    utilisateurs = User.objects.filter(role='Rtable').select_related(
+        'table_restaurant__commande_active'
+    ).order_by('login')
+    
+    # Filtrer par statut si demandé (en SQL pour les tables physiques)
+    statut_filter = request.GET.get('statut', '')
+    if statut_filter:
+        utilisateurs = utilisateurs.filter(
+            Q(table_restaurant__statut_courant=statut_filter) |
+            Q(table_restaurant__isnull=True)
+        )
     
-    # Calculer les statistiques pour chaque table
     tables_data = []
-    for table in tables:
-        # Dernière commande non payée
-        derniere_commande = table.commandes.filter(
-            statut__in=['en_attente', 'servie']
-        ).order_by('-date_commande').first()
+    sans_table = 0
+    for utilisateur in utilisateurs:
+        try:
+            table = utilisateur.table_restaurant
+        except TableRestaurant.DoesNotExist:
+            table = None
         
-        # Déterminer le statut
-        if not derniere_commande:
-            statut = 'libre'
-        elif derniere_commande.statut == 'en_attente':
-            statut = 'en_attente'
-        elif derniere_commande.statut == 'servie':
-            statut = 'servie'
+        if table is not None:
+            statut = table.statut_courant
+            derniere_commande = table.commande_active
+            compteurs = table.get_compteurs()
         else:
-            statut = 'libre'
+            # Utilisateur table sans table physique : rien n'est tenu à jour
+            # pour lui, statut et compteurs sont recalculés depuis ses commandes
+            sans_table += 1
+            statut, commande_id = TableRestaurant.calculer_statut(utilisateur.pk)
+            if statut_filter and statut != statut_filter:
+                continue
+            derniere_commande = Commande.objects.filter(pk=commande_id).first() if commande_id else None
+            compteurs = TableRestaurant.calculer_compteurs(utilisateur.pk)
         
         tables_data.append({
-            'table': table,
+            'table': utilisateur,
             'statut': statut,
             'derniere_commande': derniere_commande,
-            'total_commandes': table.commandes.count(),
-            'commandes_en_attente': table.commandes.filter(statut='en_attente').count(),
+            'total_commandes': compteurs['nombre_commandes'],
+            'commandes_en_attente': compteurs['commandes_en_attente'],
         })
     
-    # Filtrer par statut si demandé
-    statut_filter = request.GET.get('statut', '')
-    if statut_filter:
-        tables_data = [t for t in tables_data if t['statut'] == statut_filter]
+    if sans_table and request.user.is_admin():
+        messages.warning(
+            request,
+            f"⚠️ {sans_table} compte(s) table sans table physique : statut recalculé à chaque "
+            f"affichage. Créez leur table dans l'administration."
+        )
     
     # Statistiques globales
     stats = {
@@ -274,6 +295,7 @@ def table_list_serveur(request):
         'tables_data': tables_data,
         'stats': stats,
         'statut_filter': statut_filter,
+        'flux_actif': flux_disponible(request),
     }
     
     return render(request, 'restaurant/table_list_serveur.html', context)
@@ -288,7 +310,11 @@ def table_detail_serveur(request, table_id):
         messages.error(request, "Accès refusé")
         return redirect('dashboard:index')
     
-    table = get_object_or_404(User, id=table_id, role='Rtable')
+    table = get_object_or_404(
+        User.objects.select_related('table_restaurant'),
+        id=table_id,
+        role='Rtable'
+    )
     
     # Récupérer toutes les commandes de cette table
     commandes = table.commandes.select_related().prefetch_related('items__plat').order_by('-date_commande')
@@ -299,14 +325,13 @@ def table_detail_serveur(request, table_id):
         commandes = commandes.filter(statut=statut_filter)
     
     # Statistiques de la table
+    compteurs = TableRestaurant.compteurs_pour(table)
     stats = {
-        'total_commandes': table.commandes.count(),
-        'en_attente': table.commandes.filter(statut='en_attente').count(),
-        'servies': table.commandes.filter(statut='servie').count(),
-        'payees': table.commandes.filter(statut='payee').count(),
-        'montant_total': table.commandes.filter(statut='payee').aggregate(
-            total=Sum('montant_total')
-        )['total'] or Decimal('0.00'),
+        'total_commandes': compteurs['nombre_commandes'],
+        'en_attente': compteurs['commandes_en_attente'],
+        'servies': compteurs['commandes_servies'],
+        'payees': compteurs['commandes_payees'],
+        'montant_total': compteurs['montant_paye'],
     }
     
     context = {
@@ -328,7 +353,9 @@ def commande_list_serveur(request):
         messages.error(request, "Accès refusé")
         return redirect('dashboard:index')
     
-    commandes = Commande.objects.select_related('table').prefetch_related('items__plat').order_by('-date_commande')
+    commandes = Commande.objects.select_related('table').prefetch_related('items__plat').annotate(
+        lignes_pretes=Count('items', filter=Q(items__statut='prete'))
+    ).order_by('-date_commande')
     
     # Filtres
     statut_filter = request.GET.get('statut', '')
@@ -352,6 +379,7 @@ def commande_list_serveur(request):
         'stats': stats,
         'statut_filter': statut_filter,
         'table_filter': table_filter,
+        'flux_actif': flux_disponible(request),
     }
     
     return render(request, 'restaurant/commande_list_serveur.html', context)
@@ -389,15 +417,11 @@ def commande_marquer_servie(request, commande_id):
     
     commande = get_object_or_404(Commande, id=commande_id)
     
-    if commande.statut != 'en_attente':
+    # ✅ Transition atomique : un seul serveur peut servir la commande
+    if not servir_commande(commande, request.user):
         messages.warning(request, f"⚠️ La commande #{commande.id} n'est pas en attente")
         return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
     
-    # ✅ AJOUT : Tracer le serveur qui a servi
-    commande.serveur_ayant_servi = request.user
-    commande.statut = 'servie'
-    commande.save()
-    
     messages.success(
         request, 
         f"✅ Commande #{commande.id} marquée comme servie par {request.user.login}"
@@ -412,6 +436,31 @@ def commande_marquer_servie(request, commande_id):
 
 
 
+@login_required
+def ligne_marquer_servie(request, ligne_id):
+    """
+    Sert une ligne prête sans attendre le reste de la commande
+    La commande passe à "servie" avec sa dernière ligne
+    """
+    if not (request.user.is_serveur() or request.user.is_admin()):
+        messages.error(request, "Accès refusé")
+        return redirect('dashboard:index')
+    
+    ligne = get_object_or_404(CommandeItem.objects.select_related('plat'), id=ligne_id)
+    
+    # Transition atomique : la ligne doit être prête, un seul serveur la sert
+    if servir_ligne(ligne, request.user):
+        messages.success(request, f"✅ {ligne.plat.nom} x{ligne.quantite} servi")
+    else:
+        messages.warning(request, f"⚠️ {ligne.plat.nom} n'est pas prêt à être servi")
+    
+    next_url = request.GET.get('next')
+    if next_url:
+        return redirect(next_url)
+    
+    return redirect('restaurant:commande_detail_serveur', commande_id=ligne.commande_id)
+
+
 @login_required
 def commande_marquer_payee(request, commande_id):
     """
@@ -431,48 +480,18 @@ def commande_marquer_payee(request, commande_id):
         )
         return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
     
-    if hasattr(commande, 'paiement'):
-        messages.warning(request, f"⚠️ La commande #{commande.id} est déjà payée")
-        return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
-    
-    from apps.paiements.models import Paiement, Caisse
-    from apps.restaurant.models import TableSession
-    from django.db import transaction
-    
     try:
-        with transaction.atomic():
-            if not commande.serveur_ayant_servi:
-                commande.serveur_ayant_servi = request.user
-            
-            # Créer le paiement
-            paiement = Paiement.objects.create(
-                commande=commande,
-                montant=commande.montant_total
-            )
-            
-            commande.statut = 'payee'
-            commande.save()
-            
-            # Mettre à jour la caisse
-            caisse = Caisse.get_instance()
-            caisse.solde_actuel += commande.montant_total
-            caisse.save()
-            
-            # ✅ NOUVEAU : Marquer la session de la table pour expiration
-            sessions_actives = TableSession.objects.filter(
-                table=commande.table,
-                est_active=True
-            )
-            
-            for session in sessions_actives:
-                session.marquer_payement(commande)
-            
-            messages.success(
-                request, 
-                f"✅ Commande #{commande.id} payée avec succès ! "
-                f"La table sera déconnectée dans 1 minute. "
-                f"Montant : {commande.montant_total} GNF"
-            )
+        # ✅ Transition atomique : un double clic ne crée pas deux paiements
+        if not payer_commande(commande, request.user):
+            messages.warning(request, f"⚠️ La commande #{commande.id} est déjà payée")
+            return redirect('restaurant:commande_detail_serveur', commande_id=commande.id)
+        
+        messages.success(
+            request, 
+            f"✅ Commande #{commande.id} payée avec succès ! "
+            f"La table sera déconnectée dans 1 minute. "
+            f"Montant : {commande.montant_total} GNF"
+        )
     
     except Exception as e:
         messages.error(request, f"❌ Erreur lors du paiement : {str(e)}")
@@ -486,6 +505,51 @@ def commande_marquer_payee(request, commande_id):
 
 
 
+# ==========================================
+# FLUX TEMPS RÉEL (Server-Sent Events)
+# ==========================================
+
+def flux_disponible(request):
+    """
+    Le flux SSE n'est servi que sous ASGI (restaurant/asgi.py) : sous WSGI,
+    Django lit le générateur asynchrone jusqu'au bout avant d'envoyer quoi
+    que ce soit, et chaque écran ouvert bloquerait un worker pour rien
+    """
+    return isinstance(request, ASGIRequest)
+
+
+@login_required
+async def flux_commandes(request):
+    """
+    Flux SSE des événements de commandes (nouvelle, servie, payée)
+    Nécessite le serveur ASGI (restaurant/asgi.py) : la connexion reste ouverte
+    """
+    user = await request.auser()
+    if not (user.is_serveur() or user.is_admin()):
+        return HttpResponseForbidden("Accès refusé")
+    
+    if not flux_disponible(request):
+        # 204 : le navigateur (EventSource) cesse de se reconnecter
+        return HttpResponse(status=204)
+    
+    async def evenements():
+        # Délai de reconnexion automatique du navigateur
+        yield 'retry: 3000\n\n'
+        
+        async for evenement in get_broker().ecouter():
+            if evenement is None:
+                # Commentaire SSE : garde la connexion ouverte (proxies)
+                yield ': ping\n\n'
+                continue
+            
+            yield f"event: {evenement['type']}\ndata: {json.dumps(evenement)}\n\n"
+    
+    response = StreamingHttpResponse(evenements(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==========================================
 # GESTION DES QR CODES (Admin)
 # ==========================================
@@ -611,7 +675,8 @@ def qr_login(request, token):
     )
     
     # Stocker le token de session dans la session Django
-    request.session['table_session_token'] = session_table.session_token
+    request.session['table_session_token'] = str(session_table.session_token)
+    request.session[TableSession.CLE_SESSION_ECHEANCE] = session_table.get_donnees_session()
     request.session.set_expiry(3 * 60 * 60)  # 3 heures max
     
     token_obj.marquer_utilise()
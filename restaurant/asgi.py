@@ -3,6 +3,12 @@ ASGI config for restaurant project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Le flux temps réel des commandes (restaurant:flux_commandes, Server-Sent
+Events) garde une connexion ouverte par écran serveur : il doit être servi
+par ce point d'entrée ASGI, par exemple :
+
+    gunicorn restaurant.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -1,7 +1,13 @@
 import os
+import logging
+import threading
+import time
 from celery import Celery
+from celery.signals import task_prerun, task_postrun
 from celery.schedules import crontab
 
+logger = logging.getLogger(__name__)
+
 # Définir le module de settings par défaut
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restaurant.settings')
 
@@ -14,15 +20,6 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-découvrir les tâches dans toutes les apps installées
 app.autodiscover_tasks()
 
-# ✅ CONFIGURATION DU SCHEDULER - Email quotidien à 18h
-app.conf.beat_schedule = {
-    'envoi-rapport-quotidien': {
-        'task': 'apps.dashboard.tasks.envoyer_rapport_quotidien',
-        'schedule': crontab(hour=18, minute=0),  # Tous les jours à 18h00
-        # Pour tester, utilisez : crontab(minute='*/1')  # Toutes les minutes
-    },
-}
-
 # Timezone
 app.conf.timezone = 'Africa/Conakry'
 
@@ -32,9 +29,154 @@ def debug_task(self):
     """Tâche de debug pour tester Celery"""
     print(f'Request: {self.request!r}')
 
-app.conf.beat_schedule = {
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FILES D'ATTENTE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# - celery   : file par défaut (résumés de ventes...)
+# - rapide   : petites tâches de ménage, ne doivent jamais attendre
+# - rapports : PDF et emails, longues et gourmandes
+FILE_RAPIDE = 'rapide'
+FILE_RAPPORTS = 'rapports'
+
+app.conf.task_routes = {
+    'apps.restaurant.tasks.expirer_sessions': {'queue': FILE_RAPIDE},
+    'apps.dashboard.tasks.generer_rapport_pdf': {'queue': FILE_RAPPORTS},
+    'apps.dashboard.tasks.envoyer_rapport_email': {'queue': FILE_RAPPORTS},
+}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TÂCHES PÉRIODIQUES (registre unique)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Chaque entrée : tâche, planification, file, expiration (s) et limite
+# de temps souple (s). Une exécution non démarrée avant son expiration
+# est abandonnée plutôt que d'empiler du retard.
+TACHES_PERIODIQUES = {
+    # Filet de sécurité : l'expiration est planifiée au paiement
     'nettoyer-sessions-expirees': {
         'task': 'apps.restaurant.tasks.nettoyer_sessions_expirees',
-        'schedule': 30.0,  # Toutes les 30 secondes
+        'schedule': crontab(minute='*/15'),  # Toutes les 15 minutes
+        'queue': FILE_RAPIDE,
+        'expires': 10 * 60,
+        'soft_time_limit': 60,
+    },
+    # Filet de sécurité : le statut des tables suit les transitions
+    'reconcilier-statuts-tables': {
+        'task': 'apps.restaurant.tasks.reconcilier_statuts_tables',
+        'schedule': crontab(minute='*/5'),  # Toutes les 5 minutes
+        'queue': FILE_RAPIDE,
+        'expires': 4 * 60,
+        'soft_time_limit': 60,
+    },
+    # Filet de sécurité : le journal des ventes est reporté après chaque écriture
+    'consolider-resumes-ventes': {
+        'task': 'apps.dashboard.tasks.consolider_resume_ventes',
+        'schedule': crontab(minute='*/5'),  # Toutes les 5 minutes
+        'queue': 'celery',
+        'expires': 4 * 60,
+        'soft_time_limit': 2 * 60,
+    },
+    # Report du journal de caisse dans le solde consolidé
+    'consolider-caisse': {
+        'task': 'apps.paiements.tasks.consolider_caisse',
+        'schedule': crontab(minute='*/10'),  # Toutes les 10 minutes
+        'queue': FILE_RAPIDE,
+        'expires': 5 * 60,
+        'soft_time_limit': 60,
+    },
+    # Email quotidien à 18h
+    'envoi-rapport-quotidien': {
+        'task': 'apps.dashboard.tasks.envoyer_rapport_quotidien',
+        'schedule': crontab(hour=18, minute=0),  # Pour tester : crontab(minute='*/1')
+        'queue': FILE_RAPPORTS,
+        'expires': 2 * 60 * 60,
+        'soft_time_limit': 10 * 60,
     },
 }
+
+app.conf.beat_schedule = {
+    nom: {
+        'task': job['task'],
+        'schedule': job['schedule'],
+        'options': {'queue': job['queue'], 'expires': job['expires']},
+    }
+    for nom, job in TACHES_PERIODIQUES.items()
+}
+
+# Même file et même limite pour une exécution lancée à la main
+for job in TACHES_PERIODIQUES.values():
+    app.conf.task_routes[job['task']] = {'queue': job['queue']}
+
+app.conf.task_annotations = {
+    job['task']: {'soft_time_limit': job['soft_time_limit']}
+    for job in TACHES_PERIODIQUES.values()
+}
+
+# Nom de tâche -> nom de l'entrée périodique
+_NOMS_PERIODIQUES = {job['task']: nom for nom, job in TACHES_PERIODIQUES.items()}
+_debuts_execution = {}
+
+
+@task_prerun.connect
+def _debut_tache_periodique(task_id=None, task=None, **kwargs):
+    if task.name in _NOMS_PERIODIQUES:
+        _debuts_execution[task_id] = time.monotonic()
+
+
+@task_postrun.connect
+def _fin_tache_periodique(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Enregistre la durée et l'issue de chaque exécution d'une tâche périodique"""
+    debut = _debuts_execution.pop(task_id, None)
+    if debut is None:
+        return
+
+    from apps.dashboard.models import ExecutionPeriodique
+
+    try:
+        ExecutionPeriodique.enregistrer(
+            nom=_NOMS_PERIODIQUES[task.name],
+            tache=task.name,
+            duree=time.monotonic() - debut,
+            statut=state,
+            erreur=str(retval) if state != 'SUCCESS' else '',
+        )
+    except Exception:
+        logger.exception("Impossible d'enregistrer l'exécution de %s", task.name)
+
+
+def planifier_tache(tache, args=(), eta=None):
+    """
+    Envoie une tâche à Celery, éventuellement pour une date précise (eta)
+    Si Celery est désactivé (CELERY_ENABLED=False) ou si le broker est
+    injoignable, la tâche est exécutée par un minuteur dans le processus
+    """
+    from django.conf import settings
+    from django.utils import timezone
+    
+    if getattr(settings, 'CELERY_ENABLED', True):
+        try:
+            return tache.apply_async(args=args, eta=eta)
+        except Exception:
+            logger.warning("Broker Celery injoignable : exécution locale de %s", tache.name)
+    
+    delai = 0
+    if eta is not None:
+        delai = max(0, (eta - timezone.now()).total_seconds())
+    
+    minuteur = threading.Timer(delai, _executer_localement, args=(tache, args))
+    minuteur.daemon = True
+    minuteur.start()
+    return None
+
+
+def _executer_localement(tache, args):
+    """Exécute une tâche dans le minuteur local puis libère la connexion BDD"""
+    from django.db import connections
+    
+    try:
+        tache(*args)
+    except Exception:
+        logger.exception("Échec de l'exécution locale de %s", tache.name)
+    finally:
+        connections.close_all()
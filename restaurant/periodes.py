@@ -0,0 +1,31 @@
+# restaurant/periodes.py
+
+"""
+Journées d'activité du restaurant (journée locale, fuseau TIME_ZONE)
+
+Les commandes et les paiements portent une colonne jour_* indexée,
+calculée à l'écriture dans le fuseau Africa/Conakry. Les filtres par
+journée comparent cette colonne à des dates, au lieu de convertir
+date_* ligne par ligne (date_commande__date=...), ce qui empêchait
+l'utilisation des index.
+"""
+
+from django.utils import timezone
+
+
+def jour_local(moment=None):
+    """Journée locale (fuseau du restaurant) d'un datetime aware, maintenant par défaut"""
+    return timezone.localdate(moment, timezone.get_default_timezone())
+
+
+def sur_jours(champ, debut=None, fin=None):
+    """
+    Filtre sur une colonne de journée, de debut à fin incluses
+    (une seule journée si fin est omise, sans borne si debut vaut None)
+    À utiliser en .filter(**sur_jours('jour_paiement', debut, fin))
+    """
+    if debut is None:
+        return {f'{champ}__lte': fin} if fin else {}
+    if fin is None or fin == debut:
+        return {champ: debut}
+    return {f'{champ}__gte': debut, f'{champ}__lte': fin}
@@ -106,6 +106,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'restaurant.wsgi.application'
+ASGI_APPLICATION = 'restaurant.asgi.application'
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -202,6 +203,9 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # CONFIGURATION CELERY
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+# Désactiver Celery (les tâches planifiées s'exécutent alors dans un minuteur local)
+CELERY_ENABLED = os.getenv('CELERY_ENABLED', 'True').lower() == 'true'
+
 # Broker URL - Redis (pour les tâches en file d'attente)
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6380/0')
 
@@ -216,24 +220,62 @@ CELERY_RESULT_SERIALIZER = 'json'
 # Timezone
 CELERY_TIMEZONE = 'Africa/Conakry'
 
-# Scheduler pour les tâches périodiques
-CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Tâches périodiques : registre TACHES_PERIODIQUES dans restaurant/celery.py
+# (scheduler par défaut de Celery beat)
 
 # Logs
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes max par tâche
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CACHE (verrous d'exécution unique : restaurant/verrous.py)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Sans CACHE_REDIS_URL : cache en mémoire, propre à chaque processus
+# (suffisant en développement et en tests). En production avec plusieurs
+# workers ou machines, Redis est nécessaire pour partager les verrous.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'restaurant',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'restaurant',
+        }
+    }
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ÉVÉNEMENTS TEMPS RÉEL (SSE)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Backend de diffusion des événements de commandes :
+# - BackendMemoire : un seul processus (développement, tests)
+# - BackendRedis   : plusieurs workers (production)
+EVENEMENTS_BACKEND = os.getenv('EVENEMENTS_BACKEND', 'apps.commandes.evenements.BackendMemoire')
+EVENEMENTS_REDIS_URL = os.getenv('EVENEMENTS_REDIS_URL', CELERY_BROKER_URL)
+
 # Configuration email (utilisée pour l'envoi des rapports)
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend pour tester sans SMTP
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
+# Un serveur SMTP lent ne doit pas bloquer un worker indéfiniment (secondes)
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
-# ✅ Email de destination pour les rapports
+# ✅ Email(s) de destination pour les rapports (séparés par des virgules)
 REPORT_EMAIL_TO = os.getenv('REPORT_EMAIL_TO', DEFAULT_FROM_EMAIL)
\ No newline at end of file
@@ -0,0 +1,116 @@
+# restaurant/verrous.py
+
+"""
+Exécutions uniques partagées entre processus (workers Celery, beat, gunicorn)
+
+Le verrou est une clé posée avec cache.add() (atomique : un seul appelant
+l'obtient). Le premier appelant exécute la fonction et laisse son résultat
+dans le cache quelques instants ; les appels concurrents pour la même clé
+attendent ce résultat et le réutilisent au lieu de refaire le travail.
+
+Le cache utilisé est celui de CACHES['default'] :
+- LocMemCache : un seul processus (développement, tests)
+- RedisCache  : partagé entre toutes les machines (production, CACHE_REDIS_URL)
+"""
+
+import functools
+import hashlib
+import logging
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+PREFIXE = 'execution-unique'
+
+# Intervalle de sondage des appels en attente (secondes)
+INTERVALLE_ATTENTE = 0.5
+
+_ABSENT = object()
+
+
+class ExecutionEnCours(RuntimeError):
+    """La même exécution est déjà en cours ailleurs et son résultat n'est pas encore disponible"""
+
+
+def _empreinte(args, kwargs):
+    """Clé stable dérivée des arguments d'appel"""
+    texte = repr((args, sorted(kwargs.items())))
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()[:32]
+
+
+def _liberer(cle, jeton):
+    """Retire le verrou seulement s'il nous appartient encore (il a pu expirer)"""
+    if cache.get(cle) == jeton:
+        cache.delete(cle)
+
+
+def execution_unique(nom, cle=None, duree=10 * 60, attente=0, conservation=60):
+    """
+    Décorateur : une seule exécution à la fois par clé
+
+    nom          : préfixe de la clé (en général le nom de la fonction)
+    cle          : fonction (*args, **kwargs) -> str ; par défaut, empreinte des arguments
+    duree        : durée de vie du verrou, au-delà l'exécution est jugée perdue (s)
+    attente      : temps maximal d'attente du résultat d'une exécution concurrente (s)
+    conservation : durée pendant laquelle le résultat reste réutilisable (s)
+
+    Un appel qui ne peut ni exécuter ni obtenir le résultat dans le délai
+    lève ExecutionEnCours
+    """
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            suffixe = cle(*args, **kwargs) if cle else _empreinte(args, kwargs)
+            cle_verrou = f"{PREFIXE}:{nom}:{suffixe}:verrou"
+            cle_resultat = f"{PREFIXE}:{nom}:{suffixe}:resultat"
+            limite = time.monotonic() + attente
+
+            while True:
+                resultat = cache.get(cle_resultat, _ABSENT)
+                if resultat is not _ABSENT:
+                    return resultat
+
+                jeton = uuid.uuid4().hex
+                if cache.add(cle_verrou, jeton, duree):
+                    try:
+                        resultat = fonction(*args, **kwargs)
+                        if conservation:
+                            cache.set(cle_resultat, resultat, conservation)
+                        return resultat
+                    finally:
+                        _liberer(cle_verrou, jeton)
+
+                # Verrou tenu ailleurs : on attend son résultat (ou sa libération
+                # après un échec, auquel cas on retente l'exécution nous-mêmes)
+                if time.monotonic() >= limite:
+                    raise ExecutionEnCours(f"{nom} déjà en cours ({suffixe})")
+                time.sleep(INTERVALLE_ATTENTE)
+
+        return enveloppe
+    return decorateur
+
+
+def tache_unique(nom=None, **options):
+    """
+    Variante pour les tâches Celery (à placer sous @shared_task) :
+    un doublon (deux beat, deux workers) ne relance pas le travail,
+    il renvoie le résultat de l'exécution en cours ou juste terminée,
+    ou un message s'il ne l'obtient pas à temps
+    """
+    def decorateur(fonction):
+        unique = execution_unique(nom or fonction.__name__, **options)(fonction)
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            try:
+                return unique(*args, **kwargs)
+            except ExecutionEnCours as e:
+                logger.info("Doublon ignoré : %s", e)
+                return f"⏭️ Ignorée : {e}"
+
+        return enveloppe
+    return decorateur
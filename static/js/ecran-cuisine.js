@@ -0,0 +1,108 @@
+// static/js/ecran-cuisine.js - File de l'écran cuisine, mise à jour par curseur
+
+(function () {
+    const racine = document.querySelector('[data-cuisine-url]');
+    if (!racine) {
+        return;
+    }
+
+    const file = racine.querySelector('[data-role="file"]');
+    const vide = racine.querySelector('[data-role="vide"]');
+    const totalPlats = racine.querySelector('[data-role="total-plats"]');
+
+    // Intervalle entre deux demandes de changements (ms)
+    const INTERVALLE = 5000;
+
+    let curseur = racine.dataset.curseur;
+
+    function heure(iso) {
+        const d = new Date(iso);
+        return ('0' + d.getHours()).slice(-2) + ':' + ('0' + d.getMinutes()).slice(-2);
+    }
+
+    function url(modele, id) {
+        return modele.replace('/0/', '/' + id + '/');
+    }
+
+    function carte(platId) {
+        return file.querySelector('[data-plat-id="' + platId + '"]');
+    }
+
+    function creerCarte(groupe) {
+        const el = document.createElement('div');
+        el.className = 'bg-white rounded-2xl shadow-lg p-4 sm:p-6 border-l-4 border-orange-500';
+        el.dataset.platId = groupe.plat_id;
+        el.innerHTML =
+            '<p class="text-3xl sm:text-4xl font-bold text-orange-600" data-champ="quantite"></p>' +
+            '<h3 class="text-xl sm:text-2xl font-bold text-gray-900 mb-2" data-champ="nom"></h3>' +
+            '<p class="text-sm text-gray-600"><span data-champ="tables"></span> · ' +
+            '<span data-champ="commandes"></span></p>' +
+            '<p class="text-xs text-gray-500 mt-1">Plus ancienne : <span data-champ="heure"></span></p>' +
+            '<p class="text-xs font-semibold text-orange-700 mt-1">🔥 <span data-champ="en-preparation"></span> en préparation</p>' +
+            '<div class="grid grid-cols-2 gap-2 mt-3">' +
+            '<a data-role="preparer" href="' + url(racine.dataset.urlPreparer, groupe.plat_id) + '"' +
+            ' class="py-2 bg-orange-100 hover:bg-orange-200 text-orange-700 rounded-xl font-medium text-center transition-colors text-sm">🔥 Lancer</a>' +
+            '<a data-role="prete" href="' + url(racine.dataset.urlPrete, groupe.plat_id) + '"' +
+            ' class="py-2 bg-green-600 hover:bg-green-700 text-white rounded-xl font-medium text-center transition-colors shadow-lg text-sm">✅ Prêt</a>' +
+            '</div>';
+        return el;
+    }
+
+    function poserGroupe(groupe) {
+        const el = carte(groupe.plat_id) || creerCarte(groupe);
+        el.dataset.plusAncienne = groupe.plus_ancienne;
+        el.querySelector('[data-champ="quantite"]').textContent = groupe.quantite + '×';
+        el.querySelector('[data-champ="nom"]').textContent = groupe.nom;
+        el.querySelector('[data-champ="tables"]').textContent = groupe.nombre_tables + ' table(s)';
+        el.querySelector('[data-champ="commandes"]').textContent = groupe.nombre_commandes + ' commande(s)';
+        el.querySelector('[data-champ="heure"]').textContent = heure(groupe.plus_ancienne);
+        el.querySelector('[data-champ="en-preparation"]').textContent = groupe.en_preparation;
+        file.appendChild(el);
+    }
+
+    function trier() {
+        const cartes = Array.from(file.children);
+        cartes.sort(function (a, b) {
+            return new Date(a.dataset.plusAncienne) - new Date(b.dataset.plusAncienne);
+        });
+        cartes.forEach(function (el) { file.appendChild(el); });
+
+        const total = cartes.reduce(function (somme, el) {
+            return somme + (parseInt(el.querySelector('[data-champ="quantite"]').textContent, 10) || 0);
+        }, 0);
+        totalPlats.textContent = total;
+        vide.classList.toggle('hidden', cartes.length > 0);
+    }
+
+    function appliquer(donnees) {
+        if (donnees.complet) {
+            file.innerHTML = '';
+        }
+        donnees.retires.forEach(function (platId) {
+            const el = carte(platId);
+            if (el) {
+                el.remove();
+            }
+        });
+        donnees.groupes.forEach(poserGroupe);
+        trier();
+        curseur = donnees.curseur;
+    }
+
+    function actualiser() {
+        fetch(racine.dataset.cuisineUrl + '?depuis=' + encodeURIComponent(curseur), {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' },
+        })
+            .then(function (reponse) { return reponse.ok ? reponse.json() : null; })
+            .then(function (donnees) {
+                if (donnees) {
+                    appliquer(donnees);
+                }
+            })
+            .catch(function () { /* Réseau indisponible : nouvel essai au prochain tour */ })
+            .finally(function () { setTimeout(actualiser, INTERVALLE); });
+    }
+
+    setTimeout(actualiser, INTERVALLE);
+})();
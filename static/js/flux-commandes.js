@@ -0,0 +1,227 @@
+// static/js/flux-commandes.js - Mise à jour en direct des écrans serveur (SSE)
+
+(function () {
+    const racine = document.querySelector('[data-flux-url]');
+    if (!racine || !window.EventSource) {
+        return;
+    }
+
+    const page = racine.dataset.fluxPage;
+    const statutFilter = racine.dataset.statutFilter || '';
+
+    const BADGES_COMMANDE = {
+        en_attente: ['⏳ En attente', 'bg-yellow-100 text-yellow-800 border-2 border-yellow-300'],
+        servie: ['🍽️ Servie', 'bg-blue-100 text-blue-800 border-2 border-blue-300'],
+        payee: ['✅ Payée', 'bg-green-100 text-green-800 border-2 border-green-300'],
+    };
+
+    const BADGES_TABLE = {
+        libre: ['✅ Libre', 'bg-green-100 text-green-800 border-2 border-green-300'],
+        en_attente: ['⏳ Commande en attente', 'bg-yellow-100 text-yellow-800 border-2 border-yellow-300 animate-pulse'],
+        servie: ['🍽️ Servie (attente paiement)', 'bg-blue-100 text-blue-800 border-2 border-blue-300'],
+    };
+
+    const CLASSES_BADGE = 'inline-flex items-center px-3 sm:px-4 py-1 rounded-full text-xs sm:text-sm font-bold';
+
+    function url(modele, id) {
+        return modele.replace('/0/', '/' + id + '/');
+    }
+
+    function echapper(texte) {
+        const div = document.createElement('div');
+        div.textContent = texte;
+        return div.innerHTML;
+    }
+
+    function ajusterStat(nom, delta) {
+        const el = racine.querySelector('[data-stat="' + nom + '"]');
+        if (el) {
+            el.textContent = Math.max(0, (parseInt(el.textContent, 10) || 0) + delta);
+        }
+    }
+
+    function poserBadge(el, badges, statut) {
+        if (!el || !badges[statut]) {
+            return;
+        }
+        el.className = CLASSES_BADGE + ' ' + badges[statut][1];
+        el.textContent = badges[statut][0];
+    }
+
+    function heure(iso) {
+        const d = new Date(iso);
+        return ('0' + d.getHours()).slice(-2) + ':' + ('0' + d.getMinutes()).slice(-2);
+    }
+
+    // ==========================================
+    // Liste des commandes (commande_list_serveur)
+    // ==========================================
+
+    function boutonAction(evt) {
+        const suivant = '?next=' + encodeURIComponent(window.location.pathname);
+        if (evt.statut === 'en_attente') {
+            return '<a href="' + url(racine.dataset.urlServie, evt.commande_id) + suivant + '"' +
+                ' onclick="return confirm(\'Marquer cette commande comme servie ?\')"' +
+                ' class="py-2.5 sm:py-3 bg-blue-600 hover:bg-blue-700 text-white rounded-xl font-medium text-center transition-colors shadow-lg text-sm sm:text-base">' +
+                '🍽️ Marquer servie</a>';
+        }
+        if (evt.statut === 'servie') {
+            return '<a href="' + url(racine.dataset.urlPayee, evt.commande_id) + suivant + '"' +
+                ' onclick="return confirm(\'Confirmer le paiement de cette commande ?\')"' +
+                ' class="py-2.5 sm:py-3 bg-green-600 hover:bg-green-700 text-white rounded-xl font-medium text-center transition-colors shadow-lg text-sm sm:text-base">' +
+                '💳 Marquer payée</a>';
+        }
+        return '';
+    }
+
+    function majCarteCommande(carte, evt) {
+        carte.dataset.statut = evt.statut;
+        poserBadge(carte.querySelector('[data-role="statut"]'), BADGES_COMMANDE, evt.statut);
+
+        // Commande servie : plus de plat prêt en attente du serveur
+        const indicateur = carte.querySelector('[data-role="lignes-pretes"]');
+        if (indicateur && evt.statut !== 'en_attente') {
+            indicateur.classList.add('hidden');
+        }
+
+        const actions = carte.querySelector('[data-role="actions"]');
+        if (actions) {
+            actions.querySelectorAll('[data-role="transition"]').forEach(function (a) { a.remove(); });
+            actions.insertAdjacentHTML('beforeend', boutonAction(evt).replace('<a ', '<a data-role="transition" '));
+        }
+
+        if (statutFilter && statutFilter !== evt.statut) {
+            carte.remove();
+        }
+    }
+
+    function nouvelleCarteCommande(evt) {
+        const liste = racine.querySelector('[data-role="liste-commandes"]');
+        const tableFilter = (racine.dataset.tableFilter || '').toLowerCase();
+        if (!liste || (statutFilter && statutFilter !== 'en_attente') ||
+            (tableFilter && evt.table.toLowerCase().indexOf(tableFilter) === -1)) {
+            return;
+        }
+
+        const html =
+            '<div class="bg-white rounded-2xl shadow-lg hover:shadow-xl transition-shadow ring-2 ring-yellow-300"' +
+            ' data-commande-id="' + evt.commande_id + '" data-statut="' + evt.statut + '">' +
+            '<div class="p-4 sm:p-6">' +
+            '<div class="flex flex-col sm:flex-row sm:items-start justify-between mb-3 sm:mb-4">' +
+            '<div class="mb-3 sm:mb-0"><div class="flex flex-col sm:flex-row sm:items-center gap-2 sm:gap-3 mb-1 sm:mb-2">' +
+            '<h3 class="text-lg sm:text-xl md:text-2xl font-bold text-gray-900">Commande #' + evt.commande_id + '</h3>' +
+            '<span class="px-2 sm:px-3 py-1 rounded-full text-xs font-bold bg-gray-100 text-gray-700">🪑 ' + echapper(evt.table) + '</span>' +
+            '<span data-role="statut"></span></div>' +
+            '<p class="text-sm sm:text-base text-gray-600">🕐 ' + heure(evt.date_commande) + ' · ' + evt.nombre_plats + ' plat(s)</p></div>' +
+            '<div class="text-left sm:text-right"><p class="text-xs sm:text-sm text-gray-600 mb-1">Montant</p>' +
+            '<p class="text-xl sm:text-2xl md:text-3xl font-bold text-purple-600">' + echapper(evt.montant_total) + ' GNF</p></div>' +
+            '</div>' +
+            '<div class="flex flex-col sm:flex-row gap-2 sm:gap-3" data-role="actions">' +
+            '<a href="' + url(racine.dataset.urlDetail, evt.commande_id) + '"' +
+            ' class="py-2.5 sm:py-3 bg-purple-100 hover:bg-purple-200 text-purple-700 rounded-xl font-medium text-center transition-colors text-sm sm:text-base">👁️ Voir détails</a>' +
+            '</div></div></div>';
+
+        const vide = racine.querySelector('[data-role="aucune-commande"]');
+        if (vide) {
+            vide.remove();
+        }
+        liste.insertAdjacentHTML('afterbegin', html);
+        majCarteCommande(liste.firstElementChild, evt);
+    }
+
+    function surEvenementCommandes(evt) {
+        const carte = racine.querySelector('[data-commande-id="' + evt.commande_id + '"]');
+
+        if (evt.type === 'lignes_pretes') {
+            const indicateur = carte && carte.querySelector('[data-role="lignes-pretes"]');
+            if (indicateur) {
+                indicateur.classList.remove('hidden');
+            }
+            return;
+        }
+
+        if (evt.type === 'commande_creee') {
+            ajusterStat('total', 1);
+            ajusterStat('en_attente', 1);
+            if (!carte) {
+                nouvelleCarteCommande(evt);
+            }
+        } else if (evt.type === 'commande_servie') {
+            ajusterStat('en_attente', -1);
+            ajusterStat('servies', 1);
+        } else if (evt.type === 'commande_payee') {
+            ajusterStat('servies', -1);
+            ajusterStat('payees', 1);
+        }
+
+        if (carte) {
+            majCarteCommande(carte, evt);
+        }
+    }
+
+    // ==========================================
+    // Plan de salle (table_list_serveur)
+    // ==========================================
+
+    const STATS_TABLE = { libre: 'libres', en_attente: 'en_attente', servie: 'servies' };
+
+    function changerStatutTable(carte, statut) {
+        const ancien = carte.dataset.statut;
+        if (ancien === statut) {
+            return;
+        }
+        carte.dataset.statut = statut;
+        ajusterStat(STATS_TABLE[ancien], -1);
+        ajusterStat(STATS_TABLE[statut], 1);
+        poserBadge(carte.querySelector('[data-role="statut"]'), BADGES_TABLE, statut);
+
+        carte.classList.toggle('hidden', Boolean(statutFilter) && statutFilter !== statut);
+    }
+
+    function surEvenementTables(evt) {
+        const carte = racine.querySelector('[data-table-id="' + evt.table_id + '"]');
+        if (!carte) {
+            return;
+        }
+
+        const bloc = carte.querySelector('[data-role="derniere-commande"]');
+        const estDerniere = bloc && bloc.dataset.commandeId === String(evt.commande_id);
+        const compteur = function (role, delta) {
+            const el = carte.querySelector('[data-role="' + role + '"]');
+            if (el) {
+                el.textContent = Math.max(0, (parseInt(el.textContent, 10) || 0) + delta);
+            }
+        };
+
+        if (evt.type === 'commande_creee') {
+            compteur('total-commandes', 1);
+            compteur('commandes-en-attente', 1);
+            if (bloc) {
+                bloc.dataset.commandeId = evt.commande_id;
+                bloc.querySelector('[data-champ="id"]').textContent = '#' + evt.commande_id;
+                bloc.querySelector('[data-champ="montant"]').textContent = evt.montant_total + ' GNF';
+                bloc.querySelector('[data-champ="heure"]').textContent = heure(evt.date_commande);
+                bloc.classList.remove('hidden');
+            }
+            changerStatutTable(carte, 'en_attente');
+        } else if (evt.type === 'commande_servie') {
+            compteur('commandes-en-attente', -1);
+            if (estDerniere) {
+                changerStatutTable(carte, 'servie');
+            }
+        } else if (evt.type === 'commande_payee' && estDerniere) {
+            bloc.classList.add('hidden');
+            bloc.dataset.commandeId = '';
+            changerStatutTable(carte, 'libre');
+        }
+    }
+
+    const gestionnaire = page === 'tables' ? surEvenementTables : surEvenementCommandes;
+    const source = new EventSource(racine.dataset.fluxUrl);
+
+    ['commande_creee', 'lignes_pretes', 'commande_servie', 'commande_payee'].forEach(function (type) {
+        source.addEventListener(type, function (e) {
+            gestionnaire(JSON.parse(e.data));
+        });
+    });
+})();